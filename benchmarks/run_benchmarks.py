@@ -0,0 +1,226 @@
+''' Benchmarks of the simulation and analysis hot paths.
+
+Every benchmark reports its best wall time over a few repeats in each of several rounds through the
+suite, so that a passing burst of load on the machine does not hit all of them, its throughput
+(interactions, calls or runs per second) and the peak memory traced by tracemalloc. Results are written
+as JSON; given a baseline they are compared against it and the script exits with status 1 when a
+benchmark got slower or uses more memory than the tolerances allow. Times are compared relative to
+a fixed pure-Python calibration loop timed in the same run, so that a machine that is busier or
+slower as a whole does not show up as a regression.
+
+    python benchmarks/run_benchmarks.py --output bench.json --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --quick --save-baseline benchmarks/baseline.json
+
+Baselines are only comparable on the machine they were recorded on, the machine is stored with them. '''
+
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from networkx.algorithms.community import greedy_modularity_communities, modularity  # noqa: E402
+from opynions.core.simulation import UCM_adjust_opinion, run_sim  # noqa: E402
+from opynions.core.utils import get_opinion_hist  # noqa: E402
+from opynions.core.pool import get_pool  # noqa: E402
+from opynions.analysis.multiprocessing import multiprocess_all  # noqa: E402
+from opynions.analysis.similarity import compute_neighbor_similarity  # noqa: E402
+from opynions.settings import MODULARITY_RES  # noqa: E402
+
+SEED = 12345
+TIME_STEPS = 10
+RUN_SIM_STEPS = {200: 10, 2000: 10, 20000: 2}  # rewiring cost grows with N, keep the large case short
+TIME_TOLERANCE = 0.20  # a benchmark may be this much slower than the baseline
+TIME_TOLERANCES = {  # except the ones that vary more between runs of this script
+    "multiprocess_all_3x3": 0.35,  # inter-process communication and scheduling of the pool
+}
+MEMORY_TOLERANCE = 0.10  # and use this much more memory
+
+def _final_graph(n_nodes, time_steps=20):
+    random.seed(SEED)
+    g, _ = run_sim(n_nodes, time_steps, 0.3, 0.2)
+    return g
+
+def bench_ucm_adjust_opinion():
+    rng = np.random.default_rng(SEED)
+    pairs = rng.random((100_000, 2)).tolist()
+
+    def work():
+        for i, j in pairs:
+            UCM_adjust_opinion(i, j, 0.2, 0.3)
+    return work, len(pairs), "calls/s"
+
+def bench_run_sim(n_nodes, m_ba):
+    def work():
+        random.seed(SEED)
+        run_sim(n_nodes, RUN_SIM_STEPS[n_nodes], 0.3, 0.2, m_ba)
+    return work, n_nodes * RUN_SIM_STEPS[n_nodes], "interactions/s"
+
+def bench_neighbor_similarity():
+    g = _final_graph(2000)
+    return (lambda: compute_neighbor_similarity(g)), 1, "graphs/s"
+
+def bench_communities_modularity():
+    g = _final_graph(1000)
+
+    def work():
+        communities = greedy_modularity_communities(g, resolution=MODULARITY_RES, best_n=7)
+        modularity(g, communities)
+    return work, 1, "graphs/s"
+
+def bench_get_opinion_hist():
+    def work():
+        random.seed(SEED)
+        get_opinion_hist(5, 500, TIME_STEPS, 0.3, 0.2)
+    return work, 5 * 500 * TIME_STEPS, "interactions/s"
+
+def bench_multiprocess_all():
+    get_pool()  # start the workers outside the measurement
+
+    def work():
+        multiprocess_all([0.1, 0.25, 0.4], [0.1, 0.25, 0.4], 2, 100, TIME_STEPS, 2)
+    return work, 9 * 2 * 100 * TIME_STEPS, "interactions/s"
+
+def benchmarks(quick=False):
+    ''' Maps benchmark names to functions returning (work, units of work, unit name).'''
+    cases = {"ucm_adjust_opinion": bench_ucm_adjust_opinion}
+    for n_nodes in sorted(RUN_SIM_STEPS)[:2] if quick else sorted(RUN_SIM_STEPS):
+        for m_ba in (1, 2, 4):
+            cases[f"run_sim_N{n_nodes}_m{m_ba}"] = lambda n=n_nodes, m=m_ba: bench_run_sim(n, m)
+    cases.update({"neighbor_similarity_N2000": bench_neighbor_similarity,
+                  "communities_modularity_N1000": bench_communities_modularity,
+                  "get_opinion_hist": bench_get_opinion_hist,
+                  # peak memory of the parent process only, the workers are not traced
+                  "multiprocess_all_3x3": bench_multiprocess_all})
+    return cases
+
+def measure(setup, min_time=1.0, min_repeats=5, max_repeats=200):
+    """
+    Times a benchmark: repeats the work at least min_repeats times and until min_time has passed
+    (at most max_repeats times) and keeps the best time, then traces its peak memory in one more run.
+
+    Returns:
+        dict: "seconds", "rate" (units per second), "unit", "peak_bytes" and "repeats".
+    """
+    work, units, unit = setup()
+    times = []
+    while len(times) < min_repeats or (sum(times) < min_time and len(times) < max_repeats):
+        start = time.perf_counter()
+        work()
+        times.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    work()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": min(times), "rate": units / min(times), "unit": unit, "peak_bytes": peak,
+            "repeats": len(times)}
+
+def calibrate(repeats=20):
+    ''' Best time of a fixed pure-Python workload, the yardstick of the time comparisons.'''
+    def work():
+        total = 0.0
+        values = {}
+        for i in range(200_000):
+            values[i % 1000] = total = total + (i % 7) * 0.5
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        work()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def machine():
+    return {"platform": platform.platform(), "processor": platform.processor(), "python": platform.python_version(),
+            "cpu_count": os.cpu_count(), "numpy": np.__version__}
+
+def compare(results, baseline, time_tolerance=None, memory_tolerance=MEMORY_TOLERANCE, speed=1.0):
+    """
+    Compares benchmark results with a baseline.
+
+    Args:
+        results, baseline (dict): the "results" of two runs of this script.
+        time_tolerance (float, optional): allowed relative increase of the time. Default TIME_TOLERANCES,
+                                          TIME_TOLERANCE for the benchmarks not in it.
+        memory_tolerance (float, optional): allowed relative increase of the peak memory.
+        speed (float, optional): calibration time of the results over that of the baseline,
+                                 the baseline times are scaled by it. Default 1.0.
+
+    Returns:
+        list: (name, message) of every regression, empty if there are none.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        expected = reference["seconds"] * speed
+        tolerance = TIME_TOLERANCES.get(name, TIME_TOLERANCE) if time_tolerance is None else time_tolerance
+        if result["seconds"] > expected * (1 + tolerance):
+            regressions.append((name, f"time {result['seconds']:.3g} s vs {expected:.3g} s "
+                                      f"(+{result['seconds'] / expected - 1:.0%})"))
+        if result["peak_bytes"] > reference["peak_bytes"] * (1 + memory_tolerance) + 64 * 1024:
+            regressions.append((name, f"peak memory {result['peak_bytes'] / 1e6:.1f} MB vs "
+                                      f"{reference['peak_bytes'] / 1e6:.1f} MB"))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', help="compare against this JSON file, exit 1 on regressions")
+    parser.add_argument('--save-baseline', help="write the results to this JSON file as the new baseline")
+    parser.add_argument('--quick', action='store_true', help="skip the N=20000 simulations")
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this")
+    parser.add_argument('--rounds', type=int, default=3, help="runs through the suite, the best is kept")
+    parser.add_argument('--time-tolerance', type=float, help="for all benchmarks, instead of TIME_TOLERANCES")
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    calibration = calibrate()
+    cases = {name: setup for name, setup in benchmarks(args.quick).items() if args.filter in name}
+    results = {}
+    for _ in range(args.rounds):
+        for name, setup in cases.items():
+            result = measure(setup)
+            if name in results:
+                result["repeats"] += results[name]["repeats"]
+                result["peak_bytes"] = min(result["peak_bytes"], results[name]["peak_bytes"])
+                if results[name]["seconds"] < result["seconds"]:
+                    result.update(seconds=results[name]["seconds"], rate=results[name]["rate"])
+            results[name] = result
+        calibration = min(calibration, calibrate())
+    for name, result in results.items():
+        print(f"{name:32s} {result['seconds']:9.4f} s {result['rate']:12.4g} "
+              f"{result['unit']:15s} {result['peak_bytes'] / 1e6:8.2f} MB")
+
+    report = {"machine": machine(), "created": time.strftime('%Y-%m-%dT%H:%M:%S'), "calibration": calibration,
+              "results": results}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline["machine"] != report["machine"]:
+            print("WARNING: the baseline was recorded on another machine", file=sys.stderr)
+        speed = calibration / baseline["calibration"]
+        print(f"This run is {speed:.2f}x as slow as the baseline on the calibration loop")
+        regressions = compare(results, baseline["results"], args.time_tolerance, args.memory_tolerance, speed)
+        for name, message in regressions:
+            print(f"REGRESSION {name}: {message}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
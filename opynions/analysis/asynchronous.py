@@ -0,0 +1,113 @@
+''' Asyncio interface to the sweeps: results stream in per parameter point while the
+event loop keeps running, on the shared worker pool of opynions.core.pool. '''
+
+import asyncio
+import itertools
+import multiprocessing as mp
+import numpy as np
+from opynions.analysis.combined import RUN_METRICS
+from opynions.analysis.multiprocessing import make_tasks, summarize_cells, worker_runs
+from opynions.analysis.results_log import cell_key
+from opynions.core.pool import get_pool
+
+async def iter_sweep(cells, n_runs, n_nodes, time_steps, m_ba, metrics=RUN_METRICS, batch_cost=None,
+                     confidence=None, ci_method='bootstrap', max_in_flight=None, indexed=False):
+    """
+    Async iterator over the results of a sweep, yielding every parameter point as soon as
+    all its runs are done. Tasks are ordered and batched as in multiprocess_runs(), but only
+    max_in_flight of them are handed to the pool at a time, so stopping the iteration (break,
+    aclose() or cancelling the task consuming it) drops all tasks that have not started;
+    the ones in flight finish in the background and are discarded.
+
+    The sweep runs on the shared pool as it is: a pool smaller than one worker per CPU is not
+    replaced, since that would block the event loop and break other sweeps still using it.
+
+    Args:
+        cells (list): the parameter points, (epsilon, mu) tuples or dicts, see multiprocess_runs().
+        n_runs (int): Number of runs for each parameter point.
+        n_nodes (int): Number of nodes in the network.
+        time_steps (int): Number of time steps for the simulation.
+        m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        metrics (list, optional): metrics to compute, see analyze_graph(). Default RUN_METRICS.
+        batch_cost (float, optional): minimum cost of a task, see make_tasks(). Default None.
+        confidence, ci_method (optional): confidence intervals, see multiprocess_all().
+        max_in_flight (int, optional): tasks handed to the pool at once. Default twice the number of CPUs.
+        indexed (bool, optional): yield (position in cells, results) tuples. Default False.
+
+    Yields:
+        dict: results of one parameter point with its coordinates, as in multiprocess_all().
+    """
+    loop = asyncio.get_running_loop()
+    defaults = {'n_nodes': n_nodes, 'time_steps': time_steps, 'm_ba': m_ba}
+    coords = [cell if isinstance(cell, dict) else {'epsilon': cell[0], 'mu': cell[1]} for cell in cells]
+    keys = [cell_key(**{**defaults, **cell}) for cell in coords]
+    tasks = make_tasks({cell_id: n_runs for cell_id in range(len(keys))}, keys, metrics, batch_cost)
+    if max_in_flight is None:
+        max_in_flight = 2 * mp.cpu_count()
+
+    pool = get_pool(grow=False)
+    finished = asyncio.Queue()
+    stopped = False
+
+    def deliver(result):
+        ''' Called by the pool's result thread, hands the result over to the event loop.'''
+        if not stopped:
+            try:
+                loop.call_soon_threadsafe(finished.put_nowait, result)
+            except RuntimeError:
+                pass  # the event loop is closed
+
+    per_cell = [[] for _ in cells]
+    outstanding = [n_runs for _ in cells]
+    next_task = 0
+    in_flight = 0
+    try:
+        while next_task < len(tasks) or in_flight:
+            while next_task < len(tasks) and in_flight < max_in_flight:
+                pool.apply_async(worker_runs, (tasks[next_task],), callback=deliver, error_callback=deliver)
+                next_task += 1
+                in_flight += 1
+            result = await finished.get()
+            in_flight -= 1
+            if isinstance(result, BaseException):
+                raise result
+
+            cell_id, per_run, _ = result
+            per_cell[cell_id].extend(per_run)
+            outstanding[cell_id] -= len(per_run)
+            if outstanding[cell_id] == 0:
+                runs = {key: np.array([run[key] for run in per_cell[cell_id]], dtype=float)
+                        for key in per_cell[cell_id][0]}
+                results_dict = summarize_cells([coords[cell_id]], [runs], False, confidence, ci_method)[0]
+                yield (cell_id, results_dict) if indexed else results_dict
+    finally:
+        stopped = True
+
+async def sweep(epsilon_values, mu_values, n_runs, n_nodes, time_steps, m_ba, confidence=None,
+                ci_method='bootstrap', on_result=None, **kwargs):
+    """
+    Awaitable version of multiprocess_all(): `results = await sweep(...)`. Cancelling the
+    awaiting task stops the sweep, see iter_sweep().
+
+    Args:
+        epsilon_values, mu_values, n_runs, n_nodes, time_steps, m_ba, confidence, ci_method:
+            see multiprocess_all().
+        on_result (callable, optional): called with every result dict as it arrives, e.g. to
+            update a live heatmap. Default None.
+        **kwargs: passed on to iter_sweep(), e.g. metrics or max_in_flight.
+
+    Returns:
+        list: one dict per parameter combination, in the order of multiprocess_all().
+    """
+    param_grid = [{'epsilon': epsilon, 'mu': mu} for epsilon, mu in itertools.product(epsilon_values, mu_values)]
+    list_of_dicts = [None for _ in param_grid]
+    results = iter_sweep(param_grid, n_runs, n_nodes, time_steps, m_ba, confidence=confidence,
+                         ci_method=ci_method, indexed=True, **kwargs)
+    try:
+        async for cell_id, results_dict in results:
+            list_of_dicts[cell_id] = results_dict
+            if on_result is not None:
+                on_result(results_dict)
+    finally:
+        await results.aclose()
+    return list_of_dicts
@@ -0,0 +1,227 @@
+''' SQLite catalog of everything simulated: single runs and sweep cells with their full parameters,
+seed, engine, code version, metrics and the snapshot they are stored in, if any. Parameters are
+indexed columns, metrics a (entry, name, value) table, so queries such as all runs with
+n_nodes >= 2000, mu = 0.25 and epsilon between 0.1 and 0.2 do not scan the catalog. '''
+
+import functools
+import json
+import os
+import sqlite3
+import subprocess
+import time
+from opynions.analysis.results_log import PARAMETERS, read_results_log
+from opynions.analysis.storage import is_results_store, load_table, read_legacy_csv, read_params
+
+ENGINE = "networkx"
+FLOAT_TOLERANCE = 1e-9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    epsilon REAL, mu REAL, n_nodes INTEGER, time_steps INTEGER, m_ba INTEGER,
+    n_runs INTEGER,
+    seed INTEGER,
+    engine TEXT,
+    code_version TEXT,
+    snapshot TEXT,
+    snapshot_index INTEGER,
+    source TEXT,
+    extra TEXT,
+    created REAL
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    entry_id INTEGER NOT NULL REFERENCES entries(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    value REAL,
+    PRIMARY KEY (entry_id, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_mu_epsilon ON entries (mu, epsilon);
+CREATE INDEX IF NOT EXISTS entries_epsilon ON entries (epsilon);
+CREATE INDEX IF NOT EXISTS entries_n_nodes ON entries (n_nodes, time_steps);
+CREATE INDEX IF NOT EXISTS entries_source ON entries (source);
+"""
+
+COLUMNS = ("kind",) + PARAMETERS + ("n_runs", "seed", "engine", "code_version", "snapshot", "snapshot_index",
+                                    "source", "extra", "created")
+
+@functools.lru_cache(maxsize=1)
+def code_version():
+    ''' git describe of the package checkout, or the installed version if it is not a git checkout.'''
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        from importlib.metadata import PackageNotFoundError, version
+        try:
+            return version('opynions')
+        except PackageNotFoundError:
+            return "unknown"
+
+class RunCatalog:
+    """
+    A catalog in an SQLite file, created if it does not exist. Use it as a context manager or close() it.
+
+    Args:
+        db_path (str, optional): Path of the database. Default 'runs.sqlite'.
+    """
+    def __init__(self, db_path='runs.sqlite'):
+        self.db_path = db_path
+        self._connection = sqlite3.connect(db_path, timeout=30)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def register(self, entries):
+        """
+        Adds entries in one transaction.
+
+        Args:
+            entries (list): dicts with any of the parameters ('epsilon', 'mu', 'n_nodes', 'time_steps', 'm_ba'),
+                'kind' ('run' or 'cell', default 'run'), 'n_runs', 'seed', 'engine' (default ENGINE),
+                'code_version' (default code_version()), 'snapshot' (path) and 'snapshot_index',
+                'source', 'metrics' (dict name -> value) and 'extra' (JSON-serializable). A 'seed' among
+                the metrics, as in the runs of worker_runs(), is stored as the seed.
+
+        Returns:
+            list: ids of the new entries.
+        """
+        ids = []
+        now = time.time()
+        with self._connection:
+            for entry in entries:
+                row = {"kind": "run", "engine": ENGINE, "code_version": code_version(), "created": now, **entry}
+                row["metrics"] = dict(row.get("metrics", {}))
+                seed = row["metrics"].pop("seed", None)
+                if row.get("seed") is None and seed is not None and seed == seed:  # NaN for runs without one
+                    row["seed"] = int(seed)
+                if row.get("extra") is not None:
+                    row["extra"] = json.dumps(row["extra"])
+                cursor = self._connection.execute(
+                    f"INSERT INTO entries ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                    [_plain(row.get(column)) for column in COLUMNS])
+                ids.append(cursor.lastrowid)
+                self._connection.executemany(
+                    "INSERT INTO metrics (entry_id, name, value) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, name, _plain(value)) for name, value in row["metrics"].items()])
+        return ids
+
+    def register_run(self, params, metrics, **fields):
+        ''' Adds one run, see register(). Returns its id.'''
+        return self.register([{**params, "metrics": metrics, **fields}])[0]
+
+    def register_results(self, results, params=None, kind="cell", **fields):
+        """
+        Adds sweep results, e.g. the list of dicts of multiprocess_all() or a loaded table.
+
+        Args:
+            results (list or pandas.DataFrame): one dict or row per point, parameters next to the metrics.
+            params (dict, optional): parameters missing from the rows, e.g. {'n_nodes': 200, 'n_runs': 10}.
+            kind (str, optional): 'cell' for summaries of several runs, 'run' for single runs. Default 'cell'.
+            **fields: other columns for all entries, e.g. source.
+
+        Returns:
+            list: ids of the new entries.
+        """
+        rows = results.to_dict('records') if hasattr(results, 'to_dict') else results
+        named = set(PARAMETERS) | {"n_runs", "seed"}
+        entries = []
+        for row in rows:
+            entry = {**(params or {}), **{name: value for name, value in row.items() if name in named}}
+            entry["metrics"] = {name: value for name, value in row.items() if name not in named}
+            entries.append({"kind": kind, **fields, **entry})
+        return self.register(entries)
+
+    def import_results_log(self, file_path):
+        ''' Adds every run of a results log (see opynions.analysis.results_log) as a run entry.'''
+        entries = []
+        for key, runs in read_results_log(file_path).items():
+            for values in zip(*runs.values()):
+                entries.append({**dict(zip(PARAMETERS, key)), "metrics": dict(zip(runs, values)),
+                                "source": file_path})
+        return self.register(entries)
+
+    def import_table(self, path, params=None, kind="cell"):
+        """
+        Adds the points of a results store or CSV file, including the legacy CSVs in data/
+        (see opynions.analysis.storage.read_legacy_csv()). The parameters stored with a results store
+        fill in the ones missing from the rows. The path is recorded as the source.
+
+        Args:
+            path (str): results store or CSV file.
+            params (dict, optional): parameters missing from the rows and the store, e.g. {'n_nodes': 200}.
+            kind (str, optional): see register_results(). Default 'cell'.
+
+        Returns:
+            list: ids of the new entries.
+        """
+        if is_results_store(path):
+            stored = {name: value for name, value in read_params(path).items()
+                      if name in PARAMETERS or name == "n_runs"}
+            return self.register_results(load_table(path), {**stored, **(params or {})}, kind, source=path)
+        return self.register_results(read_legacy_csv(path), params, kind, source=path)
+
+    def query(self, kind=None, metrics=None, source=None, **conditions):
+        """
+        Finds entries by their parameters.
+
+        Args:
+            kind (str, optional): only 'run' or only 'cell' entries. Default both.
+            metrics (list, optional): metrics to return. Default all.
+            source (str, optional): only entries from this source.
+            **conditions: a parameter (or n_runs, seed, engine) and either a value, or a (low, high)
+                range with None for an open end, e.g. query(n_nodes=(2000, None), mu=0.25, epsilon=(0.1, 0.2)).
+                Floats are compared with a tolerance of FLOAT_TOLERANCE.
+
+        Returns:
+            pandas.DataFrame: one row per entry with its id, columns and metrics.
+        """
+        import pandas as pd
+        clauses, arguments = [], []
+        for column, condition in (("kind", kind), ("source", source), *conditions.items()):
+            if condition is None:
+                continue
+            assert column in COLUMNS, f"Unknown column {column}, has to be one of {COLUMNS}"
+            if isinstance(condition, (tuple, list)):
+                low, high = condition
+                if low is not None:
+                    clauses.append(f"{column} >= ?")
+                    arguments.append(_plain(low) - FLOAT_TOLERANCE if isinstance(low, float) else _plain(low))
+                if high is not None:
+                    clauses.append(f"{column} <= ?")
+                    arguments.append(_plain(high) + FLOAT_TOLERANCE if isinstance(high, float) else _plain(high))
+            elif isinstance(condition, float):
+                clauses.append(f"{column} BETWEEN ? AND ?")
+                arguments += [condition - FLOAT_TOLERANCE, condition + FLOAT_TOLERANCE]
+            else:
+                clauses.append(f"{column} = ?")
+                arguments.append(_plain(condition))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        entries = pd.read_sql_query(f"SELECT id, {', '.join(COLUMNS)} FROM entries {where} ORDER BY id",
+                                    self._connection, params=arguments)
+
+        metric_filter = f"AND name IN ({', '.join('?' * len(metrics))})" if metrics else ""
+        values = pd.read_sql_query(
+            f"SELECT entry_id, name, value FROM metrics WHERE entry_id IN (SELECT id FROM entries {where}) "
+            f"{metric_filter}", self._connection, params=arguments + list(metrics or []))
+        wide = values.pivot(index="entry_id", columns="name", values="value")
+        wide.columns.name = None
+        return entries.join(wide, on="id")
+
+    def remove(self, ids):
+        ''' Removes entries and their metrics.'''
+        with self._connection:
+            self._connection.executemany("DELETE FROM entries WHERE id = ?", [(int(i),) for i in ids])
+
+def _plain(value):
+    ''' numpy scalars as Python numbers, which sqlite3 stores natively.'''
+    return value.item() if hasattr(value, 'item') else value
@@ -1,14 +1,172 @@
 '''All-in-one analysis function derived from the other analysis functions'''
 
+import time
 import numpy as np
 import networkx as nx
 from networkx.algorithms.community import modularity
 from networkx.algorithms.community import greedy_modularity_communities
 from opynions.core.utils import get_graphs
+from opynions.core.parallel import run_replicates
 from opynions.analysis.similarity import compute_neighbor_similarity
 from opynions.settings import MODULARITY_RES
 
-def combined_analysis(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2):
+RUN_METRICS = ("variance", "num_isolates", "num_communities", "modularity", "similarity")
+RUN_KEYS = ("variance", "mean_opinion") + RUN_METRICS[1:] # all keys returned by analyze_graph()
+HIST_BINS = 100
+HIST_KEYS = tuple(f"hist_{i:02d}" for i in range(HIST_BINS)) # keys of the "opinion_hist" metric
+
+def result_keys(metrics):
+    """
+    Keys of the per-run dict analyze_graph() returns for some metrics, e.g. to check whether a
+    logged run has them: "opinion_hist" is stored under HIST_KEYS, "variance" comes with "mean_opinion".
+
+    Args:
+        metrics (list): metrics as passed to analyze_graph().
+
+    Returns:
+        list: the keys, without duplicates.
+    """
+    keys = ["variance", "mean_opinion"]
+    for metric in metrics:
+        keys.extend(HIST_KEYS if metric == "opinion_hist" else [metric])
+    return list(dict.fromkeys(keys))
+
+def analyze_graph(g, metrics=RUN_METRICS):
+    """
+    Computes all per-run metrics of a single final graph. NOTE: removes isolates from g.
+
+    Args:
+        g (networkx.Graph): final graph of one simulation run, with 'opinion' node attributes.
+        metrics (list, optional): metrics to compute, variance and mean opinion are always included.
+                                  "opinion_hist" adds the opinion histogram (HIST_BINS bins on [0, 1],
+                                  isolates included) under HIST_KEYS. Default RUN_METRICS.
+
+    Returns:
+        dict: containing the per-run metrics with keys:
+            - "variance": Variance of the opinions of this run.
+            - "mean_opinion": Mean opinion of this run, used to pool variances over runs.
+            - "num_isolates": Number of isolated nodes.
+            - "num_communities": Number of communities.
+            - "modularity": Modularity score.
+            - "similarity": Average neighbor similarity.
+    """
+    opinions = np.fromiter(nx.get_node_attributes(g, 'opinion').values(), dtype=float)
+    results = {"variance": np.var(opinions), "mean_opinion": np.mean(opinions)}
+    if "opinion_hist" in metrics:
+        results.update(zip(HIST_KEYS, np.histogram(opinions, bins=HIST_BINS, range=(0, 1))[0].tolist()))
+
+    # count isolated nodes
+    isolates_list = list(nx.isolates(g))
+    if "num_isolates" in metrics:
+        results["num_isolates"] = len(isolates_list)
+
+    # remove isolates from graph
+    g.remove_nodes_from(isolates_list)
+    if "num_communities" in metrics or "modularity" in metrics:
+        # isolate and count communities
+        best_n = min(g.number_of_nodes(), 7)
+        communities = greedy_modularity_communities(g, resolution=MODULARITY_RES, best_n=best_n)
+        results["num_communities"] = len(communities)
+        # use same list for modularity value
+        results["modularity"] = modularity(g, communities)
+
+    if "similarity" in metrics:
+        results["similarity"] = compute_neighbor_similarity(g)
+    return results
+
+def is_precise(runs, target_se, target_metrics=("variance",)):
+    """
+    Checks whether the standard error of the mean of every target metric is below its tolerance.
+
+    Args:
+        runs (dict): per-run arrays, as returned by combined_analysis_runs().
+        target_se (float or dict): tolerance on the standard error, either one value
+                                   for all target metrics or a dict metric -> tolerance.
+        target_metrics (list, optional): metrics that have to be precise. Default ("variance",).
+
+    Returns:
+        bool: True if all target metrics are precise enough. Always False for less than 2 runs.
+    """
+    for metric in target_metrics:
+        values = np.asarray(runs[metric])
+        if len(values) < 2:
+            return False
+        tolerance = target_se[metric] if isinstance(target_se, dict) else target_se
+        if np.std(values, ddof=1) / np.sqrt(len(values)) >= tolerance:
+            return False
+    return True
+
+def combined_analysis_runs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2, target_se=None,
+                           target_metrics=("variance",), max_runs=None, time_budget=None,
+                           parallel=False, n_workers=None):
+    """
+    Runs the combined analysis but keeps the value of every metric for every run,
+    so that the spread between runs (e.g. confidence intervals) can be computed afterwards.
+
+    Sequential sampling: if target_se is given, n_runs is the minimum number of runs
+    and runs are added one at a time until the standard error of every target metric
+    is below target_se (see is_precise()), max_runs is reached or time_budget is used up.
+
+    Args:
+        n_runs (int): The number of simulation runs (minimum number in sequential mode).
+        n_nodes (int): The number of nodes in the network.
+        time_steps (int): The number of time steps to simulate.
+        epsilon (float): Tolerance parameter (range: [0, 0.5]).
+        mu (float): Convergence parameter (range: [0, 0.5]).
+        m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        target_se (float or dict, optional): tolerance on the standard error. Default None (fixed n_runs).
+        target_metrics (list, optional): metrics checked against target_se. Default ("variance",).
+        max_runs (int, optional): maximum number of runs in sequential mode. Default 10 * n_runs.
+        time_budget (float, optional): wall-clock budget in seconds in sequential mode. Default None.
+        parallel (bool, optional): simulate and analyze the n_runs initial runs in parallel, the workers
+            write the metrics into shared memory (see opynions.core.parallel.run_replicates()). Default False.
+        n_workers (int, optional): number of processes if parallel. Default one per CPU.
+
+    Returns:
+        dict: maps every key of analyze_graph() to a float array with one value per run.
+    """
+    start = time.perf_counter()
+    if parallel:
+        with run_replicates(n_runs, n_nodes, time_steps, epsilon, mu, m_ba, n_workers,
+                            analyze=analyze_graph, metric_keys=RUN_KEYS) as replicates:
+            runs = {key: values.copy() for key, values in replicates.metrics.items()}
+    else:
+        graphs, _ = get_graphs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba)
+        per_run = [analyze_graph(g) for g in graphs]
+        runs = {key: np.array([run[key] for run in per_run], dtype=float) for key in per_run[0]}
+
+    if target_se is not None:
+        if max_runs is None:
+            max_runs = 10 * n_runs
+        assert max_runs >= n_runs, f"max_runs has to be at least n_runs: {max_runs} < {n_runs}"
+        while (not is_precise(runs, target_se, target_metrics) and len(runs["variance"]) < max_runs
+               and (time_budget is None or time.perf_counter() - start < time_budget)):
+            graphs, _ = get_graphs(1, n_nodes, time_steps, epsilon, mu, m_ba)
+            new_run = analyze_graph(graphs[0])
+            runs = {key: np.append(runs[key], new_run[key]) for key in runs}
+
+    return runs
+
+def summarize_runs(runs):
+    """
+    Averages per-run metric arrays into the values reported by combined_analysis().
+    The variance is pooled over all opinions of all runs, i.e. the mean of the per-run
+    variances plus the variance of the per-run means. Runs without a metric (NaN, e.g. from a results
+    log mixing metric sets) are left out of its average.
+
+    Args:
+        runs (dict): per-run arrays, as returned by combined_analysis_runs().
+
+    Returns:
+        dict: with the keys of RUN_METRICS that are in runs.
+    """
+    summary = {key: np.nanmean(runs[key]) for key in RUN_METRICS if key in runs}
+    summary["variance"] = np.nanmean(runs["variance"]) + np.nanvar(runs["mean_opinion"])
+    return summary
+
+def combined_analysis(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2, keep_runs=False,
+                      target_se=None, target_metrics=("variance",), max_runs=None, time_budget=None,
+                      parallel=False, n_workers=None):
     """
     Combines all analyses into one function, optimizes by reusing graph object,
     isolates lists and communities list. NOTE: for a single combination of epsilon and mu.
@@ -21,7 +179,11 @@ def combined_analysis(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2):
         time_steps (int): The number of time steps to simulate.
         epsilon (float): Tolerance parameter (range: [0, 0.5]).
         mu (float): Convergence parameter (range: [0, 0.5]).
-        m_generato (int): affects graph generation, see networkx.barabasi_albert_graph()
+        m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        keep_runs (bool, optional): If True, the per-run arrays are added under the key "runs".
+        target_se, target_metrics, max_runs, time_budget (optional): sequential sampling,
+            see combined_analysis_runs(). The number of runs used is added under the key "n_runs".
+        parallel, n_workers (optional): run the replicates in parallel, see combined_analysis_runs().
     
     Returns:
         dict: containing all analyses with keys:
@@ -31,50 +193,14 @@ def combined_analysis(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2):
             - "modularity": Average modularity score across all runs.
             - "similarity": Average neighbor similarity across all runs.
     """
-    
-    all_opinions = []
-    all_isolated = 0
-    all_num_communities = 0
-    all_modularity = 0
-    all_similarity = 0
-    
-    graphs, _ = get_graphs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba)
-    
-    for g in graphs:
-        
-        # aggregate opinions for variance
-        all_opinions.append(nx.get_node_attributes(g, 'opinion').values())
-        
-        # count isolated nodes
-        isolates_list = list(nx.isolates(g))
-        all_isolated += len(isolates_list)
-        
-        # remove isolates from graph
-        g.remove_nodes_from(isolates_list)
-        # isolate and count communities
-        communities = greedy_modularity_communities(g, resolution=MODULARITY_RES, best_n=7)
-        all_num_communities += len(communities)
-        # use same list for modularity value
-        all_modularity += modularity(g, communities)
-        
-        # similarity
-        all_similarity += compute_neighbor_similarity(g)
-        
-    #calculate variance from all opinions
-    flattened_opinions = [opinion for run in all_opinions for opinion in run]
-    variance = np.var(flattened_opinions)
-    
-    # average aggregates
-    num_runs = len(graphs) 
-    avg_isolated = all_isolated / num_runs 
-    avg_num_communities = all_num_communities / num_runs
-    avg_modularity = all_modularity / num_runs
-    avg_similarity = all_similarity / num_runs
-    
-
-    return {"variance": variance, "num_isolates": avg_isolated, 
-            "num_communities": avg_num_communities, "modularity":avg_modularity,
-            "similarity": avg_similarity}
+    runs = combined_analysis_runs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba,
+                                  target_se, target_metrics, max_runs, time_budget, parallel, n_workers)
+    results = summarize_runs(runs)
+    if target_se is not None:
+        results["n_runs"] = len(runs["variance"])
+    if keep_runs:
+        results["runs"] = runs
+    return results
     
 def modules_communities_analysis(n_runs, n_nodes, time_steps, epsilon, mu):
     """
@@ -0,0 +1,263 @@
+''' Labeled results cube: the per-run metrics of every parameter point of every sweep on one
+(epsilon, mu, n_nodes, time_steps, m_ba, metric, run) array, with the summed opinion histograms
+of the runs next to it. The arrays are .npy files memory-mapped on opening and are addressed by
+parameter values instead of positions, so a slice, a heatmap or a distribution is read from
+whatever was simulated before, and cube_results() only simulates the points that are missing.
+
+A cube is a directory with meta.json (axis labels, metrics, runs per point) and the arrays
+runs.npy (NaN where no run is stored), counts.npy (runs stored per point) and histograms.npy. '''
+
+import json
+import os
+import shutil
+import numpy as np
+from opynions.analysis.combined import HIST_BINS, HIST_KEYS, RUN_KEYS, RUN_METRICS
+from opynions.analysis.multiprocessing import multiprocess_runs, summarize_cells
+from opynions.analysis.results_log import PARAMETERS
+from opynions.analysis.storage import INTEGER_COLUMNS
+
+LABEL_TOLERANCE = 1e-9
+
+def _write_meta(path, meta):
+    temporary = os.path.join(path, 'meta.json.tmp')
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(meta, file, indent=1)
+    os.replace(temporary, os.path.join(path, 'meta.json'))
+
+def is_cube(path):
+    ''' Whether path is a results cube.'''
+    return os.path.isfile(os.path.join(path, 'runs.npy'))
+
+def create_cube(path, axes, max_runs, metrics=RUN_KEYS):
+    """
+    Creates an empty cube.
+
+    Args:
+        path (str): directory of the cube, must not exist yet.
+        axes (dict): maps every name in PARAMETERS to its values.
+        max_runs (int): runs stored per parameter point.
+        metrics (list, optional): per-run metrics stored. Default RUN_KEYS.
+
+    Returns:
+        ResultsCube: the cube, opened for writing.
+    """
+    assert set(axes) == set(PARAMETERS), f"Give the values of all of {PARAMETERS}"
+    labels = {name: sorted({int(value) if name in INTEGER_COLUMNS else float(value)
+                            for value in np.atleast_1d(axes[name]).tolist()}) for name in PARAMETERS}
+    shape = tuple(len(labels[name]) for name in PARAMETERS)
+    os.makedirs(path)
+    runs = np.lib.format.open_memmap(os.path.join(path, 'runs.npy'), mode='w+', dtype=float,
+                                     shape=shape + (len(metrics), max_runs))
+    runs[:] = np.nan
+    runs.flush()
+    np.save(os.path.join(path, 'counts.npy'), np.zeros(shape, dtype=np.int32))
+    np.save(os.path.join(path, 'histograms.npy'), np.zeros(shape + (HIST_BINS,)))
+    _write_meta(path, {"version": 1, "axes": labels, "metrics": list(metrics), "max_runs": max_runs,
+                       "bins": HIST_BINS})
+    return ResultsCube(path, mode='r+')
+
+class ResultsCube:
+    """
+    A results cube, see create_cube() and grow_cube().
+
+    Args:
+        path (str): directory of the cube.
+        mode (str, optional): 'r' to read, 'r+' to add runs. Default 'r'.
+
+    Attributes:
+        axes (dict): maps every name in PARAMETERS to the numpy array of its values.
+        metrics (list): names of the per-run metrics.
+        runs (numpy.memmap): per-run metrics, shape (epsilon, mu, n_nodes, time_steps, m_ba, metric, run).
+        counts (numpy.memmap): runs stored per parameter point.
+        histograms (numpy.memmap): summed opinion histograms per parameter point.
+    """
+    def __init__(self, path, mode='r'):
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as file:
+            meta = json.load(file)
+        self.path = path
+        self.axes = {name: np.array(meta["axes"][name]) for name in PARAMETERS}
+        self.metrics = meta["metrics"]
+        self.max_runs = meta["max_runs"]
+        self.runs = np.load(os.path.join(path, 'runs.npy'), mmap_mode=mode)
+        self.counts = np.load(os.path.join(path, 'counts.npy'), mmap_mode=mode)
+        self.histograms = np.load(os.path.join(path, 'histograms.npy'), mmap_mode=mode)
+
+    def index(self, name, value):
+        ''' Position of a value (or array of positions of a list of values) on an axis.'''
+        values = np.atleast_1d(value)
+        positions = np.searchsorted(self.axes[name], values - LABEL_TOLERANCE)
+        found = (positions < len(self.axes[name])) & \
+                np.isclose(self.axes[name][np.minimum(positions, len(self.axes[name]) - 1)], values,
+                           rtol=0, atol=LABEL_TOLERANCE)
+        if not found.all():
+            raise KeyError(f"{name} = {values[~found].tolist()} is not in the cube")
+        return positions[0] if np.ndim(value) == 0 else positions
+
+    def contains(self, cell):
+        ''' Whether the cube has an entry for a parameter point (a dict with all of PARAMETERS).'''
+        try:
+            self._position(cell)
+        except KeyError:
+            return False
+        return True
+
+    def _position(self, cell):
+        return tuple(int(self.index(name, cell[name])) for name in PARAMETERS)
+
+    def _select(self, array, labels):
+        ''' Label-based selection: None keeps an axis, a value drops it, a list selects along it.'''
+        for name in labels:
+            assert name in PARAMETERS, f"Unknown parameter {name}, has to be one of {PARAMETERS}"
+        axis = 0
+        for name in PARAMETERS:
+            value = labels.get(name)
+            if value is None:
+                axis += 1
+                continue
+            array = np.take(array, self.index(name, value), axis=axis)
+            axis += np.ndim(value) != 0
+        return array
+
+    def sel(self, metric=None, **labels):
+        """
+        Per-run values selected by label, e.g. cube.sel('variance', mu=0.25, n_nodes=200, time_steps=100, m_ba=2)
+        for all epsilon values. Parameters given a single value drop their axis.
+
+        Args:
+            metric (str, optional): one metric, drops the metric axis. Default all metrics.
+            **labels: a value, a list of values or None (all) per parameter.
+
+        Returns:
+            numpy.ndarray: shape (selected parameter axes..., [metric,] run), NaN for runs not stored.
+        """
+        runs = self._select(self.runs, labels)
+        if metric is not None:
+            runs = runs[..., self.metrics.index(metric), :]
+        return np.asarray(runs)
+
+    def count(self, **labels):
+        ''' Runs stored per selected point, see sel().'''
+        return np.asarray(self._select(self.counts, labels))
+
+    def histogram(self, **labels):
+        ''' Average opinion histogram over the runs of the selected points, see sel(). NaN where nothing is stored.'''
+        sums = np.asarray(self._select(self.histograms, labels))
+        counts = self.count(**labels)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums / np.asarray(counts, dtype=float)[..., None]
+
+    def cell_runs(self, cell):
+        ''' Per-run arrays (metric -> array) of one parameter point, as returned by multiprocess_runs().'''
+        position = self._position(cell)
+        stored = self.counts[position]
+        return {metric: np.array(self.runs[position][i, :stored]) for i, metric in enumerate(self.metrics)}
+
+    def add_runs(self, cell, runs):
+        """
+        Stores the runs of a parameter point after the ones already there.
+
+        Args:
+            cell (dict): the parameter point, with all of PARAMETERS.
+            runs (dict): per-run arrays with the metrics of the cube and HIST_KEYS, see multiprocess_runs().
+        """
+        position = self._position(cell)
+        stored = int(self.counts[position])
+        n_new = len(runs[self.metrics[0]])
+        assert stored + n_new <= self.max_runs, \
+            f"The cube holds {self.max_runs} runs per point, grow it first, see grow_cube()"
+        for i, metric in enumerate(self.metrics):
+            self.runs[position][i, stored:stored + n_new] = runs[metric]
+        self.histograms[position] += np.sum([runs[key] for key in HIST_KEYS], axis=1)
+        self.counts[position] = stored + n_new
+
+    def summary(self, cells, n_runs=None, confidence=None, ci_method='bootstrap'):
+        """
+        Result dicts of parameter points, as multiprocess_all() returns them.
+
+        Args:
+            cells (list): dicts with all of PARAMETERS.
+            n_runs (int, optional): use only the first n_runs runs of every point. Default all.
+            confidence, ci_method (optional): confidence intervals, see multiprocess_all().
+
+        Returns:
+            list: one dict per point, the metrics followed by the parameters.
+        """
+        list_of_runs = []
+        for cell in cells:
+            runs = self.cell_runs(cell)
+            assert len(runs[self.metrics[0]]), f"No runs stored for {cell}"
+            list_of_runs.append({metric: values[:n_runs] for metric, values in runs.items()})
+        return summarize_cells(cells, list_of_runs, False, confidence, ci_method)
+
+    def flush(self):
+        for array in (self.runs, self.counts, self.histograms):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+def grow_cube(path, axes, max_runs, metrics=RUN_KEYS):
+    """
+    Opens a cube for writing, creating it or rebuilding it with more axis values or runs per point
+    if needed. Stored runs are kept.
+
+    Args:
+        path (str): directory of the cube.
+        axes (dict): maps names in PARAMETERS to values the cube has to contain.
+        max_runs (int): runs per point the cube has to hold.
+        metrics (list, optional): metrics of a new cube. Default RUN_KEYS.
+
+    Returns:
+        ResultsCube: the cube, opened for writing.
+    """
+    if not is_cube(path):
+        return create_cube(path, axes, max_runs, metrics)
+    cube = ResultsCube(path, mode='r+')
+    union = {name: np.union1d(cube.axes[name], np.atleast_1d(axes.get(name, []))) for name in PARAMETERS}
+    if all(len(union[name]) == len(cube.axes[name]) for name in PARAMETERS) and max_runs <= cube.max_runs:
+        return cube
+
+    rebuilt = f'{path}.rebuild'
+    if os.path.isdir(rebuilt):
+        shutil.rmtree(rebuilt)
+    bigger = create_cube(rebuilt, union, max(max_runs, cube.max_runs), cube.metrics)
+    # np.ix_ places the old grid inside the new one
+    grid = np.ix_(*(bigger.index(name, cube.axes[name]) for name in PARAMETERS))
+    bigger.runs[grid + (slice(None), slice(0, cube.max_runs))] = cube.runs
+    bigger.counts[grid] = cube.counts
+    bigger.histograms[grid] = cube.histograms
+    bigger.flush()
+    del cube, bigger
+    shutil.rmtree(path)
+    os.replace(rebuilt, path)
+    return ResultsCube(path, mode='r+')
+
+def cube_results(path, cells, n_runs, confidence=None, ci_method='bootstrap', **kwargs):
+    """
+    Results of parameter points served from a cube. Points with fewer than n_runs stored runs get
+    the missing runs simulated (see multiprocess_runs()) and stored first; the cube is created
+    or grown as needed.
+
+    Args:
+        path (str): directory of the cube.
+        cells (list): dicts with all of PARAMETERS.
+        n_runs (int): runs per point.
+        confidence, ci_method (optional): confidence intervals, see multiprocess_all().
+        **kwargs: passed on to multiprocess_runs(), e.g. memory_budget.
+
+    Returns:
+        list: one dict per point, as multiprocess_all() returns them.
+    """
+    axes = {name: [cell[name] for cell in cells] for name in PARAMETERS}
+    cube = grow_cube(path, axes, n_runs)
+    needed = {}
+    for cell in cells:
+        missing = n_runs - int(cube.counts[cube._position(cell)])
+        if missing > 0:
+            needed.setdefault(missing, []).append(cell)
+
+    metrics = tuple(RUN_METRICS) + ("opinion_hist",)
+    for missing, group in needed.items():
+        list_of_runs = multiprocess_runs(group, missing, None, None, None, metrics=metrics, **kwargs)
+        for cell, runs in zip(group, list_of_runs):
+            cube.add_runs(cell, runs)
+        cube.flush()
+    return cube.summary(cells, n_runs, confidence, ci_method)
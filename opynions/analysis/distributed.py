@@ -0,0 +1,291 @@
+''' Sweeps over several machines through a work queue on a shared filesystem, no broker needed.
+A coordinator writes one file per task into pending/, workers on any host claim a task by
+renaming it into claimed/ under a name with their worker id (atomic, so exactly one worker wins)
+and write their results into results/. Claims that stop being refreshed are put back into
+pending/ by the coordinator.
+
+Start workers on other hosts with
+    python -m opynions.analysis.distributed <queue_dir>
+'''
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import socket
+import threading
+import time
+import numpy as np
+from opynions.analysis.combined import RUN_METRICS
+from opynions.analysis.multiprocessing import make_tasks, worker_runs
+from opynions.analysis.results_log import cell_key
+
+QUEUE_DIRS = ("pending", "claimed", "results")
+
+def _write_json(path, data):
+    ''' Writes a JSON file atomically: readers see either nothing or the complete file.'''
+    temporary = f'{path}.{socket.gethostname()}.{os.getpid()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+def _task_ids(queue_dir, state):
+    return sorted(name[:-5] for name in os.listdir(os.path.join(queue_dir, state)) if name.endswith('.json'))
+
+def worker_id():
+    ''' Id of this worker process, unique over all hosts sharing a queue.'''
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+def _claim_path(queue_dir, task_id, worker):
+    return os.path.join(queue_dir, 'claimed', f'{task_id}.{worker}.claim')
+
+def _claims(queue_dir):
+    ''' (task_id, path) of every claim, whoever holds it.'''
+    directory = os.path.join(queue_dir, 'claimed')
+    return sorted((name.split('.', 1)[0], os.path.join(directory, name))
+                  for name in os.listdir(directory) if name.endswith('.claim'))
+
+def submit_sweep(queue_dir, cells, n_runs, n_nodes, time_steps, m_ba, metrics=RUN_METRICS, batch_cost=None):
+    """
+    Writes the tasks of a sweep into a queue directory. Submitting the same sweep again
+    (e.g. after the coordinator was restarted) keeps the queue as it is.
+
+    Args:
+        queue_dir (str): directory on a filesystem shared by all hosts, created if needed.
+        cells, n_runs, n_nodes, time_steps, m_ba, metrics, batch_cost: see
+            opynions.analysis.multiprocessing.multiprocess_runs().
+
+    Returns:
+        list: cell_key() of every cell, in the order of cells.
+    """
+    defaults = {'n_nodes': n_nodes, 'time_steps': time_steps, 'm_ba': m_ba}
+    keys = [cell_key(**{**defaults, **cell}) if isinstance(cell, dict) else cell_key(*cell, **defaults)
+            for cell in cells]
+    meta = json.loads(json.dumps({"keys": keys, "n_runs": n_runs, "metrics": list(metrics)}))
+    meta_path = os.path.join(queue_dir, 'meta.json')
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as file:
+            existing = json.load(file)
+        assert all(existing[name] == meta[name] for name in meta), f"{queue_dir} already holds a different sweep"
+        return keys
+
+    for state in QUEUE_DIRS:
+        os.makedirs(os.path.join(queue_dir, state), exist_ok=True)
+    tasks = make_tasks({cell_id: n_runs for cell_id in range(len(keys))}, keys, metrics, batch_cost)
+    for task_id, task in enumerate(tasks):
+        _write_json(os.path.join(queue_dir, 'pending', f'{task_id:06d}.json'), task)
+    meta["n_tasks"] = len(tasks)
+    # written last, workers only start claiming once the queue is complete
+    _write_json(meta_path, meta)
+    return keys
+
+def claim_task(queue_dir, worker=None):
+    """
+    Claims the first pending task.
+
+    Args:
+        queue_dir (str): the queue directory.
+        worker (str, optional): id of the claiming worker. Default worker_id().
+
+    Returns:
+        tuple: (task_id, task) or None if no task is pending.
+    """
+    worker = worker or worker_id()
+    for task_id in _task_ids(queue_dir, 'pending'):
+        claimed = _claim_path(queue_dir, task_id, worker)
+        try:
+            os.rename(os.path.join(queue_dir, 'pending', f'{task_id}.json'), claimed)
+        except FileNotFoundError:
+            continue  # another worker was faster
+        os.utime(claimed)
+        with open(claimed, encoding='utf-8') as file:
+            return task_id, json.load(file)
+    return None
+
+def _heartbeat(path, interval, stop):
+    ''' Refreshes the modification time of a claim until stop is set, so it is not considered stale.'''
+    while not stop.wait(interval):
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return  # requeued by the coordinator, the result is still written
+
+def release_claim(queue_dir, task_id, worker=None):
+    """
+    Removes a worker's claim of a task once its result is written. A claim that was requeued in
+    the meantime, and possibly claimed by another worker, is left alone.
+
+    Args:
+        queue_dir (str): the queue directory.
+        task_id (str): the task.
+        worker (str, optional): id of the worker that claimed it. Default worker_id().
+    """
+    try:
+        os.remove(_claim_path(queue_dir, task_id, worker or worker_id()))
+    except FileNotFoundError:
+        pass
+
+def run_worker(queue_dir, poll_interval=1.0, idle_timeout=60.0, heartbeat=10.0, max_tasks=None):
+    """
+    Claims and runs tasks until the coordinator marks the sweep as done, nothing was pending for
+    idle_timeout seconds, or max_tasks tasks were run. Can run on any host that sees queue_dir.
+
+    Args:
+        queue_dir (str): the queue directory.
+        poll_interval (float, optional): seconds between looks at an empty queue. Default 1.
+        idle_timeout (float, optional): seconds to wait for new tasks before stopping, longer than the
+                                        coordinator's stale_after to pick up requeued tasks. Default 60.
+        heartbeat (float, optional): seconds between refreshes of the claim of the running task. Default 10.
+        max_tasks (int, optional): maximum number of tasks to run. Default None (no limit).
+
+    Returns:
+        int: number of tasks this worker ran.
+    """
+    worker = worker_id()
+    n_tasks = 0
+    idle_since = time.monotonic()
+    while max_tasks is None or n_tasks < max_tasks:
+        if os.path.exists(os.path.join(queue_dir, 'done')):
+            break
+        claim = claim_task(queue_dir, worker) if os.path.exists(os.path.join(queue_dir, 'meta.json')) else None
+        if claim is None:
+            if time.monotonic() - idle_since > idle_timeout:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        task_id, task = claim
+        claimed = _claim_path(queue_dir, task_id, worker)
+        result_path = os.path.join(queue_dir, 'results', f'{task_id}.json')
+        if not os.path.exists(result_path):
+            stop = threading.Event()
+            beating = threading.Thread(target=_heartbeat, args=(claimed, heartbeat, stop), daemon=True)
+            beating.start()
+            try:
+                cell_id, per_run, seconds = worker_runs(tuple(task))
+            finally:
+                stop.set()
+                beating.join()
+            per_run = [{name: float(value) for name, value in run.items()} for run in per_run]
+            _write_json(result_path, {"cell_id": cell_id, "runs": per_run, "seconds": seconds, "worker": worker})
+            n_tasks += 1
+        release_claim(queue_dir, task_id, worker)
+        idle_since = time.monotonic()
+    return n_tasks
+
+def requeue_stale(queue_dir, stale_after):
+    """
+    Moves claims whose worker stopped refreshing them back into pending/.
+
+    Args:
+        queue_dir (str): the queue directory.
+        stale_after (float): seconds without a heartbeat after which a claim is stale.
+
+    Returns:
+        list: ids of the requeued tasks.
+    """
+    requeued = []
+    now = time.time()
+    for task_id, claimed in _claims(queue_dir):
+        try:
+            if now - os.path.getmtime(claimed) < stale_after:
+                continue
+            if os.path.exists(os.path.join(queue_dir, 'results', f'{task_id}.json')):
+                os.remove(claimed)
+            else:
+                os.rename(claimed, os.path.join(queue_dir, 'pending', f'{task_id}.json'))
+                requeued.append(task_id)
+        except FileNotFoundError:
+            continue  # finished in the meantime
+    return requeued
+
+def collect_results(queue_dir):
+    """
+    Merges all results written so far.
+
+    Args:
+        queue_dir (str): the queue directory.
+
+    Returns:
+        list: per-run dicts (key -> array) of every cell in submission order, None for cells
+              without results, as returned by multiprocess_runs().
+    """
+    with open(os.path.join(queue_dir, 'meta.json'), encoding='utf-8') as file:
+        meta = json.load(file)
+    per_cell = [[] for _ in meta["keys"]]
+    for task_id in _task_ids(queue_dir, 'results'):
+        with open(os.path.join(queue_dir, 'results', f'{task_id}.json'), encoding='utf-8') as file:
+            result = json.load(file)
+        per_cell[result["cell_id"]].extend(result["runs"])
+    return [{name: np.array([run[name] for run in runs], dtype=float) for name in runs[0]} if runs else None
+            for runs in per_cell]
+
+def distributed_sweep(queue_dir, cells, n_runs, n_nodes, time_steps, m_ba, metrics=RUN_METRICS,
+                      batch_cost=None, local_workers=0, stale_after=120.0, poll_interval=1.0, max_restarts=None):
+    """
+    Coordinates a sweep over a shared-filesystem queue: submits the tasks (or picks up an earlier
+    submission of the same sweep), requeues stale claims until every task has a result, then
+    marks the queue as done so the workers stop. Results survive in queue_dir, so a restarted
+    coordinator only waits for the missing tasks.
+
+    Local workers wait for requeued tasks longer than stale_after before going idle, and local
+    workers that exit while tasks are still missing are restarted, at most max_restarts times.
+
+    Args:
+        queue_dir (str): directory on a filesystem shared by all hosts.
+        cells, n_runs, n_nodes, time_steps, m_ba, metrics, batch_cost: see
+            opynions.analysis.multiprocessing.multiprocess_runs().
+        local_workers (int, optional): worker processes to start on this host. Default 0.
+        stale_after (float, optional): seconds without a heartbeat after which a claim is
+                                       requeued, has to exceed the workers' heartbeat. Default 120.
+        poll_interval (float, optional): seconds between checks of the queue. Default 1.
+        max_restarts (int, optional): restarts of local workers before giving up. Default 3 * local_workers.
+
+    Returns:
+        list: per-run dicts (key -> array), one per cell in the order of cells.
+
+    Raises:
+        RuntimeError: if local workers keep exiting while tasks are missing.
+    """
+    submit_sweep(queue_dir, cells, n_runs, n_nodes, time_steps, m_ba, metrics, batch_cost)
+    with open(os.path.join(queue_dir, 'meta.json'), encoding='utf-8') as file:
+        n_tasks = json.load(file)["n_tasks"]
+    if max_restarts is None:
+        max_restarts = 3 * local_workers
+
+    def start_worker():
+        # idle for longer than a claim takes to go stale, so requeued tasks still find a worker
+        process = mp.Process(target=run_worker, args=(queue_dir, poll_interval, 2 * stale_after))
+        process.start()
+        return process
+
+    processes = [start_worker() for _ in range(local_workers)]
+    restarts = 0
+    try:
+        while len(_task_ids(queue_dir, 'results')) < n_tasks:
+            requeue_stale(queue_dir, stale_after)
+            for i, process in enumerate(processes):
+                if not process.is_alive():
+                    if restarts == max_restarts:
+                        raise RuntimeError(f"Local workers exited {restarts + 1} times with tasks still missing, "
+                                           f"last exit code {process.exitcode}")
+                    restarts += 1
+                    processes[i] = start_worker()
+            time.sleep(poll_interval)
+        open(os.path.join(queue_dir, 'done'), 'w', encoding='utf-8').close()
+    finally:
+        for process in processes:
+            process.join(timeout=None if os.path.exists(os.path.join(queue_dir, 'done')) else 0)
+            if process.is_alive():
+                process.terminate()
+    return collect_results(queue_dir)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Runs tasks of a distributed sweep.')
+    parser.add_argument('queue_dir', help='queue directory on the shared filesystem')
+    parser.add_argument('--poll-interval', type=float, default=1.0)
+    parser.add_argument('--idle-timeout', type=float, default=60.0)
+    args = parser.parse_args()
+    run_worker(args.queue_dir, args.poll_interval, args.idle_timeout)
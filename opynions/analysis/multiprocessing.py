@@ -3,22 +3,339 @@ uses the combined analysis function in opynions.analysis.combined. '''
 
 import multiprocessing as mp
 import itertools
-from opynions.analysis.combined import combined_analysis
-from opynions.analysis.distribution import opinions_variance
+import queue
+import random
+import time
+import tracemalloc
+import numpy as np
+from opynions.core.simulation import run_sim
+from opynions.core.pool import get_pool
+from opynions.analysis.combined import RUN_METRICS, analyze_graph, is_precise, result_keys, summarize_runs
+from opynions.analysis.uncertainty import add_confidence_intervals
+from opynions.analysis.results_log import PARAMETERS, ResultsLog, cell_key, read_results_log
+from opynions.analysis.catalog import RunCatalog
+
+_seed_source = random.SystemRandom()
+
+def worker_runs(task):
+    '''
+    Process manager for a batch of simulation runs of one parameter space point, receives
+    (cell_id, n_batch, metrics, epsilon, mu, n_nodes, time_steps, m_ba) and returns
+    (cell_id, list of dicts of per-run metrics, seconds spent). Every run is seeded with a fresh
+    seed, returned under 'seed': random.seed(seed) followed by run_sim() reproduces the run.
+    '''
+    cell_id, n_batch, metrics, epsilon, mu, n_nodes, time_steps, m_ba = task
+    start = time.perf_counter()
+    per_run = []
+    for _ in range(n_batch):
+        seed = _seed_source.getrandbits(32)
+        random.seed(seed)
+        g, _ = run_sim(n_nodes, time_steps, epsilon, mu, m_ba)
+        per_run.append({**analyze_graph(g, metrics), "seed": seed})
+    return cell_id, per_run, time.perf_counter() - start
 
 def worker_all_both_params(epsilon, mu, n_runs, n_nodes, time_steps, m_ba):
-        ''' 
-        Process manager, receives all parameters needed 
-        and returns a dict full of the combined analysis results for that parameter space point.
-        '''
-        results_dict = combined_analysis(n_runs, n_nodes, time_steps, epsilon, mu, m_ba)
-        results_dict['epsilon'] = epsilon
-        results_dict['mu'] = mu
-        return results_dict
+    '''
+    Runs and analyses all runs of one parameter space point in this process and returns the
+    dict of the combined analysis results, with epsilon and mu. Kept for existing callers,
+    the sweeps schedule single runs with worker_runs() instead.
+    '''
+    _, per_run, _ = worker_runs((0, n_runs, RUN_METRICS, epsilon, mu, n_nodes, time_steps, m_ba))
+    results_dict = summarize_runs({key: np.array([run[key] for run in per_run], dtype=float) for key in per_run[0]})
+    results_dict['epsilon'] = epsilon
+    results_dict['mu'] = mu
+    return results_dict
+
+def worker_variance_epsilons(epsilon, m_ba):
+    ''' Variance of one point of the finite size scaling analysis (10 runs, N=200, T=100, mu=0.48),
+    in this process. Kept for existing callers, see multiprocess_variance_epsilon().'''
+    _, per_run, _ = worker_runs((0, 10, ("variance",), epsilon, 0.48, 200, 100, m_ba))
+    return summarize_runs({key: np.array([run[key] for run in per_run], dtype=float) for key in per_run[0]})["variance"]
+
+def estimate_run_cost(epsilon, mu, n_nodes, time_steps, m_ba):
+    """
+    Rough relative cost of one run, only used to order tasks longest-first.
+    Every time step touches all nodes, and every rewiring lists all nodes to pick the new neighbor,
+    which happens more often the smaller epsilon is. Community detection grows with the number of edges.
+
+    Args:
+        epsilon (float): Tolerance parameter.
+        mu (float): Convergence parameter (does not change the cost noticeably).
+        n_nodes (int): Number of nodes in the network.
+        time_steps (int): Number of time steps for the simulation.
+        m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+
+    Returns:
+        float: cost estimate in arbitrary units.
+    """
+    rewiring = max(0.0, 1 - 2 * epsilon) ** 2
+    simulation = n_nodes * time_steps * (1 + rewiring * n_nodes / 100)
+    communities = 20 * m_ba * n_nodes * np.log2(n_nodes)
+    return simulation + communities
+
+MEMORY_MODEL = (2000.0, 700.0) # peak bytes of one run per node and per node and unit of m_ba
+WORKER_CHECK_INTERVAL = 1.0 # seconds between checks that no worker died while waiting for results
+
+def estimate_run_memory(n_nodes, m_ba, memory_model=MEMORY_MODEL):
+    """
+    Peak memory of one run in a worker: the final and initial graph and the analysis of the final one.
+    Runs of a task are done one after the other and their graphs freed, so this is also the peak of a task.
+
+    Args:
+        n_nodes (int): Number of nodes in the network.
+        m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        memory_model (tuple, optional): (bytes per node, bytes per node and unit of m_ba),
+                                        see calibrate_memory_model(). Default MEMORY_MODEL.
+
+    Returns:
+        float: estimate in bytes.
+    """
+    per_node, per_edge = memory_model
+    return n_nodes * (per_node + per_edge * m_ba)
 
-def multiprocess_all(epsilon_values, mu_values, n_runs, n_nodes, time_steps, m_ba):
+def calibrate_memory_model(n_nodes=1000, m_ba_values=(1, 2, 4), metrics=RUN_METRICS):
     """
-    Performs all the analysis types on the given parameters using multiprocessing.
+    Measures the peak memory of a short run and its analysis with tracemalloc for several m_ba,
+    and fits the memory model of estimate_run_memory() to it.
+
+    Args:
+        n_nodes (int, optional): Number of nodes of the calibration runs. Default 1000.
+        m_ba_values (list, optional): m_ba of the calibration runs, at least two. Default (1, 2, 4).
+        metrics (list, optional): metrics computed in the sweep, see analyze_graph(). Default RUN_METRICS.
+
+    Returns:
+        tuple: (bytes per node, bytes per node and unit of m_ba).
+    """
+    peaks = []
+    for m_ba in m_ba_values:
+        tracemalloc.start()
+        try:
+            g, _ = run_sim(n_nodes, 2, 0.25, 0.25, m_ba)
+            analyze_graph(g, metrics)
+            peaks.append(tracemalloc.get_traced_memory()[1] / n_nodes)
+        finally:
+            tracemalloc.stop()
+    per_edge, per_node = np.polyfit(m_ba_values, peaks, 1)
+    return float(per_node), float(max(per_edge, 0.0))
+
+def _dispatch(pool, tasks, max_in_flight, memory_budget=None, memory_model=MEMORY_MODEL):
+    '''
+    Hands tasks to the pool, at most max_in_flight at a time and, with a memory budget, only as many as
+    fit in it together. The longest task that fits goes first, so small tasks fill the memory left next
+    to large ones. A task needing more than the whole budget runs alone. Yields the results as they
+    come in. Closing the generator stops handing out tasks; the ones in flight finish in the pool and
+    their results are dropped, so other sweeps sharing the pool are not disturbed.
+    A worker killed by the OS (e.g. out of memory) is replaced by the pool without a result or an error
+    for its task, so while waiting the workers are checked and a RuntimeError is raised if one died.
+    '''
+    finished = queue.Queue()
+    remaining = [(estimate_run_memory(task[5], task[7], memory_model), task) for task in tasks]
+    in_flight = {}
+    tokens = itertools.count()
+    workers = _worker_pids(pool)
+    while remaining or in_flight:
+        while remaining and len(in_flight) < max_in_flight:
+            used = sum(in_flight.values())
+            index = next((i for i, (size, _) in enumerate(remaining)
+                          if memory_budget is None or used + size <= memory_budget), None)
+            if index is None:
+                if in_flight:
+                    break
+                index = 0
+            size, task = remaining.pop(index)
+            token = next(tokens)
+            in_flight[token] = size
+            pool.apply_async(worker_runs, (task,),
+                             callback=lambda result, token=token: finished.put((token, result)),
+                             error_callback=lambda error, token=token: finished.put((token, error)))
+        while True:
+            try:
+                token, result = finished.get(timeout=WORKER_CHECK_INTERVAL)
+                break
+            except queue.Empty:
+                if not workers <= _worker_pids(pool):
+                    raise RuntimeError("A worker process died while tasks were in flight, probably killed for "
+                                       "running out of memory; lower memory_budget or calibrate the memory model, "
+                                       "see calibrate_memory_model()") from None
+        del in_flight[token]
+        if isinstance(result, BaseException):
+            raise result
+        yield result
+
+def _worker_pids(pool):
+    ''' Process ids of the pool's workers, the pool replaces a worker that died by a new process.'''
+    return {process.pid for process in getattr(pool, '_pool', [])}
+
+def _extra_runs(runs, target_se, target_metrics, max_runs):
+    ''' Number of runs a point still needs, extrapolated from its current standard errors.'''
+    n = len(runs["variance"])
+    needed = n + 1
+    if n < 2:
+        # no standard error to extrapolate from yet, get a second run first
+        return min(needed, max_runs) - n
+    for metric in target_metrics:
+        tolerance = target_se[metric] if isinstance(target_se, dict) else target_se
+        se = np.std(runs[metric], ddof=1) / np.sqrt(n)
+        if tolerance <= 0 or not np.isfinite(se):
+            return max_runs - n
+        needed = max(needed, int(np.ceil(n * (se / tolerance) ** 2)))
+    return min(needed, max_runs) - n
+
+def make_tasks(pending, keys, metrics=RUN_METRICS, batch_cost=None):
+    """
+    Splits the runs still needed by every point into tasks, longest first.
+    Runs of cheap points are batched so that every task costs at least about batch_cost,
+    which keeps the per-task overhead of small networks low; expensive runs get a task each.
+
+    Args:
+        pending (dict): maps cell ids to the number of runs they still need.
+        keys (list): cell_key() of every cell id.
+        metrics (list, optional): metrics computed by the workers. Default RUN_METRICS.
+        batch_cost (float, optional): minimum cost of a task, in the units of estimate_run_cost().
+                                      Default None (one run per task).
+
+    Returns:
+        list: (cell_id, n_batch, metrics, epsilon, mu, n_nodes, time_steps, m_ba) tuples for worker_runs().
+    """
+    tasks = []
+    for cell_id, count in pending.items():
+        cost = estimate_run_cost(*keys[cell_id])
+        batch = 1 if batch_cost is None else max(1, int(batch_cost // cost))
+        for start in range(0, count, batch):
+            tasks.append((cell_id, min(batch, count - start), tuple(metrics), *keys[cell_id]))
+    tasks.sort(key=lambda task: task[1] * estimate_run_cost(*task[3:]), reverse=True)
+    return tasks
+
+def multiprocess_runs(cells, n_runs, n_nodes, time_steps, m_ba, target_se=None,
+                      target_metrics=("variance",), max_runs=None, time_budget=None, results_log=None,
+                      metrics=RUN_METRICS, batch_cost=None, memory_budget=None, memory_model=MEMORY_MODEL,
+                      catalog=None):
+    """
+    Simulates and analyses n_runs runs of every parameter point, with one task per run
+    (or per batch of cheap runs, see make_tasks()). Tasks are ordered longest-first by
+    estimate_run_cost() and handed to the workers a few at a time, so that the expensive
+    points do not end up in the tail of the sweep. Results are reduced per point as they come in.
+    An interrupted sweep (an exception or KeyboardInterrupt while it runs) stops handing out its
+    tasks, leaving the shared pool and the sweeps running on it alone.
+
+    In sequential mode (target_se given) points that are not precise enough after a round
+    get more runs in the next round (see combined_analysis_runs() for the stopping rule),
+    here time_budget limits the compute time spent on a single point.
+
+    If a results log is given every finished run is appended to it right away, and runs
+    already in the log are reused, so an interrupted sweep continues where it stopped.
+
+    With a memory budget, tasks are only started while the estimated peak memory of all running
+    tasks (see estimate_run_memory()) fits in it, filling the room next to large networks with
+    small ones, so sweeps of very large networks run with fewer parallel tasks instead of running
+    out of memory.
+
+    Args:
+        cells (list): the parameter points, either (epsilon, mu) tuples or dicts with any of
+                      'epsilon', 'mu', 'n_nodes', 'time_steps' and 'm_ba' (missing ones take the values below).
+        n_runs (int): Number of runs for each parameter point (minimum number in sequential mode).
+        n_nodes (int): Number of nodes in the network.
+        time_steps (int): Number of time steps for the simulation.
+        m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        target_se, target_metrics, max_runs, time_budget (optional): sequential sampling.
+        results_log (str, optional): path of the results log, see opynions.analysis.results_log.
+        metrics (list, optional): metrics to compute, see analyze_graph(). Default RUN_METRICS.
+        batch_cost (float, optional): minimum cost of a task, see make_tasks(). Default None.
+        memory_budget (float, optional): bytes the running tasks may use together, on top of the
+                                         workers' baseline. Default None (no limit).
+        memory_model (tuple, optional): see estimate_run_memory(). Default MEMORY_MODEL.
+        catalog (str, optional): path of a run catalog (see opynions.analysis.catalog) that every
+                                 simulated run is registered in. Default None.
+
+    Returns:
+        list: per-run dicts (key -> array), one per parameter point in the order of cells.
+    """
+    if target_se is not None and max_runs is None:
+        max_runs = 10 * n_runs
+    defaults = {'n_nodes': n_nodes, 'time_steps': time_steps, 'm_ba': m_ba}
+    keys = [cell_key(**{**defaults, **cell}) if isinstance(cell, dict) else cell_key(*cell, **defaults)
+            for cell in cells]
+    per_cell = [[] for _ in cells]
+    reduced = [None for _ in cells]
+    seconds = np.zeros(len(cells))
+    pending = {}
+
+    def finish(cell_id):
+        ''' All runs of this point for this round are in: reduce to arrays and decide on more runs.'''
+        runs = {key: np.array([run[key] for run in per_cell[cell_id]], dtype=float)
+                for key in per_cell[cell_id][0]}
+        reduced[cell_id] = runs
+        if (target_se is not None and not is_precise(runs, target_se, target_metrics)
+                and len(runs["variance"]) < max_runs
+                and (time_budget is None or seconds[cell_id] < time_budget)):
+            pending[cell_id] = _extra_runs(runs, target_se, target_metrics, max_runs)
+
+    # reuse the runs of an earlier, interrupted sweep
+    logged = read_results_log(results_log) if results_log is not None else {}
+    for cell_id, key in enumerate(keys):
+        needed = result_keys(metrics)
+        if key in logged and set(needed) <= set(logged[key]):
+            runs = logged[key]
+            # only runs that have all the metrics asked for, the log can mix runs of other sweeps
+            complete = np.all([np.isfinite(runs[name]) for name in needed], axis=0)
+            per_cell[cell_id] = [{name: values[i] for name, values in runs.items()} for i in np.flatnonzero(complete)]
+            per_cell[cell_id] = per_cell[cell_id][:n_runs if target_se is None else max_runs]
+        if len(per_cell[cell_id]) < n_runs:
+            pending[cell_id] = n_runs - len(per_cell[cell_id])
+        else:
+            finish(cell_id)
+
+    if not pending:
+        return reduced
+
+    log = ResultsLog(results_log) if results_log is not None else None
+    run_catalog = RunCatalog(catalog) if catalog is not None else None
+    # the shared pool keeps its default size, small sweeps only use part of it through max_in_flight
+    num_workers = min(mp.cpu_count(), len(make_tasks(pending, keys, metrics, batch_cost)))
+    pool = get_pool()
+    results = None
+    try:
+        while pending:
+            tasks = make_tasks(pending, keys, metrics, batch_cost)
+            outstanding = dict(pending)
+            pending.clear()
+
+            # two tasks per worker keep the workers busy, under a memory budget only those running count
+            max_in_flight = num_workers if memory_budget is not None else 2 * num_workers
+            results = _dispatch(pool, tasks, max_in_flight, memory_budget, memory_model)
+            for cell_id, per_run, duration in results:
+                for run in per_run:
+                    if log is not None:
+                        log.append(keys[cell_id], run, duration / len(per_run))
+                    per_cell[cell_id].append(run)
+                if run_catalog is not None:
+                    run_catalog.register([{**dict(zip(PARAMETERS, keys[cell_id])), "metrics": run}
+                                          for run in per_run])
+                seconds[cell_id] += duration
+                outstanding[cell_id] -= len(per_run)
+                if outstanding[cell_id] == 0:
+                    finish(cell_id)
+    finally:
+        if results is not None:
+            results.close()  # an interrupted sweep hands out no more tasks
+        if log is not None:
+            log.close()
+        if run_catalog is not None:
+            run_catalog.close()
+
+    return reduced
+
+def multiprocess_all(epsilon_values, mu_values, n_runs, n_nodes, time_steps, m_ba,
+                     confidence=None, ci_method='bootstrap', target_se=None,
+                     target_metrics=("variance",), max_runs=None, time_budget=None, results_log=None,
+                     memory_budget=None, catalog=None):
+    """
+    Performs all the analysis types on the given parameters using multiprocessing,
+    see multiprocess_runs() for how the runs are scheduled.
+    If a confidence level is given, confidence intervals of all metrics are added
+    as '<metric>_ci_low' and '<metric>_ci_high' keys.
+    If target_se is given, every point keeps receiving runs until its target metrics are
+    precise enough (sequential sampling), and the runs used are reported under 'n_runs'.
 
     Parameters:
     epsilon_values (list): List of epsilon values to be used in the analysis.
@@ -27,26 +344,106 @@ def multiprocess_all(epsilon_values, mu_values, n_runs, n_nodes, time_steps, m_b
     n_nodes (int): Number of nodes in the network.
     time_steps (int): Number of time steps for the simulation.
     m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+    confidence (float, optional): Confidence level of the intervals, e.g. 0.95. Default None (no intervals).
+    ci_method (str, optional): 'bootstrap' or 'analytic', see opynions.analysis.uncertainty.
+    target_se (float or dict, optional): Tolerance on the standard error of the target metrics,
+        n_runs is then the minimum number of runs per point. Default None (fixed n_runs).
+    target_metrics (list, optional): Metrics checked against target_se. Default ("variance",).
+    max_runs (int, optional): Maximum number of runs per point in sequential mode. Default 10 * n_runs.
+    time_budget (float, optional): Compute time budget in seconds per point in sequential mode. Default None.
+    results_log (str, optional): Path of a log that every finished run is appended to. Runs already
+        in the log are not simulated again, so an interrupted sweep can be restarted. Default None.
+    memory_budget (float, optional): Bytes of RAM the running simulations may use together,
+        see multiprocess_runs(). Default None (no limit).
+    catalog (str, optional): Path of a run catalog (see opynions.analysis.catalog) in which every
+        simulated run and the results of every parameter combination are registered. Default None.
 
     Returns:
     list: A list of dictionaries containing the results of the analysis for each parameter combination.
     """
 
-    param_grid = list(itertools.product(epsilon_values, mu_values))
-    num_workers = min(mp.cpu_count(), len(param_grid))
-    with mp.Pool(num_workers) as pool:
-        list_of_dicts = pool.starmap(worker_all_both_params, [(epsilon, mu, n_runs, n_nodes, time_steps, m_ba) for epsilon, mu in param_grid])
+    param_grid = [{'epsilon': epsilon, 'mu': mu} for epsilon, mu in itertools.product(epsilon_values, mu_values)]
+    list_of_runs = multiprocess_runs(param_grid, n_runs, n_nodes, time_steps, m_ba, target_se, target_metrics,
+                                     max_runs, time_budget, results_log, memory_budget=memory_budget,
+                                     catalog=catalog)
+    list_of_dicts = summarize_cells(param_grid, list_of_runs, target_se is not None, confidence, ci_method)
+    if catalog is not None:
+        _register_cells(catalog, list_of_dicts, {'n_nodes': n_nodes, 'time_steps': time_steps, 'm_ba': m_ba,
+                                                 'n_runs': n_runs})
+    return list_of_dicts
+
+def _register_cells(catalog, list_of_dicts, params):
+    ''' Registers the results of a sweep in a run catalog as cell entries.'''
+    with RunCatalog(catalog) as run_catalog:
+        run_catalog.register_results(list_of_dicts, params, kind="cell")
+
+def summarize_cells(coords, list_of_runs, report_runs=False, confidence=None, ci_method='bootstrap'):
+    """
+    Turns the per-run arrays of a sweep into its list of result dicts.
+
+    Args:
+        coords (list): dicts with the coordinates of every parameter point, copied into the results.
+        list_of_runs (list): per-run dicts of the same points, as returned by multiprocess_runs().
+        report_runs (bool, optional): Whether to add the number of runs under 'n_runs'. Default False.
+        confidence (float, optional): Confidence level of the intervals. Default None (no intervals).
+        ci_method (str, optional): 'bootstrap' or 'analytic', see opynions.analysis.uncertainty.
+
+    Returns:
+        list: one dict per parameter point, the metrics followed by the coordinates.
+    """
+    list_of_dicts = []
+    for cell, runs in zip(coords, list_of_runs):
+        results_dict = summarize_runs(runs)
+        if report_runs:
+            results_dict['n_runs'] = len(runs['variance'])
+        results_dict.update(cell)
+        list_of_dicts.append(results_dict)
+
+    if confidence is not None:
+        metrics = [metric for metric in RUN_METRICS if metric in list_of_runs[0]]
+        list_of_dicts = add_confidence_intervals(list_of_dicts, list_of_runs, metrics, confidence, ci_method)
 
     return list_of_dicts
 
-def worker_variance_epsilons(epsilon, m_ba):
-    ''' Process manager for variance analysis used in finite size scaling analysis.'''
-    variance = opinions_variance(10, 200, 100, epsilon, 0.48, m_ba=m_ba)
-    return variance
-
-def multiprocess_variance_epsilon(epsilon_values, m_ba):
-    ''' Performs only variance analysis, to be used in finite size scaling analysis.'''
-    num_workers = min(mp.cpu_count(), len(epsilon_values))
-    with mp.Pool(num_workers) as pool:
-        list_of_variances = pool.starmap(worker_variance_epsilons, [(epsilon, m_ba) for epsilon in epsilon_values])
-    return list_of_variances
\ No newline at end of file
+def multiprocess_sweep(params, n_runs, confidence=None, ci_method='bootstrap', target_se=None,
+                       target_metrics=("variance",), max_runs=None, time_budget=None, results_log=None,
+                       memory_budget=None, catalog=None):
+    """
+    Performs all the analysis types on the full product of any parameters of run_sim as one job,
+    with the runs of all points load-balanced over the pool (see multiprocess_runs()).
+
+    Parameters:
+    params (dict): maps parameter names to a list of values or a single value. Names are
+        'epsilon', 'mu', 'n_nodes', 'time_steps' and 'm_ba', run_sim's 'N' and 'T' are accepted
+        for 'n_nodes' and 'time_steps'. All five have to be given, e.g.
+        {'epsilon': np.linspace(0, 0.5, 11), 'mu': 0.25, 'N': [200, 2000], 'T': 100, 'm_ba': [1, 2, 4]}.
+    n_runs (int): Number of runs for each parameter combination.
+    confidence, ci_method, target_se, target_metrics, max_runs, time_budget, results_log,
+    memory_budget, catalog (optional): see multiprocess_all().
+
+    Returns:
+    list: A list of dictionaries with the results and all five coordinates of each parameter combination.
+    """
+    aliases = {'N': 'n_nodes', 'T': 'time_steps'}
+    params = {aliases.get(name, name): values for name, values in params.items()}
+    for name in params:
+        assert name in PARAMETERS, f"Unknown parameter {name}, has to be one of {PARAMETERS}"
+    for name in PARAMETERS:
+        assert name in params, f"No value given for {name}"
+
+    values = [np.atleast_1d(params[name]).tolist() for name in PARAMETERS]
+    param_grid = [dict(zip(PARAMETERS, combination)) for combination in itertools.product(*values)]
+    list_of_runs = multiprocess_runs(param_grid, n_runs, None, None, None, target_se, target_metrics,
+                                     max_runs, time_budget, results_log, memory_budget=memory_budget,
+                                     catalog=catalog)
+    list_of_dicts = summarize_cells(param_grid, list_of_runs, target_se is not None, confidence, ci_method)
+    if catalog is not None:
+        _register_cells(catalog, list_of_dicts, {'n_runs': n_runs})
+    return list_of_dicts
+
+def multiprocess_variance_epsilon(epsilon_values, m_ba, n_runs=10, n_nodes=200, time_steps=100, mu=0.48):
+    ''' Performs only variance analysis, to be used in finite size scaling analysis,
+    see opynions.analysis.scaling for the full pipeline.'''
+    cells = [(epsilon, mu) for epsilon in epsilon_values]
+    list_of_runs = multiprocess_runs(cells, n_runs, n_nodes, time_steps, m_ba, metrics=("variance",))
+    return [summarize_runs(runs)["variance"] for runs in list_of_runs]
@@ -0,0 +1,156 @@
+''' Planning of sweeps before launching them: a cost model of run_sim and the analysis, calibrated
+on this machine, predicts wall-clock time, CPU-hours and peak memory, and recommends settings. '''
+
+import heapq
+import itertools
+import multiprocessing as mp
+import time
+import numpy as np
+from scipy.optimize import nnls
+from opynions.core.simulation import run_sim
+from opynions.analysis.combined import RUN_METRICS, analyze_graph
+from opynions.analysis.multiprocessing import calibrate_memory_model, estimate_run_memory
+
+WORKER_BASELINE = 100e6 # bytes of a worker with numpy, networkx and scipy imported
+
+def _simulation_features(epsilon, n_nodes, time_steps, m_ba):
+    ''' Terms of the simulation time, see estimate_run_cost(): interactions, rewirings that
+    list all nodes, and the graph generation. mu does not change the cost noticeably.'''
+    epsilon, n_nodes, time_steps, m_ba = np.broadcast_arrays(*(np.asarray(x, dtype=float)
+                                                               for x in (epsilon, n_nodes, time_steps, m_ba)))
+    rewiring = np.maximum(0.0, 1 - 2 * epsilon) ** 2
+    return np.stack([n_nodes * time_steps, rewiring * n_nodes * time_steps,
+                     rewiring * n_nodes ** 2 * time_steps / 100, m_ba * n_nodes], axis=-1)
+
+def _analysis_features(n_nodes, m_ba):
+    ''' Terms of the analysis time: per node work and community detection over the edges.'''
+    n_nodes, m_ba = np.broadcast_arrays(np.asarray(n_nodes, dtype=float), np.asarray(m_ba, dtype=float))
+    return np.stack([n_nodes, m_ba * n_nodes * np.log2(n_nodes)], axis=-1)
+
+def calibrate_cost_model(n_values=(100, 200, 400), time_steps=(10, 30), epsilon_values=(0.05, 0.25, 0.45),
+                         m_ba_values=(1, 2, 4), mu=0.25, metrics=RUN_METRICS):
+    """
+    Times short runs of run_sim and analyze_graph on this machine and fits the cost model,
+    a non-negative combination of the terms of estimate_run_cost(). Takes about 15 seconds with the defaults.
+
+    Args:
+        n_values (list, optional): network sizes of the calibration runs.
+        time_steps (list, optional): time steps of the calibration runs, rewiring slows down over time
+                                    so at least two values are needed. Default (10, 30).
+        epsilon_values (list, optional): epsilon values of the calibration runs.
+        m_ba_values (list, optional): m_ba values of the calibration runs.
+        mu (float, optional): mu of the calibration runs. Default 0.25.
+        metrics (list, optional): metrics the sweep will compute. Default RUN_METRICS.
+
+    Returns:
+        dict: cost model with the fitted "simulation" and "analysis" coefficients,
+              the "metrics" and the "memory_model" (see calibrate_memory_model()).
+    """
+    points, simulation_seconds, analysis_seconds = [], [], []
+    for n_nodes, steps, epsilon, m_ba in itertools.product(n_values, time_steps, epsilon_values, m_ba_values):
+        start = time.perf_counter()
+        g, _ = run_sim(int(n_nodes), int(steps), epsilon, mu, m_ba)
+        middle = time.perf_counter()
+        analyze_graph(g, metrics)
+        points.append((epsilon, n_nodes, steps, m_ba))
+        simulation_seconds.append(middle - start)
+        analysis_seconds.append(time.perf_counter() - middle)
+
+    epsilon, n_nodes, steps, m_ba = np.array(points, dtype=float).T
+    simulation, _ = nnls(_simulation_features(epsilon, n_nodes, steps, m_ba), np.array(simulation_seconds))
+    analysis, _ = nnls(_analysis_features(n_nodes, m_ba), np.array(analysis_seconds))
+    memory_model = calibrate_memory_model(int(max(n_values)), m_ba_values, metrics)
+    return {"simulation": simulation, "analysis": analysis, "metrics": tuple(metrics), "memory_model": memory_model}
+
+def predict_run_time(model, epsilon, mu, n_nodes, time_steps, m_ba):
+    """
+    Predicts the seconds one run and its analysis take on the calibrated machine.
+
+    Args:
+        model (dict): cost model from calibrate_cost_model().
+        epsilon, mu, n_nodes, time_steps, m_ba: parameters of the run, floats or arrays.
+
+    Returns:
+        numpy.ndarray: predicted seconds.
+    """
+    simulation = _simulation_features(epsilon, n_nodes, time_steps, m_ba) @ model["simulation"]
+    analysis = _analysis_features(n_nodes, m_ba) @ model["analysis"]
+    return simulation + np.broadcast_to(analysis, simulation.shape)
+
+def plan_sweep(model, epsilon_values, mu_values, n_runs, n_nodes, time_steps, m_ba, n_workers=None):
+    """
+    Predicts the cost of multiprocess_all() with these arguments. The wall-clock time assumes
+    runs are started longest-first on the first free worker, as the scheduler does.
+
+    Args:
+        model (dict): cost model from calibrate_cost_model().
+        epsilon_values, mu_values, n_runs, n_nodes, time_steps, m_ba: see multiprocess_all().
+        n_workers (int, optional): number of worker processes. Default one per CPU.
+
+    Returns:
+        dict: with keys
+            - "runs": total number of runs.
+            - "wall_time": predicted seconds until the sweep is done.
+            - "cpu_hours": predicted compute time summed over the workers.
+            - "peak_memory": predicted peak bytes of all workers together.
+    """
+    if n_workers is None:
+        n_workers = mp.cpu_count()
+    epsilon, mu = (grid.ravel() for grid in np.meshgrid(epsilon_values, mu_values, indexing='ij'))
+    run_seconds = np.repeat(predict_run_time(model, epsilon, mu, n_nodes, time_steps, m_ba), n_runs)
+
+    workers = [0.0] * min(n_workers, len(run_seconds))
+    for seconds in np.sort(run_seconds)[::-1]:
+        heapq.heappush(workers, heapq.heappop(workers) + seconds)
+    run_memory = estimate_run_memory(n_nodes, m_ba, model["memory_model"])
+    return {"runs": len(run_seconds), "wall_time": max(workers),
+            "cpu_hours": run_seconds.sum() / 3600,
+            "peak_memory": len(workers) * (WORKER_BASELINE + run_memory)}
+
+def recommend_settings(model, time_budget, n_nodes, time_steps, m_ba, epsilon_range=(0, 0.5),
+                       mu_range=(0, 0.5), n_workers=None, resolutions=(11, 21, 31, 41, 51),
+                       n_runs_options=(2, 5, 10, 20), min_runs=5):
+    """
+    Recommends sweep settings that fit a time budget: the finest grid that can be run with at least
+    min_runs runs per point, and then the most runs per point at that resolution. If not even the
+    coarsest grid fits, an adaptive sweep (see opynions.analysis.refinement.adaptive_sweep()) with as
+    many points as the budget allows is recommended instead.
+
+    Args:
+        model (dict): cost model from calibrate_cost_model().
+        time_budget (float): wall-clock budget in seconds.
+        n_nodes, time_steps, m_ba: see multiprocess_all().
+        epsilon_range, mu_range (tuple, optional): (low, high) of the grid axes. Default (0, 0.5).
+        n_workers (int, optional): number of worker processes. Default one per CPU.
+        resolutions (list, optional): points per axis to choose from.
+        n_runs_options (list, optional): runs per point to choose from.
+        min_runs (int, optional): fewest runs per point worth reporting. Default 5.
+
+    Returns:
+        dict: "method" ('grid', 'adaptive' or None if nothing fits), "resolution", "n_runs",
+              "max_points" and "initial_points" (adaptive only) and the "plan" (see plan_sweep())
+              of the recommendation.
+    """
+    best = None
+    for resolution, n_runs in itertools.product(sorted(resolutions), sorted(n_runs_options)):
+        if n_runs < min_runs:
+            continue
+        plan = plan_sweep(model, np.linspace(*epsilon_range, resolution), np.linspace(*mu_range, resolution),
+                          n_runs, n_nodes, time_steps, m_ba, n_workers)
+        if plan["wall_time"] <= time_budget:
+            best = {"method": "grid", "resolution": resolution, "n_runs": n_runs, "plan": plan}
+    if best is not None:
+        return best
+
+    # the coarsest grid already needs more time: spend the budget on an adaptive sweep
+    coarsest = min(resolutions)
+    plan = plan_sweep(model, np.linspace(*epsilon_range, coarsest), np.linspace(*mu_range, coarsest),
+                      min_runs, n_nodes, time_steps, m_ba, n_workers)
+    max_points = int(coarsest ** 2 * time_budget / plan["wall_time"])
+    if max_points < 16:
+        return {"method": None, "resolution": None, "n_runs": min_runs, "plan": plan}
+    side = int(np.sqrt(max_points))
+    plan = plan_sweep(model, np.linspace(*epsilon_range, side), np.linspace(*mu_range, side),
+                      min_runs, n_nodes, time_steps, m_ba, n_workers)
+    return {"method": "adaptive", "resolution": None, "n_runs": min_runs, "max_points": max_points,
+            "initial_points": min(11, int(np.sqrt(max_points / 2))), "plan": plan}
@@ -0,0 +1,133 @@
+''' Adaptive sweep over (epsilon, mu) that refines the grid only where the metrics change sharply,
+built on the run scheduler in opynions.analysis.multiprocessing. '''
+
+import numpy as np
+from opynions.analysis.combined import summarize_runs
+from opynions.analysis.multiprocessing import multiprocess_runs
+
+def _point(epsilon, mu):
+    ''' Dict key of a point, rounded so that midpoints computed from different cells coincide.'''
+    return (round(float(epsilon), 12), round(float(mu), 12))
+
+def _corners(cell):
+    epsilon_low, epsilon_high, mu_low, mu_high, _ = cell
+    return [_point(epsilon, mu) for epsilon in (epsilon_low, epsilon_high) for mu in (mu_low, mu_high)]
+
+def _children(cell):
+    ''' The four quadrants of a cell.'''
+    epsilon_low, epsilon_high, mu_low, mu_high, depth = cell
+    epsilon_mid = (epsilon_low + epsilon_high) / 2
+    mu_mid = (mu_low + mu_high) / 2
+    return [(e_low, e_high, m_low, m_high, depth + 1)
+            for e_low, e_high in ((epsilon_low, epsilon_mid), (epsilon_mid, epsilon_high))
+            for m_low, m_high in ((mu_low, mu_mid), (mu_mid, mu_high))]
+
+def refinement_scores(cells, results, metrics):
+    """
+    Scores how sharply the metrics change over every cell: the largest spread of a metric
+    over the four corners, relative to the range of that metric over all points so far.
+
+    Args:
+        cells (list): cells as (epsilon_low, epsilon_high, mu_low, mu_high, depth) tuples.
+        results (dict): maps (epsilon, mu) points to their results dicts.
+        metrics (list): metrics to look at.
+
+    Returns:
+        numpy.ndarray: score in [0, 1] of every cell.
+    """
+    scores = np.zeros(len(cells))
+    for metric in metrics:
+        values = np.array([results[point][metric] for point in results], dtype=float)
+        metric_range = np.nanmax(values) - np.nanmin(values)
+        if not metric_range > 0:
+            continue
+        corner_values = np.array([[results[point][metric] for point in _corners(cell)] for cell in cells],
+                                 dtype=float)
+        spread = (np.nanmax(corner_values, axis=1) - np.nanmin(corner_values, axis=1)) / metric_range
+        scores = np.maximum(scores, np.nan_to_num(spread))
+    return scores
+
+def adaptive_sweep(epsilon_range, mu_range, n_runs, n_nodes, time_steps, m_ba,
+                   metrics=("variance", "num_isolates", "modularity"), initial_points=11,
+                   max_depth=4, max_points=961, min_score=0.05, refine_fraction=0.25,
+                   evaluate=multiprocess_runs, **kwargs):
+    """
+    Sweeps (epsilon, mu) on a coarse grid and then recursively splits the cells in which the
+    metrics change sharply (see refinement_scores()) into four, until max_points points have
+    been simulated or no cell scores above min_score. With the defaults the finest spacing
+    matches a 161x161 grid, for the cost of a 31x31 one.
+
+    Args:
+        epsilon_range (tuple): (low, high) bounds of epsilon.
+        mu_range (tuple): (low, high) bounds of mu.
+        n_runs (int): Number of runs for each point.
+        n_nodes (int): Number of nodes in the network.
+        time_steps (int): Number of time steps for the simulation.
+        m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        metrics (list, optional): metrics whose changes drive the refinement.
+        initial_points (int, optional): points per axis of the initial grid. Default 11.
+        max_depth (int, optional): maximum number of times a cell is split. Default 4.
+        max_points (int, optional): budget of simulated points, each costing n_runs runs. Default 961.
+        min_score (float, optional): cells scoring below this are not refined. Default 0.05.
+        refine_fraction (float, optional): fraction of the candidate cells refined per round,
+            all of them are simulated as one batch. Default 0.25.
+        evaluate (callable, optional): function simulating a list of points, with the signature
+            of multiprocess_runs(). Default multiprocess_runs.
+        **kwargs: passed on to evaluate, e.g. results_log or target_se.
+
+    Returns:
+        list: scattered results, one dict per point with 'epsilon', 'mu' and 'depth' keys,
+              renderable with opynions.analysis.utils.create_heatmap_from_csv().
+    """
+    assert initial_points >= 2, f"initial_points has to be at least 2: {initial_points}"
+    assert initial_points ** 2 <= max_points, "max_points is smaller than the initial grid"
+
+    results = {}
+    depth_of = {}
+
+    def simulate(new_points):
+        ''' new_points maps (epsilon, mu) to the depth of the cell the point was added for.'''
+        points = [point for point in new_points if point not in results]
+        list_of_runs = evaluate(points, n_runs, n_nodes, time_steps, m_ba, **kwargs)
+        for point, runs in zip(points, list_of_runs):
+            results[point] = summarize_runs(runs)
+            depth_of[point] = new_points[point]
+
+    epsilon_edges = np.linspace(*epsilon_range, initial_points)
+    mu_edges = np.linspace(*mu_range, initial_points)
+    simulate({_point(epsilon, mu): 0 for epsilon in epsilon_edges for mu in mu_edges})
+    leaves = [(epsilon_edges[i], epsilon_edges[i + 1], mu_edges[j], mu_edges[j + 1], 0)
+              for i in range(initial_points - 1) for j in range(initial_points - 1)]
+
+    while True:
+        candidates = [cell for cell in leaves if cell[4] < max_depth]
+        if not candidates:
+            break
+        scores = refinement_scores(candidates, results, metrics)
+        order = [i for i in np.argsort(-scores, kind='stable') if scores[i] > min_score]
+        order = order[:max(1, int(np.ceil(refine_fraction * len(order))))]
+
+        # refine the highest scoring cells as long as their new points fit in the budget
+        to_split, new_points = [], {}
+        for i in order:
+            points = {point for child in _children(candidates[i]) for point in _corners(child)}
+            points = [point for point in sorted(points) if point not in results and point not in new_points]
+            if len(results) + len(new_points) + len(points) > max_points:
+                break
+            to_split.append(candidates[i])
+            new_points.update((point, candidates[i][4] + 1) for point in points)
+        if not to_split:
+            break
+
+        simulate(new_points)
+        split = set(to_split)
+        leaves = [cell for cell in leaves if cell not in split] + \
+                 [child for cell in to_split for child in _children(cell)]
+
+    list_of_dicts = []
+    for (epsilon, mu), results_dict in results.items():
+        results_dict['epsilon'] = epsilon
+        results_dict['mu'] = mu
+        results_dict['depth'] = depth_of[(epsilon, mu)]
+        list_of_dicts.append(results_dict)
+    return list_of_dicts
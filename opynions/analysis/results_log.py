@@ -0,0 +1,111 @@
+''' Append-only on-disk log of finished runs, used to make sweeps crash-safe and resumable.
+Every line is a JSON record with the parameters and the per-run metrics of one run. '''
+
+import json
+import os
+import numpy as np
+from opynions.analysis.combined import summarize_runs
+
+PARAMETERS = ("epsilon", "mu", "n_nodes", "time_steps", "m_ba")
+
+def cell_key(epsilon, mu, n_nodes, time_steps, m_ba):
+    ''' Hashable key of a parameter point, plain Python numbers so numpy and JSON values compare equal.'''
+    return (float(epsilon), float(mu), int(n_nodes), int(time_steps), int(m_ba))
+
+class ResultsLog:
+    """
+    Appends finished runs to a JSON lines file, one fsync'ed line per run, so that
+    at most the run being written is lost when the process is killed.
+
+    Args:
+        file_path (str): Path of the log file, created if it does not exist.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file = open(file_path, 'a+', encoding='utf-8')
+        # a crash can leave a torn last line, start on a fresh line so it stays the only bad one
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != '\n':
+                self._file.write('\n')
+
+    def append(self, key, metrics, seconds=None):
+        """
+        Durably appends one run.
+
+        Args:
+            key (tuple): cell_key() of the parameter point.
+            metrics (dict): per-run metrics, see opynions.analysis.combined.analyze_graph().
+            seconds (float, optional): time spent on the run.
+        """
+        record = dict(zip(PARAMETERS, key))
+        record["metrics"] = {name: float(value) for name, value in metrics.items()}
+        if seconds is not None:
+            record["seconds"] = seconds
+        self._file.write(json.dumps(record) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def read_results_log(file_path):
+    """
+    Reads all complete runs from a results log, also while a sweep is still writing to it.
+
+    Args:
+        file_path (str): Path of the log file.
+
+    Returns:
+        dict: maps cell_key() of every parameter point to its per-run dicts (key -> array). The keys are
+              all metrics logged for the point, NaN for runs without them (e.g. variance-only runs).
+    """
+    per_cell = {}
+    if not os.path.exists(file_path):
+        return per_cell
+    with open(file_path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn line of an interrupted write
+            key = cell_key(*(record[name] for name in PARAMETERS))
+            per_cell.setdefault(key, []).append(record["metrics"])
+
+    reduced = {}
+    for key, runs in per_cell.items():
+        names = dict.fromkeys(name for run in runs for name in run)  # union, in first-seen order
+        reduced[key] = {name: np.array([run.get(name, np.nan) for run in runs], dtype=float) for name in names}
+    return reduced
+
+def load_results_log(file_path):
+    """
+    Summarizes the runs in a results log into the list of dicts returned by multiprocess_all,
+    with the number of runs of each point under 'n_runs'. Every metric is averaged over the runs
+    that have it; when that is fewer than n_runs, their number is added under '<metric>_n_runs'.
+    Can be used on a running sweep.
+
+    Args:
+        file_path (str): Path of the log file.
+
+    Returns:
+        list: one dict per parameter point found in the log.
+    """
+    list_of_dicts = []
+    for key, runs in read_results_log(file_path).items():
+        results_dict = summarize_runs(runs)
+        results_dict['n_runs'] = len(runs['variance'])
+        for metric in results_dict.keys() & runs.keys():
+            have = int(np.count_nonzero(np.isfinite(runs[metric])))
+            if have < results_dict['n_runs']:
+                results_dict[f'{metric}_n_runs'] = have
+        results_dict.update(zip(PARAMETERS, key))
+        list_of_dicts.append(results_dict)
+    return list_of_dicts
@@ -0,0 +1,87 @@
+''' Low-discrepancy and space-filling designs over named parameter ranges,
+run through the same scheduler as the grid sweeps. '''
+
+import numpy as np
+from scipy.stats import qmc
+from opynions.analysis.multiprocessing import multiprocess_runs, summarize_cells
+from opynions.analysis.results_log import PARAMETERS
+
+INTEGER_PARAMETERS = ("n_nodes", "time_steps", "m_ba")
+
+def sample_parameters(ranges, n_samples, method='sobol', seed=None, log_scale=()):
+    """
+    Generates a space-filling design over the given parameter ranges.
+    Integer parameters (n_nodes, time_steps, m_ba) are spread evenly over all integers in their range.
+
+    Args:
+        ranges (dict): maps parameter names (see PARAMETERS) to (low, high) bounds.
+        n_samples (int): number of points. Sobol designs are best balanced for powers of 2.
+        method (str, optional): 'sobol', 'halton' or 'lhs' (Latin hypercube). Default 'sobol'.
+        seed (int, optional): seed of the scrambling. Default None.
+        log_scale (list, optional): parameters sampled uniformly in log space, e.g. ['n_nodes'].
+
+    Returns:
+        list: one dict per point, mapping parameter names to values.
+    """
+    for name in ranges:
+        assert name in PARAMETERS, f"Unknown parameter {name}, has to be one of {PARAMETERS}"
+    for name in log_scale:
+        assert ranges[name][0] > 0, f"log scale needs a positive lower bound: {name}"
+
+    samplers = {'sobol': qmc.Sobol, 'halton': qmc.Halton, 'lhs': qmc.LatinHypercube}
+    assert method in samplers, f"Unknown sampling method {method}, has to be one of {list(samplers)}"
+    unit = samplers[method](d=len(ranges), seed=seed).random(n_samples)
+
+    samples = [{} for _ in range(n_samples)]
+    for column, (name, (low, high)) in enumerate(ranges.items()):
+        u = unit[:, column]
+        if name in INTEGER_PARAMETERS:
+            # every integer gets an equal share of the unit interval
+            if name in log_scale:
+                values = np.exp(np.log(low) + u * (np.log(high + 1) - np.log(low)))
+            else:
+                values = low + u * (high + 1 - low)
+            values = np.clip(np.floor(values), low, high).astype(int)
+        elif name in log_scale:
+            values = np.exp(np.log(low) + u * (np.log(high) - np.log(low)))
+        else:
+            values = low + u * (high - low)
+        for sample, value in zip(samples, values):
+            sample[name] = value.item()
+    return samples
+
+def sample_sweep(ranges, n_samples, n_runs, n_nodes, time_steps, m_ba, epsilon=None, mu=None,
+                 method='sobol', seed=None, log_scale=(), **kwargs):
+    """
+    Runs the combined analysis on a space-filling design over the given parameter ranges.
+    Parameters without a range take the fixed values given as arguments.
+
+    Args:
+        ranges (dict): maps parameter names to (low, high) bounds, see sample_parameters().
+        n_samples (int): number of points.
+        n_runs (int): Number of runs for each point.
+        n_nodes (int): Number of nodes, if not sampled.
+        time_steps (int): Number of time steps, if not sampled.
+        m_ba (int): m parameter of the Barabási–Albert graph, if not sampled.
+        epsilon (float, optional): Tolerance parameter, if not sampled.
+        mu (float, optional): Convergence parameter, if not sampled.
+        method, seed, log_scale (optional): see sample_parameters().
+        **kwargs: passed on to multiprocess_runs(), e.g. results_log or target_se.
+
+    Returns:
+        list: one dict per point with the metrics and all five parameter coordinates.
+              Render with create_heatmap_from_csv() or plot_subplots_from_csv(), which
+              interpolate scattered points.
+    """
+    fixed = {'epsilon': epsilon, 'mu': mu}
+    for name in ('epsilon', 'mu'):
+        assert name in ranges or fixed[name] is not None, f"{name} needs either a range or a fixed value"
+
+    samples = sample_parameters(ranges, n_samples, method, seed, log_scale)
+    cells = [{**{name: value for name, value in fixed.items() if value is not None}, **sample}
+             for sample in samples]
+    list_of_runs = multiprocess_runs(cells, n_runs, n_nodes, time_steps, m_ba, **kwargs)
+
+    defaults = {'n_nodes': n_nodes, 'time_steps': time_steps, 'm_ba': m_ba}
+    coords = [{name: cell.get(name, defaults.get(name)) for name in PARAMETERS} for cell in cells]
+    return summarize_cells(coords, list_of_runs, kwargs.get('target_se') is not None)
@@ -0,0 +1,159 @@
+''' Finite-size scaling of the opinion variance: sweeps network sizes over several decades
+together with epsilon, and estimates the critical point and exponents from the variance curves. '''
+
+import multiprocessing as mp
+import numpy as np
+from scipy.optimize import curve_fit, minimize
+from opynions.analysis.combined import summarize_runs
+from opynions.analysis.multiprocessing import estimate_run_cost, multiprocess_runs
+
+def critical_points(epsilon_values, variance):
+    """
+    Estimates the transition of every variance curve as the point where it drops the steepest,
+    refined with a parabola through the steepest slope and its neighbours.
+
+    Args:
+        epsilon_values (numpy.ndarray): epsilon values, increasing.
+        variance (numpy.ndarray): variance curves, shape (n_sizes, len(epsilon_values)).
+
+    Returns:
+        numpy.ndarray: estimated critical epsilon of every curve.
+    """
+    epsilon_values = np.asarray(epsilon_values, dtype=float)
+    slopes = np.gradient(variance, epsilon_values, axis=1)
+    estimates = []
+    for slope in slopes:
+        i = int(np.argmin(slope))
+        estimate = epsilon_values[i]
+        if 0 < i < len(slope) - 1:
+            left, centre, right = slope[i - 1:i + 2]
+            curvature = left - 2 * centre + right
+            if curvature > 0:
+                step = (epsilon_values[i + 1] - epsilon_values[i - 1]) / 2
+                estimate += step * np.clip(0.5 * (left - right) / curvature, -1, 1)
+        estimates.append(estimate)
+    return np.array(estimates)
+
+def fit_critical_point(n_values, epsilon_c):
+    """
+    Fits epsilon_c(N) = epsilon_c + a * N^(-1/nu) to the critical points of the different sizes.
+
+    Args:
+        n_values (numpy.ndarray): network sizes.
+        epsilon_c (numpy.ndarray): critical epsilon estimated for every size.
+
+    Returns:
+        dict: "epsilon_c" (infinite size limit), "a" and "nu", NaN if the fit is not possible.
+    """
+    n_values = np.asarray(n_values, dtype=float)
+    if len(n_values) < 3:
+        return {"epsilon_c": np.nan, "a": np.nan, "nu": np.nan}
+
+    def model(n, epsilon_inf, a, nu):
+        return epsilon_inf + a * n ** (-1 / nu)
+
+    try:
+        (epsilon_inf, a, nu), _ = curve_fit(model, n_values, epsilon_c, p0=(epsilon_c[-1], 0.1, 1.0),
+                                            bounds=([-1, -np.inf, 0.05], [2, np.inf, 20]), maxfev=10000)
+    except RuntimeError:
+        return {"epsilon_c": np.nan, "a": np.nan, "nu": np.nan}
+    return {"epsilon_c": epsilon_inf, "a": a, "nu": nu}
+
+def collapse_quality(params, n_values, epsilon_values, variance):
+    """
+    Quality of the scaling collapse y = Var * N^(beta/nu) against x = (epsilon - epsilon_c) * N^(1/nu):
+    mean squared distance between every curve and the others, interpolated where they overlap,
+    relative to the spread of the rescaled values. Lower is better.
+
+    Args:
+        params (tuple): (epsilon_c, nu, beta).
+        n_values, epsilon_values, variance: see finite_size_scaling().
+
+    Returns:
+        float: collapse quality.
+    """
+    epsilon_c, nu, beta = params
+    if nu <= 0:
+        return np.inf
+    xs = [(np.asarray(epsilon_values) - epsilon_c) * n ** (1 / nu) for n in n_values]
+    ys = [curve * n ** (beta / nu) for curve, n in zip(variance, n_values)]
+    scale = np.var(np.concatenate(ys)) or 1.0
+
+    residuals = []
+    for i, (x_i, y_i) in enumerate(zip(xs, ys)):
+        for j, (x_j, y_j) in enumerate(zip(xs, ys)):
+            overlap = (x_j >= x_i[0]) & (x_j <= x_i[-1])
+            if i != j and overlap.any():
+                residuals.append(y_j[overlap] - np.interp(x_j[overlap], x_i, y_i))
+    if not residuals:
+        return np.inf
+    return np.mean(np.concatenate(residuals) ** 2) / scale
+
+def fit_scaling_collapse(n_values, epsilon_values, variance, epsilon_c=None, nu=1.0, beta=0.0):
+    """
+    Finds the critical point and exponents that collapse the variance curves of all sizes best,
+    see collapse_quality().
+
+    Args:
+        n_values, epsilon_values, variance: see finite_size_scaling().
+        epsilon_c, nu, beta (float, optional): starting point, epsilon_c defaults to the
+                                               critical point of the largest size.
+
+    Returns:
+        dict: "epsilon_c", "nu", "beta" and the reached "quality".
+    """
+    if epsilon_c is None:
+        epsilon_c = critical_points(epsilon_values, variance)[-1]
+    fitted = minimize(collapse_quality, (epsilon_c, nu, beta), args=(n_values, epsilon_values, variance),
+                      method='Nelder-Mead')
+    epsilon_c, nu, beta = fitted.x
+    return {"epsilon_c": epsilon_c, "nu": nu, "beta": beta, "quality": fitted.fun}
+
+def finite_size_scaling(n_values, epsilon_values, mu, n_runs, time_steps, m_ba=2, batch_cost=None, **kwargs):
+    """
+    Finite-size scaling study of the variance as one job: all sizes and epsilon values are
+    simulated together, only computing the variance. Runs of small networks are batched into
+    tasks of about batch_cost (see opynions.analysis.multiprocessing.make_tasks()), large networks
+    get a task per run.
+
+    Args:
+        n_values (list): network sizes, e.g. [20, 50, 200, 1000, 5000].
+        epsilon_values (list): epsilon values, increasing.
+        mu (float): Convergence parameter.
+        n_runs (int): Number of runs for each (size, epsilon) point.
+        time_steps (int): Number of time steps for the simulation.
+        m_ba (int, optional): affects graph generation, see networkx.barabasi_albert_graph(). Default 2.
+        batch_cost (float, optional): minimum cost of a task. Default the total cost spread
+                                      over 20 tasks per CPU.
+        **kwargs: passed on to multiprocess_runs(), e.g. results_log or target_se.
+
+    Returns:
+        dict: with keys
+            - "n_values", "epsilon_values": the axes.
+            - "variance", "variance_se": pooled variance and standard error of the per-run
+              variances, shape (len(n_values), len(epsilon_values)).
+            - "epsilon_c_per_n": critical epsilon of every size, see critical_points().
+            - "extrapolation": fit_critical_point() of those.
+            - "collapse": fit_scaling_collapse() of the curves.
+    """
+    n_values = np.sort(np.asarray(n_values, dtype=int))
+    epsilon_values = np.asarray(epsilon_values, dtype=float)
+    cells = [{'epsilon': epsilon, 'mu': mu, 'n_nodes': int(n), 'time_steps': time_steps, 'm_ba': m_ba}
+             for n in n_values for epsilon in epsilon_values]
+    if batch_cost is None:
+        total = sum(estimate_run_cost(cell['epsilon'], mu, cell['n_nodes'], time_steps, m_ba) for cell in cells)
+        batch_cost = total * n_runs / (20 * mp.cpu_count())
+
+    list_of_runs = multiprocess_runs(cells, n_runs, None, None, None, metrics=("variance",),
+                                     batch_cost=batch_cost, **kwargs)
+    shape = (len(n_values), len(epsilon_values))
+    variance = np.array([summarize_runs(runs)["variance"] for runs in list_of_runs]).reshape(shape)
+    variance_se = np.array([np.std(runs["variance"], ddof=1) / np.sqrt(len(runs["variance"]))
+                            if len(runs["variance"]) > 1 else np.nan
+                            for runs in list_of_runs]).reshape(shape)
+
+    epsilon_c = critical_points(epsilon_values, variance)
+    return {"n_values": n_values, "epsilon_values": epsilon_values,
+            "variance": variance, "variance_se": variance_se, "epsilon_c_per_n": epsilon_c,
+            "extrapolation": fit_critical_point(n_values, epsilon_c),
+            "collapse": fit_scaling_collapse(n_values, epsilon_values, variance, epsilon_c[-1])}
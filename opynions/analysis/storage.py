@@ -0,0 +1,207 @@
+''' Columnar on-disk format for sweep results. A results store is a directory with one .npy file
+per column and chunk, so that columns load with np.load(mmap_mode='r') without parsing text,
+and a meta.json with the schema version, column dtypes, parameter metadata and chunk list.
+Appending writes a new chunk and then replaces meta.json, so readers never see half a chunk.
+pandas is imported by the functions that build or read DataFrames. '''
+
+import json
+import os
+import re
+import shutil
+import numpy as np
+
+SCHEMA_VERSION = 1
+INTEGER_COLUMNS = ("n_nodes", "time_steps", "m_ba", "n_runs", "depth")
+
+# column names of the CSVs written before the metrics were renamed
+LEGACY_COLUMNS = {"avg_isolated": "num_isolates", "avg_num_communities": "num_communities",
+                  "avg_modularity": "modularity", "avg_similarity": "similarity"}
+# metric of the legacy "epsilon \ mu" matrix CSVs in data/, by file name
+LEGACY_MATRICES = {"disconnected_nodes_matrix": "num_isolates", "modularity_matrix": "modularity",
+                   "neighbor_opinion_similarity_matrix": "similarity", "variance_heatmap_data": "variance"}
+
+def _meta_path(path):
+    return os.path.join(path, 'meta.json')
+
+def is_results_store(path):
+    ''' Whether path is a results store directory.'''
+    return os.path.isfile(_meta_path(path))
+
+def _read_meta(path):
+    with open(_meta_path(path), encoding='utf-8') as file:
+        meta = json.load(file)
+    assert meta["schema_version"] <= SCHEMA_VERSION, \
+        f"{path} has schema version {meta['schema_version']}, this version reads up to {SCHEMA_VERSION}"
+    return meta
+
+def _write_meta(path, meta):
+    temporary = _meta_path(path) + '.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(meta, file, indent=1)
+    os.replace(temporary, _meta_path(path))
+
+def _to_columns(results):
+    ''' Typed column arrays of a list of result dicts or a DataFrame.'''
+    import pandas as pd
+    data = pd.DataFrame(results)
+    columns = {}
+    for name in data.columns:
+        dtype = np.int64 if name in INTEGER_COLUMNS else np.float64
+        columns[str(name)] = data[name].to_numpy(dtype=dtype)
+    return columns
+
+def append_results(path, results, params=None):
+    """
+    Appends results as a new chunk, creating the store if needed.
+
+    Args:
+        path (str): directory of the store.
+        results (list or pandas.DataFrame): result dicts, e.g. from multiprocess_all(), all with the same keys.
+        params (dict, optional): JSON-serializable metadata of the sweep (e.g. n_runs, n_nodes),
+                                 merged into the metadata of the store.
+    """
+    columns = _to_columns(results)
+    if is_results_store(path):
+        meta = _read_meta(path)
+        assert set(columns) == set(meta["columns"]), \
+            f"Columns {sorted(columns)} do not match the store's {sorted(meta['columns'])}"
+        columns = {name: values.astype(meta["columns"][name]) for name, values in columns.items()}
+    else:
+        os.makedirs(path, exist_ok=True)
+        meta = {"schema_version": SCHEMA_VERSION, "params": {}, "chunks": [],
+                "columns": {name: values.dtype.str for name, values in columns.items()}}
+    meta["params"].update(params or {})
+
+    chunk = f'{len(meta["chunks"]):05d}'
+    os.makedirs(os.path.join(path, chunk), exist_ok=True)
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    for name, values in columns.items():
+        np.save(os.path.join(path, chunk, f'{name}.npy'), values)
+    meta["chunks"].append({"name": chunk, "rows": n_rows})
+    _write_meta(path, meta)
+
+def write_results(path, results, params=None):
+    """
+    Writes results into a new store, replacing an existing store at path.
+
+    Args:
+        path, results, params: see append_results().
+    """
+    if is_results_store(path):
+        shutil.rmtree(path)
+    append_results(path, results, params)
+
+def read_params(path):
+    ''' Parameter metadata of a store.'''
+    return _read_meta(path)["params"]
+
+def read_results(path, columns=None, mmap=True):
+    """
+    Reads columns of a store. A store with a single chunk is memory-mapped without copying,
+    the chunks of a larger store are concatenated.
+
+    Args:
+        path (str): directory of the store.
+        columns (list, optional): columns to read. Default all.
+        mmap (bool, optional): memory-map the files instead of reading them. Default True.
+
+    Returns:
+        dict: maps column names to arrays.
+    """
+    meta = _read_meta(path)
+    if columns is None:
+        columns = list(meta["columns"])
+    mode = 'r' if mmap else None
+    data = {}
+    for name in columns:
+        parts = [np.load(os.path.join(path, chunk["name"], f'{name}.npy'), mmap_mode=mode)
+                 for chunk in meta["chunks"]]
+        if not parts:
+            data[name] = np.empty(0, dtype=meta["columns"][name])
+        else:
+            data[name] = parts[0] if len(parts) == 1 else np.concatenate(parts)
+    return data
+
+def load_results(path, columns=None):
+    ''' Reads a store into a DataFrame, see read_results().'''
+    import pandas as pd
+    return pd.DataFrame(read_results(path, columns))
+
+def load_table(path):
+    """
+    Loads results from a store or a CSV file, legacy column names are renamed.
+
+    Args:
+        path (str): directory of a store or path of a CSV file.
+
+    Returns:
+        pandas.DataFrame: the results.
+    """
+    import pandas as pd
+    if is_results_store(path):
+        return load_results(path)
+    return pd.read_csv(path).rename(columns=LEGACY_COLUMNS)
+
+def save_table(results, path, params=None):
+    ''' Writes results to a CSV file if path ends with .csv, to a store otherwise.'''
+    import pandas as pd
+    if path.endswith('.csv'):
+        pd.DataFrame(results).to_csv(path, index=False)
+    else:
+        write_results(path, results, params)
+
+def remove_table(path):
+    ''' Removes a store or a CSV file.'''
+    if is_results_store(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+def read_legacy_csv(csv_path, metric=None):
+    """
+    Reads a CSV from data/ into the current long format: legacy columns are renamed, matrix files
+    (epsilon in the rows, mu in the columns) are turned into one row per point, and a mu encoded in the
+    file name (e.g. full_analysis_epsilon_mu25.csv) is added as a column.
+
+    Args:
+        csv_path (str): path of the CSV file.
+        metric (str, optional): metric of a matrix file, guessed from the file name (see LEGACY_MATRICES).
+
+    Returns:
+        pandas.DataFrame: one row per parameter point.
+    """
+    import pandas as pd
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    data = pd.read_csv(csv_path)
+    corner = data.columns[0]
+    if corner.replace(' ', '') in ('epsilon\\mu', 'epsilon/mu'):
+        metric = metric or LEGACY_MATRICES.get(stem)
+        assert metric is not None, f"Give the metric of the matrix in {csv_path}"
+        data = data.rename(columns={corner: 'epsilon'}).melt(id_vars='epsilon', var_name='mu', value_name=metric)
+        data['mu'] = data['mu'].astype(float)
+        return data[[metric, 'epsilon', 'mu']]
+
+    data = data.rename(columns=LEGACY_COLUMNS)
+    encoded_mu = re.search(r'_mu(\d+)$', stem)
+    if 'mu' not in data and encoded_mu:
+        data['mu'] = int(encoded_mu.group(1)) / 100
+    return data
+
+def convert_legacy_data(data_dir, out_dir):
+    """
+    Converts every CSV in data_dir into a store '<out_dir>/<file name>'.
+
+    Args:
+        data_dir (str): directory with the legacy CSVs, e.g. 'data'.
+        out_dir (str): directory to write the stores to.
+
+    Returns:
+        list: paths of the written stores.
+    """
+    written = []
+    for name in sorted(os.listdir(data_dir)):
+        if name.endswith('.csv'):
+            store = os.path.join(out_dir, name[:-4])
+            write_results(store, read_legacy_csv(os.path.join(data_dir, name)), {"source": name})
+            written.append(store)
+    return written
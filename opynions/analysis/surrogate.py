@@ -0,0 +1,199 @@
+''' Gaussian-process surrogate of the sweep metrics, for fast queries between simulated points.'''
+
+import numpy as np
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.optimize import minimize
+from opynions.analysis.combined import RUN_METRICS
+from opynions.analysis.results_log import PARAMETERS
+from opynions.analysis.storage import load_table
+
+LOG_PARAMETERS = ("n_nodes", "time_steps") # parameters spanning decades, modelled in log space
+
+def _kernel(a, b, lengthscales):
+    ''' Squared exponential kernel with one lengthscale per input dimension.'''
+    diff = (a[:, None, :] - b[None, :, :]) / lengthscales
+    return np.exp(-0.5 * np.sum(diff ** 2, axis=2))
+
+def _negative_log_likelihood(log_params, x, y):
+    ''' Negative log marginal likelihood of standardized targets, params are log lengthscales and log noise.'''
+    lengthscales, noise = np.exp(log_params[:-1]), np.exp(log_params[-1])
+    k = _kernel(x, x, lengthscales) + (noise + 1e-8) * np.eye(len(x))
+    try:
+        factor = cho_factor(k, lower=True)
+    except np.linalg.LinAlgError:
+        return 1e10
+    alpha = cho_solve(factor, y)
+    return 0.5 * y @ alpha + np.sum(np.log(np.diag(factor[0])))
+
+class Surrogate:
+    """
+    Gaussian-process regression of every metric over the parameters that vary in the training data
+    (any of epsilon, mu, n_nodes, time_steps and m_ba). Hyperparameters are fitted by maximizing the
+    marginal likelihood on a subsample. A prediction then costs one kernel row per query point for
+    the mean and a triangular solve, O(n^2) in the n training points, for its uncertainty.
+    Parameters that are constant in the training data, or given to fit() because the data leaves
+    them out (e.g. n_nodes of multiprocess_all() results), are recorded in `fixed`; the surrogate
+    only answers queries at those values, and for no other parameters.
+
+    Args:
+        metrics (list, optional): metrics to model. Default all of RUN_METRICS present in the data.
+        max_fit_points (int, optional): size of the subsample used to fit the hyperparameters. Default 400.
+        seed (int, optional): seed of that subsample. Default 0.
+    """
+    def __init__(self, metrics=None, max_fit_points=400, seed=0):
+        self.metrics = metrics
+        self.max_fit_points = max_fit_points
+        self.seed = seed
+
+    def _scale(self, coords):
+        ''' Maps coordinates (dict or DataFrame of arrays) onto the unit cube of the training data.'''
+        columns = []
+        for name in self.parameters:
+            values = np.asarray(coords[name], dtype=float)
+            if name in LOG_PARAMETERS:
+                values = np.log(values)
+            low, high = self._bounds[name]
+            columns.append((values - low) / (high - low))
+        return np.column_stack(columns)
+
+    def fit(self, data, **fixed):
+        """
+        Fits the surrogate on sweep results.
+
+        Args:
+            data (list, pandas.DataFrame or str): list of result dicts, a DataFrame, or the path of
+                                                 a CSV file or results store.
+            **fixed: values of parameters that were constant in the sweep but are not in the data,
+                     e.g. fit(results, n_nodes=200, time_steps=100, m_ba=2).
+
+        Returns:
+            Surrogate: self.
+        """
+        import pandas as pd
+        if isinstance(data, str):
+            data = load_table(data)
+        data = pd.DataFrame(data)
+        self.parameters = [name for name in PARAMETERS if name in data and data[name].nunique() > 1]
+        assert self.parameters, "The data does not vary any parameter"
+        if self.metrics is None:
+            self.metrics = [metric for metric in RUN_METRICS if metric in data]
+        self.fixed = {name: data[name].iloc[0] for name in PARAMETERS
+                      if name in data and name not in self.parameters}
+        for name, value in fixed.items():
+            assert name in PARAMETERS, f"Unknown parameter {name}, has to be one of {PARAMETERS}"
+            assert name not in self.parameters, f"{name} varies in the data"
+            assert name not in self.fixed or np.isclose(self.fixed[name], value), \
+                f"The data has {name} = {self.fixed[name]}, not {value}"
+            self.fixed[name] = value
+
+        self._bounds = {}
+        for name in self.parameters:
+            values = np.log(data[name]) if name in LOG_PARAMETERS else data[name]
+            self._bounds[name] = (values.min(), values.max())
+        self._x = self._scale(data)
+
+        rng = np.random.default_rng(self.seed)
+        subset = rng.permutation(len(data))[:self.max_fit_points]
+        self._models = {}
+        for metric in self.metrics:
+            y = data[metric].to_numpy(dtype=float)
+            y_mean, y_std = y.mean(), y.std() or 1.0
+            y_scaled = (y - y_mean) / y_std
+
+            start = np.log(np.r_[np.full(len(self.parameters), 0.2), 1e-2])
+            bounds = [(np.log(1e-3), np.log(10))] * len(self.parameters) + [(np.log(1e-6), np.log(1))]
+            fitted = minimize(_negative_log_likelihood, start, args=(self._x[subset], y_scaled[subset]),
+                              method='L-BFGS-B', bounds=bounds)
+            lengthscales, noise = np.exp(fitted.x[:-1]), np.exp(fitted.x[-1])
+
+            k = _kernel(self._x, self._x, lengthscales) + (noise + 1e-8) * np.eye(len(self._x))
+            cholesky = np.linalg.cholesky(k)
+            alpha = cho_solve((cholesky, True), y_scaled)
+            self._models[metric] = {"lengthscales": lengthscales, "noise": noise, "cholesky": cholesky,
+                                    "alpha": alpha, "y_mean": y_mean, "y_std": y_std}
+        return self
+
+    def predict(self, metric, **coords):
+        """
+        Predicts a metric at any number of points.
+
+        Args:
+            metric (str): one of the fitted metrics.
+            **coords: values (floats or arrays of equal length) of every varied parameter,
+                      e.g. predict('variance', epsilon=0.237, mu=0.11). Parameters in `fixed`
+                      may be given, but only at their trained value; others are rejected.
+
+        Returns:
+            tuple: (mean, std) arrays of the prediction, std is the predictive uncertainty.
+        """
+        for name in self.parameters:
+            assert name in coords, f"The surrogate needs a value for {name}"
+        for name in coords:
+            assert name in self.parameters or name in self.fixed, \
+                f"The surrogate knows nothing about {name}, give its training value to fit()"
+        for name, value in self.fixed.items():
+            assert name not in coords or np.allclose(np.asarray(coords[name], dtype=float), value), \
+                f"The surrogate was trained at {name} = {value} only, got {name} = {coords[name]}"
+        model = self._models[metric]
+        x = self._scale({name: np.atleast_1d(coords[name]) for name in self.parameters})
+        k_star = _kernel(x, self._x, model["lengthscales"])
+        mean = k_star @ model["alpha"]
+        v = solve_triangular(model["cholesky"], k_star.T, lower=True)
+        variance = np.maximum(1 - np.sum(v ** 2, axis=0), 0)
+        return model["y_mean"] + model["y_std"] * mean, model["y_std"] * np.sqrt(variance)
+
+    def predict_grid(self, x_values, y_values, x_coord_column='mu', y_coord_column='epsilon',
+                     confidence=0.95, **fixed):
+        """
+        Predicts all metrics on a regular grid, in the format returned by multiprocess_all, with
+        '<metric>_ci_low' and '<metric>_ci_high' from the predictive uncertainty.
+
+        Args:
+            x_values (list): values of the first grid parameter.
+            y_values (list): values of the second grid parameter.
+            x_coord_column (str, optional): name of the first grid parameter. Default 'mu'.
+            y_coord_column (str, optional): name of the second grid parameter. Default 'epsilon'.
+            confidence (float, optional): level of the prediction intervals. Default 0.95.
+            **fixed: values of the other varied parameters, see predict().
+
+        Returns:
+            list: one dict per grid point.
+        """
+        import pandas as pd
+        from scipy.stats import norm
+        xx, yy = np.meshgrid(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+        coords = {name: np.full(xx.size, value, dtype=float) for name, value in fixed.items()}
+        coords[x_coord_column], coords[y_coord_column] = xx.ravel(), yy.ravel()
+        z = norm.ppf(0.5 + confidence / 2)
+
+        columns = {}
+        for metric in self.metrics:
+            mean, std = self.predict(metric, **coords)
+            columns[metric] = mean
+            columns[f'{metric}_ci_low'] = mean - z * std
+            columns[f'{metric}_ci_high'] = mean + z * std
+        columns[y_coord_column], columns[x_coord_column] = coords[y_coord_column], coords[x_coord_column]
+        return pd.DataFrame(columns).to_dict('records')
+
+    def uncertain_points(self, threshold, x_values, y_values, x_coord_column='mu', y_coord_column='epsilon',
+                         **fixed):
+        """
+        Flags grid points where the predictive std of any metric, relative to the spread of that metric
+        in the training data, is above threshold; real simulations are needed there.
+
+        Args:
+            threshold (float): relative uncertainty, e.g. 0.1.
+            x_values, y_values, x_coord_column, y_coord_column, **fixed: the grid, see predict_grid().
+
+        Returns:
+            list: (x, y) tuples of the uncertain points.
+        """
+        xx, yy = np.meshgrid(np.asarray(x_values, dtype=float), np.asarray(y_values, dtype=float))
+        coords = {name: np.full(xx.size, value, dtype=float) for name, value in fixed.items()}
+        coords[x_coord_column], coords[y_coord_column] = xx.ravel(), yy.ravel()
+
+        uncertain = np.zeros(xx.size, dtype=bool)
+        for metric in self.metrics:
+            _, std = self.predict(metric, **coords)
+            uncertain |= std / self._models[metric]["y_std"] > threshold
+        return list(zip(xx.ravel()[uncertain], yy.ravel()[uncertain]))
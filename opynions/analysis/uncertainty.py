@@ -0,0 +1,159 @@
+'''Confidence intervals for sweep metrics, computed for all parameter points at once.'''
+
+import warnings
+import numpy as np
+from opynions.analysis.combined import RUN_METRICS
+
+def stack_runs(list_of_runs, keys=None):
+    """
+    Stacks the per-run arrays of many parameter points into one compact array per key.
+    Points with fewer runs are padded with NaN.
+
+    Args:
+        list_of_runs (list): per-run dicts (key -> 1D array), one per parameter point,
+                             as returned by combined_analysis_runs().
+        keys (list, optional): keys to stack. Default all keys of the first dict.
+
+    Returns:
+        dict: maps every key to a float array of shape (n_points, max_runs).
+    """
+    if keys is None:
+        keys = list(list_of_runs[0].keys())
+    max_runs = max(len(runs[keys[0]]) for runs in list_of_runs)
+
+    stacked = {}
+    for key in keys:
+        array = np.full((len(list_of_runs), max_runs), np.nan)
+        for i, runs in enumerate(list_of_runs):
+            array[i, :len(runs[key])] = runs[key]
+        stacked[key] = array
+    return stacked
+
+def _pooled_variance(variances, means, axis=-1):
+    ''' Variance over all opinions of all runs, from the per-run variances and means.'''
+    return np.nanmean(variances, axis=axis) + np.nanvar(means, axis=axis)
+
+def analytic_ci(stacked, metrics=RUN_METRICS, confidence=0.95):
+    """
+    Student-t confidence intervals of the mean of every metric, for all points at once.
+    For "variance" the interval is centred on the pooled variance and uses the spread
+    of the per-run variances.
+
+    Args:
+        stacked (dict): output of stack_runs(), must contain "mean_opinion" for "variance".
+        metrics (list, optional): metrics to compute intervals for. Default RUN_METRICS.
+        confidence (float, optional): confidence level. Default 0.95.
+
+    Returns:
+        dict: maps every metric to a tuple (low, high) of arrays of shape (n_points,).
+    """
+    from scipy.stats import t as t_distribution  # scipy.stats takes a second to import, only load it when needed
+    intervals = {}
+    for metric in metrics:
+        values = stacked[metric]
+        n = np.sum(~np.isnan(values), axis=1)
+        centre = np.nanmean(values, axis=1)
+        if metric == "variance":
+            centre = _pooled_variance(values, stacked["mean_opinion"], axis=1)
+        with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+            # points with a single run have no spread, they get NaN below
+            warnings.simplefilter('ignore', RuntimeWarning)
+            sem = np.nanstd(values, axis=1, ddof=1) / np.sqrt(n)
+            half_width = t_distribution.ppf(0.5 + confidence / 2, np.maximum(n - 1, 1)) * sem
+        half_width = np.where(n > 1, half_width, np.nan)
+        intervals[metric] = (centre - half_width, centre + half_width)
+    return intervals
+
+def bootstrap_ci(stacked, metrics=RUN_METRICS, confidence=0.95, n_boot=1000, seed=None,
+                 max_block=4_000_000):
+    """
+    Percentile bootstrap confidence intervals of every metric, for all points at once.
+    The runs of each point are resampled with replacement; the same resamples are
+    used for all metrics. For "variance" the pooled variance is resampled.
+
+    Args:
+        stacked (dict): output of stack_runs(), must contain "mean_opinion" for "variance".
+        metrics (list, optional): metrics to compute intervals for. Default RUN_METRICS.
+        confidence (float, optional): confidence level. Default 0.95.
+        n_boot (int, optional): number of bootstrap resamples. Default 1000.
+        seed (int, optional): seed of the random generator. Default None.
+        max_block (int, optional): maximum number of resampled values held in memory at once,
+                                   points are processed in blocks below this size.
+
+    Returns:
+        dict: maps every metric to a tuple (low, high) of arrays of shape (n_points,).
+    """
+    rng = np.random.default_rng(seed)
+    first = stacked[metrics[0]]
+    n_points, max_runs = first.shape
+    n = np.sum(~np.isnan(first), axis=1)
+    quantiles = [50 * (1 - confidence), 50 * (1 + confidence)]
+
+    intervals = {metric: (np.full(n_points, np.nan), np.full(n_points, np.nan)) for metric in metrics}
+    block = max(1, max_block // (n_boot * max_runs))
+    for start in range(0, n_points, block):
+        stop = min(start + block, n_points)
+        n_block = n[start:stop, None, None]
+        # resample indices below each point's own run count, pad the remainder
+        idx = (rng.random((stop - start, n_boot, max_runs)) * n_block).astype(np.intp)
+        padding = np.arange(max_runs)[None, None, :] >= n_block
+
+        def resample(values):
+            resampled = np.take_along_axis(values[start:stop, None, :], idx, axis=2)
+            return np.where(padding, np.nan, resampled)
+
+        for metric in metrics:
+            if metric == "variance":
+                statistic = _pooled_variance(resample(stacked["variance"]),
+                                             resample(stacked["mean_opinion"]), axis=2)
+            else:
+                statistic = np.nanmean(resample(stacked[metric]), axis=2)
+            low, high = np.percentile(statistic, quantiles, axis=1)
+            intervals[metric][0][start:stop] = low
+            intervals[metric][1][start:stop] = high
+
+    for metric in metrics:
+        # a single run carries no information about the spread
+        intervals[metric][0][n < 2] = np.nan
+        intervals[metric][1][n < 2] = np.nan
+    return intervals
+
+def add_confidence_intervals(list_of_dicts, list_of_runs, metrics=RUN_METRICS, confidence=0.95,
+                             method='bootstrap', n_boot=1000, seed=None):
+    """
+    Adds '<metric>_ci_low' and '<metric>_ci_high' columns right after every metric
+    of the sweep results, computed in one vectorized pass over all points.
+
+    Args:
+        list_of_dicts (list): sweep results, one dict per parameter point.
+        list_of_runs (list): per-run dicts of the same points, in the same order.
+        metrics (list, optional): metrics to add intervals for. Default RUN_METRICS.
+        confidence (float, optional): confidence level. Default 0.95.
+        method (str, optional): 'bootstrap' or 'analytic'. Default 'bootstrap'.
+        n_boot (int, optional): number of bootstrap resamples. Default 1000.
+        seed (int, optional): seed for the bootstrap. Default None.
+
+    Returns:
+        list: new list of dicts with the interval columns added.
+    """
+    assert method in ('bootstrap', 'analytic'), f"Unknown confidence interval method: {method}"
+    assert 0 < confidence < 1, f"confidence out of bounds (0,1): {confidence}"
+    if not list_of_dicts:
+        return []
+
+    stacked = stack_runs(list_of_runs, list(metrics) + ["mean_opinion"])
+    if method == 'bootstrap':
+        intervals = bootstrap_ci(stacked, metrics, confidence, n_boot, seed)
+    else:
+        intervals = analytic_ci(stacked, metrics, confidence)
+
+    new_dicts = []
+    for i, results in enumerate(list_of_dicts):
+        new = {}
+        for key, value in results.items():
+            new[key] = value
+            if key in intervals:
+                new[f'{key}_ci_low'] = intervals[key][0][i]
+                new[f'{key}_ci_high'] = intervals[key][1][i]
+        new_dicts.append(new)
+    return new_dicts
@@ -1,9 +1,18 @@
-'''Utility functions for data handling and plotting'''
+'''Utility functions for data handling and plotting.
+matplotlib, seaborn, pandas and scipy are imported by the functions that use them, so that
+importing this module (and the sweeps that import it) stays fast.'''
 
-import matplotlib.pyplot as plt
 import networkx as nx
-import pandas as pd
-import seaborn as sns
+import numpy as np
+from opynions.analysis.results_log import PARAMETERS
+from opynions.analysis.storage import load_table
+
+# columns of sweep results that describe how a point was computed, not what was measured,
+# as are the per-metric run counts '<metric>_n_runs' of opynions.analysis.results_log.load_results_log()
+BOOKKEEPING_COLUMNS = ("n_runs", "depth")
+
+def _is_metric(column):
+    return column not in PARAMETERS + BOOKKEEPING_COLUMNS and not column.endswith('_n_runs')
 
 def list_of_dicts_to_csv(dict_list, file_path):
     """
@@ -17,6 +26,7 @@ def list_of_dicts_to_csv(dict_list, file_path):
         tuple : A tuple containing a list of lists where each sublist contains the values corresponding to each key,
                 and a list of keys in the order they appear in the output list.
     """
+    import pandas as pd
     if not dict_list:
         return [], []
 
@@ -41,24 +51,73 @@ def list_of_dicts_to_csv(dict_list, file_path):
     return data, keys
 
 
+def is_full_grid(data, x_coord_column, y_coord_column):
+    """
+    Checks whether the points of a DataFrame form a full rectangular grid without duplicates.
+
+    Args:
+        data (pandas.DataFrame) : The data.
+        x_coord_column (str) : Name of the x coordinate column.
+        y_coord_column (str) : Name of the y coordinate column.
+
+    Returns:
+        bool : True if every (x, y) combination occurs exactly once.
+    """
+    n_grid = data[x_coord_column].nunique() * data[y_coord_column].nunique()
+    return len(data) == n_grid and not data.duplicated([x_coord_column, y_coord_column]).any()
+
+def interpolate_to_grid(data, value_column, x_coord_column, y_coord_column, resolution=201):
+    """
+    Function to linearly interpolate scattered points (e.g. from an adaptive sweep) onto a regular grid.
+    Duplicate coordinates are averaged first.
+
+    Args:
+        data (pandas.DataFrame) : The scattered data.
+        value_column (str) : Name of the column to interpolate.
+        x_coord_column (str) : Name of the x coordinate column.
+        y_coord_column (str) : Name of the y coordinate column.
+        resolution (int, optional) : Number of grid points along each axis. Default 201.
+
+    Returns:
+        pandas.DataFrame : Grid in the layout of DataFrame.pivot(), y values as index and x values as columns.
+    """
+    import pandas as pd
+    from scipy.interpolate import griddata
+    data = data.groupby([x_coord_column, y_coord_column], as_index=False)[value_column].mean()
+    x_grid = np.linspace(data[x_coord_column].min(), data[x_coord_column].max(), resolution)
+    y_grid = np.linspace(data[y_coord_column].min(), data[y_coord_column].max(), resolution)
+    xx, yy = np.meshgrid(x_grid, y_grid)
+    values = griddata((data[x_coord_column], data[y_coord_column]), data[value_column], (xx, yy), method='linear')
+    return pd.DataFrame(values, index=pd.Index(np.round(y_grid, 4), name=y_coord_column),
+                        columns=pd.Index(np.round(x_grid, 4), name=x_coord_column))
+
 def create_heatmap_from_csv(file_path, value_column, x_coord_column, y_coord_column,
-                            save=False, image_path='Heatmap.png',):
+                            save=False, image_path='Heatmap.png', resolution=201):
     """
-    Function to create a heatmap from a CSV file with user-defined columns for values and coordinates.
+    Function to create a heatmap from a CSV file or results store (see opynions.analysis.storage)
+    with user-defined columns for values and coordinates.
+    If the points do not form a full grid (scattered points, e.g. from opynions.analysis.refinement)
+    they are interpolated onto a regular grid first.
 
     Args:
-        file_path (str) : Path to the CSV file containing the data.
+        file_path (str) : Path to the CSV file or results store containing the data.
         value_column (str) : Name of the column to be used for heatmap values, is also the title.
         x_coord_column (str) : Name of the column to be used for x-axis coordinates.
         y_coord_column (str) : Name of the column to be used for y-axis coordinates.
         save (bool, optional) : whether to save the image or not. Default False
         image_path (str, optional) : OPTIONAL desired path of the generated image. Default 'Heatmap.png'.
+        resolution (int, optional) : grid points per axis when interpolating scattered points. Default 201.
     """
-    # Load data from the CSV file
-    data = pd.read_csv(file_path)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    # Load data from the CSV file or store
+    data = load_table(file_path)
 
     # Pivot the data to create a matrix for the heatmap
-    heatmap_data = data.pivot(index=y_coord_column, columns=x_coord_column, values=value_column)
+    if is_full_grid(data, x_coord_column, y_coord_column):
+        heatmap_data = data.pivot(index=y_coord_column, columns=x_coord_column, values=value_column)
+    else:
+        heatmap_data = interpolate_to_grid(data, value_column, x_coord_column, y_coord_column, resolution)
 
     # Reverse the y-axis
     heatmap_data = heatmap_data.iloc[::-1]
@@ -86,9 +145,126 @@ def create_heatmap_from_csv(file_path, value_column, x_coord_column, y_coord_col
         print("Heatmap saved")    
 
 
+def pivot_metrics(data, metrics=None, x_coord_column='mu', y_coord_column='epsilon', resolution=201):
+    """
+    Function to pivot sweep results once into one array holding the grids of all metrics.
+    Scattered points are interpolated onto a regular grid, see interpolate_to_grid().
+
+    Args:
+        data (str, list or pandas.DataFrame) : path of a CSV file or results store, result dicts or a DataFrame.
+        metrics (list, optional) : columns to pivot. Default all columns except the parameters and BOOKKEEPING_COLUMNS.
+        x_coord_column (str, optional) : Name of the x coordinate column. Default 'mu'.
+        y_coord_column (str, optional) : Name of the y coordinate column. Default 'epsilon'.
+        resolution (int, optional) : grid points per axis when interpolating scattered points. Default 201.
+
+    Returns:
+        tuple : (cube, metrics, x_values, y_values), cube has shape (len(metrics), len(y_values), len(x_values)).
+    """
+    import pandas as pd
+    data = load_table(data) if isinstance(data, str) else pd.DataFrame(data)
+    if metrics is None:
+        metrics = [column for column in data.columns if _is_metric(column)]
+
+    x_values, x_index = np.unique(data[x_coord_column].to_numpy(), return_inverse=True)
+    y_values, y_index = np.unique(data[y_coord_column].to_numpy(), return_inverse=True)
+    # same check as is_full_grid(), on the indices that are needed anyway
+    cells = np.bincount(y_index * len(x_values) + x_index, minlength=len(x_values) * len(y_values))
+    if len(data) != len(cells) or cells.max(initial=0) > 1:
+        grids = [interpolate_to_grid(data, metric, x_coord_column, y_coord_column, resolution) for metric in metrics]
+        return (np.stack([grid.to_numpy() for grid in grids]), list(metrics),
+                grids[0].columns.to_numpy(dtype=float), grids[0].index.to_numpy(dtype=float))
+
+    cube = np.full((len(metrics), len(y_values), len(x_values)), np.nan)
+    cube[:, y_index, x_index] = data[list(metrics)].to_numpy(dtype=float).T
+    return cube, list(metrics), x_values, y_values
+
+def downsample_grid(cube, x_values, y_values, max_size=301):
+    """
+    Function to average blocks of grid points so that no axis has more than max_size points,
+    e.g. 1001x1001 becomes 251x251 with 4x4 blocks. NaNs are ignored in the averages.
+
+    Args:
+        cube (numpy.ndarray) : grids of shape (n_metrics, len(y_values), len(x_values)).
+        x_values (numpy.ndarray) : x coordinates of the grid.
+        y_values (numpy.ndarray) : y coordinates of the grid.
+        max_size (int, optional) : maximum number of points per axis. Default 301.
+
+    Returns:
+        tuple : (cube, x_values, y_values) of the downsampled grid, coordinates are block means.
+    """
+    factors = [int(np.ceil(len(values) / max_size)) for values in (y_values, x_values)]
+    if factors == [1, 1]:
+        return cube, x_values, y_values
+    n_metrics, ny, nx_ = cube.shape
+    fy, fx = factors
+    padded = np.full((n_metrics, -(-ny // fy) * fy, -(-nx_ // fx) * fx), np.nan)
+    padded[:, :ny, :nx_] = cube
+    blocks = padded.reshape(n_metrics, padded.shape[1] // fy, fy, padded.shape[2] // fx, fx)
+    with np.errstate(invalid='ignore'):
+        counts = np.sum(~np.isnan(blocks), axis=(2, 4))
+        sums = np.nansum(blocks, axis=(2, 4))
+        downsampled = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+    def block_means(values, factor):
+        padded_values = np.full(-(-len(values) // factor) * factor, np.nan)
+        padded_values[:len(values)] = values
+        return np.nanmean(padded_values.reshape(-1, factor), axis=1)
+
+    return downsampled, block_means(x_values, fx), block_means(y_values, fy)
+
+def plot_heatmaps(data, metrics=None, x_coord_column='mu', y_coord_column='epsilon', max_size=301,
+                  save=False, image_path='heatmaps.png', resolution=201, ncols=4):
+    """
+    Function to render heatmaps of several metrics in one figure, from a single pivot of the results
+    (see pivot_metrics()). Grids larger than max_size per axis are block-averaged first (see downsample_grid()).
+
+    Args:
+        data (str, list or pandas.DataFrame) : path of a CSV file or results store, result dicts or a DataFrame.
+        metrics (list, optional) : metrics to plot. Default all columns except the parameters.
+        x_coord_column (str, optional) : Name of the x coordinate column. Default 'mu'.
+        y_coord_column (str, optional) : Name of the y coordinate column. Default 'epsilon'.
+        max_size (int, optional) : maximum number of tiles per axis. Default 301.
+        save (bool, optional) : whether to save the image or not. Default False
+        image_path (str, optional) : path of the saved image. Default 'heatmaps.png'.
+        resolution (int, optional) : grid points per axis when interpolating scattered points. Default 201.
+        ncols (int, optional) : number of heatmaps per row. Default 4.
+
+    Returns:
+        matplotlib.figure.Figure : the figure.
+    """
+    import matplotlib.pyplot as plt
+    cube, metrics, x_values, y_values = pivot_metrics(data, metrics, x_coord_column, y_coord_column, resolution)
+    cube, x_values, y_values = downsample_grid(cube, x_values, y_values, max_size)
+
+    ncols = min(ncols, len(metrics))
+    nrows = -(-len(metrics) // ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize=(4 * ncols, 3.5 * nrows), squeeze=False)
+    uniform = all(len(values) < 3 or np.allclose(np.diff(values), np.diff(values)[0])
+                  for values in (x_values, y_values))
+    for ax, metric, grid in zip(axes.flat, metrics, cube):
+        if uniform:
+            dx = (x_values[-1] - x_values[0]) / max(len(x_values) - 1, 1) / 2 or 0.5
+            dy = (y_values[-1] - y_values[0]) / max(len(y_values) - 1, 1) / 2 or 0.5
+            image = ax.imshow(grid, origin='lower', aspect='auto', cmap='magma', interpolation='nearest',
+                              extent=(x_values[0] - dx, x_values[-1] + dx, y_values[0] - dy, y_values[-1] + dy))
+        else:
+            image = ax.pcolormesh(x_values, y_values, grid, shading='nearest', cmap='magma', rasterized=True)
+        fig.colorbar(image, ax=ax)
+        ax.set_title(metric)
+        ax.set_xlabel(x_coord_column)
+        ax.set_ylabel(y_coord_column)
+    for ax in axes.flat[len(metrics):]:
+        ax.set_visible(False)
+
+    fig.tight_layout()
+    if save:
+        fig.savefig(image_path, dpi=300)
+    return fig
+
 def plot_graph(g, include_colorbar=True, exclude_isolates=False, save_file=False, file_path='graph_plot.png'):
     """
     Plots the graph with nodes colored by opinion and saves it to a file.
+    Uses a spring layout, for graphs of more than a few hundred nodes use plot_large_graph().
 
     Args:
         g (networkx.Graph): Graph to plot.
@@ -97,6 +273,7 @@ def plot_graph(g, include_colorbar=True, exclude_isolates=False, save_file=False
         save_file (bool, optional): Whether to save the image file. Default False.
         file_path (str, optional): Path to save the plot image. Default 'graph_plot.png'.
     """
+    import matplotlib.pyplot as plt
     if g.number_of_nodes() > 0:
         if exclude_isolates:
             g = g.copy()
@@ -120,25 +297,166 @@ def plot_graph(g, include_colorbar=True, exclude_isolates=False, save_file=False
             plt.savefig(file_path, dpi=300)
         plt.show()
 
-def plot_subplots_from_csv(csv_file, x_axis_column, save_file=False, file_path='sliceplots.png'):
+def sample_graph(g, max_nodes, hub_fraction=0.2, seed=None):
+    """
+    Function to reduce a graph to at most max_nodes nodes for plotting: the hubs (highest degrees)
+    are always kept, the rest of the budget is a uniform sample of the other nodes.
+
+    Args:
+        g (networkx.Graph): Graph to sample.
+        max_nodes (int): Number of nodes to keep.
+        hub_fraction (float, optional): Share of max_nodes reserved for the hubs. Default 0.2.
+        seed (int, optional): Seed of the sample. Default None.
+
+    Returns:
+        networkx.Graph: the subgraph induced by the kept nodes (a view on g).
+    """
+    if g.number_of_nodes() <= max_nodes:
+        return g
+    nodes = np.array(list(g.nodes()))
+    degrees = np.fromiter((degree for _, degree in g.degree()), dtype=int, count=len(nodes))
+    order = np.argsort(-degrees, kind='stable')
+    n_hubs = int(max_nodes * hub_fraction)
+    rng = np.random.default_rng(seed)
+    rest = rng.choice(order[n_hubs:], size=max_nodes - n_hubs, replace=False)
+    return g.subgraph(nodes[np.concatenate([order[:n_hubs], rest])].tolist())
+
+def opinion_layout(g, seed=None):
+    """
+    Function to place nodes by opinion on the x axis and by degree on the y axis (with a little jitter),
+    so opinion clusters show up as columns with their hubs on top. Linear in the number of nodes.
+
+    Args:
+        g (networkx.Graph): Graph with 'opinion' node attributes.
+        seed (int, optional): Seed of the jitter. Default None.
+
+    Returns:
+        numpy.ndarray: (n_nodes, 2) positions in the order of g.nodes().
+    """
+    opinions = np.fromiter((opinion for _, opinion in g.nodes(data='opinion')), dtype=float, count=len(g))
+    degrees = np.fromiter((degree for _, degree in g.degree()), dtype=float, count=len(g))
+    height = np.log1p(degrees)
+    height /= height.max() if len(height) and height.max() > 0 else 1
+    rng = np.random.default_rng(seed)
+    return np.column_stack([opinions, height + rng.uniform(-0.03, 0.03, len(g))])
+
+def plot_large_graph(g, layout='opinion', max_nodes=None, max_edges=50_000, include_colorbar=True,
+                     exclude_isolates=False, save_file=False, file_path='graph_plot.png', dpi=200, seed=None):
+    """
+    Plots large graphs in seconds, with nodes colored by opinion like plot_graph(). Nodes and edges
+    are drawn as one rasterized scatter and one rasterized line collection instead of per element.
+
+    Args:
+        g (networkx.Graph): Graph to plot.
+        layout (str or callable, optional): 'opinion' (see opinion_layout()), 'spectral'
+            (networkx.spectral_layout, sparse eigenvectors) or a function g -> {node: (x, y)}. Default 'opinion'.
+        max_nodes (int, optional): sample the graph down to this many nodes, see sample_graph(). Default None.
+        max_edges (int, optional): draw a random sample of at most this many edges, more only darken the
+            picture and slow down saving. Default 50000.
+        include_colorbar (bool, optional): Whether to include the colorbar in the plot. Default True.
+        exclude_isolates (bool, optional): Whether to exclude isolated nodes from the plot. Default False.
+        save_file (bool, optional): Whether to save the image file. Default False.
+        file_path (str, optional): Path to save the plot image. Default 'graph_plot.png'.
+        dpi (int, optional): Resolution of the saved image. Default 200.
+        seed (int, optional): Seed of the sampling and the layout jitter. Default None.
+
+    Returns:
+        matplotlib.figure.Figure: the figure.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+    if exclude_isolates:
+        g = g.subgraph([node for node, degree in g.degree() if degree > 0])
+    if max_nodes is not None:
+        g = sample_graph(g, max_nodes, seed=seed)
+
+    nodes = list(g.nodes())
+    index = {node: i for i, node in enumerate(nodes)}
+    if layout == 'opinion':
+        pos = opinion_layout(g, seed)
+    else:
+        layout_function = nx.spectral_layout if layout == 'spectral' else layout
+        positions = layout_function(g)
+        pos = np.array([positions[node] for node in nodes], dtype=float).reshape(-1, 2)
+
+    edges = np.fromiter((index[node] for edge in g.edges() for node in edge), dtype=np.int64,
+                        count=2 * g.number_of_edges()).reshape(-1, 2)
+    if len(edges) > max_edges:
+        edges = edges[np.random.default_rng(seed).choice(len(edges), max_edges, replace=False)]
+    opinions = np.fromiter((opinion for _, opinion in g.nodes(data='opinion')), dtype=float, count=len(nodes))
+
+    fig, ax = plt.subplots(figsize=(4, 4))
+    alpha = min(0.3, 2000 / max(len(edges), 1))
+    ax.add_collection(LineCollection(pos[edges], colors='black', linewidths=0.2, alpha=alpha, rasterized=True))
+    ax.scatter(pos[:, 0], pos[:, 1], c=opinions, cmap=plt.cm.viridis, vmin=0, vmax=1, s=2,
+               linewidths=0, rasterized=True)
+    ax.autoscale()
+    if layout == 'opinion':
+        ax.set_xlabel('Opinion')
+        ax.set_ylabel('Degree (log)')
+    else:
+        ax.set_axis_off()
+
+    if include_colorbar:
+        cbar = fig.colorbar(plt.cm.ScalarMappable(cmap=plt.cm.viridis), ax=ax, label='Opinion')
+        cbar.ax.yaxis.label.set_size(10)
+        cbar.ax.tick_params(labelsize=10)
+    if save_file:
+        fig.savefig(file_path, dpi=dpi)
+    return fig
+
+def interpolate_slice(data, x_coord_column, fixed_column, fixed_value, value_columns, resolution=101):
+    """
+    Function to linearly interpolate scattered points along a line where fixed_column equals fixed_value.
+
+    Args:
+        data (pandas.DataFrame) : The scattered data.
+        x_coord_column (str) : Name of the coordinate column varied along the slice.
+        fixed_column (str) : Name of the coordinate column held fixed.
+        fixed_value (float) : Value of fixed_column on the slice.
+        value_columns (list) : Names of the columns to interpolate.
+        resolution (int, optional) : Number of points along the slice. Default 101.
+
+    Returns:
+        pandas.DataFrame : x_coord_column and the interpolated value columns (NaN outside the sampled region).
     """
-    Plots subplots from a CSV file with metrics against a specified x-axis column.
+    import pandas as pd
+    from scipy.interpolate import griddata
+    data = data.groupby([x_coord_column, fixed_column], as_index=False)[list(value_columns)].mean()
+    x_grid = np.linspace(data[x_coord_column].min(), data[x_coord_column].max(), resolution)
+    points = (data[x_coord_column], data[fixed_column])
+    sliced = {x_coord_column: x_grid}
+    for column in value_columns:
+        sliced[column] = griddata(points, data[column], (x_grid, np.full(resolution, fixed_value)), method='linear')
+    return pd.DataFrame(sliced)
+
+def plot_subplots_from_csv(csv_file, x_axis_column, save_file=False, file_path='sliceplots.png',
+                           at=None, resolution=101):
+    """
+    Plots subplots from a CSV file or results store with metrics against a specified x-axis column.
+    Metrics with '<metric>_ci_low' and '<metric>_ci_high' columns get a shaded confidence band.
+    If the other parameter is not constant (scattered points, e.g. from opynions.analysis.sampling),
+    the metrics are interpolated along the slice where it equals `at`.
     
     Args:
-    csv_file (str): Path to the CSV file containing the data.
+    csv_file (str): Path to the CSV file or results store containing the data.
     x_axis_column (str): The column to be used as the x-axis. Must be either 'epsilon' or 'mu'.
     save_file (bool, optional): If True, saves the plot to a file. Default is False.
     file_path (str, optional): The file path to save the plot if save_file is True. Default is 'sliceplots.png'.
+    at (float, optional): Value of the other parameter on the slice, needed for scattered points.
+    resolution (int, optional): Number of points along an interpolated slice. Default 101.
     
     Raises:
     ValueError: If x_axis_column is not 'epsilon' or 'mu'.
+    ValueError: If the other parameter is not constant and `at` is not given.
     
     Returns:
     None
     """
+    import matplotlib.pyplot as plt
     
-    # Read the CSV file into a DataFrame
-    df = pd.read_csv(csv_file)
+    # Read the CSV file or store into a DataFrame
+    df = load_table(csv_file)
     
     # Check if the x_axis_column is valid
     if x_axis_column not in ['epsilon', 'mu']:
@@ -147,19 +465,30 @@ def plot_subplots_from_csv(csv_file, x_axis_column, save_file=False, file_path='
     # Drop the column that is not used
     columns_to_drop = [col for col in ['epsilon', 'mu'] if col != x_axis_column]
     set_parameter_value = df[columns_to_drop].iloc[0, 0]
-    df = df.drop(columns=columns_to_drop)
+    value_columns = [col for col in df.columns if _is_metric(col)]
+    if df[columns_to_drop[0]].nunique() > 1:
+        if at is None:
+            raise ValueError(f"{columns_to_drop[0]} is not constant, give the slice value with `at`")
+        set_parameter_value = at
+        df = interpolate_slice(df, x_axis_column, columns_to_drop[0], at, value_columns, resolution)
+    df = df[[x_axis_column] + value_columns].sort_values(x_axis_column)
     
+    # Confidence interval columns are shaded around their metric instead of plotted separately
+    metric_columns = [col for col in value_columns if not col.endswith(('_ci_low', '_ci_high'))]
+
     # Create subplots
-    num_plots = len(df.columns) - 1
-    fig, axes = plt.subplots(1, num_plots, figsize=(3*num_plots, 3))
+    num_plots = len(metric_columns)
+    fig, axes = plt.subplots(1, num_plots, figsize=(3*num_plots, 3), squeeze=False)
+    axes = axes[0]
     fig.suptitle(f'Metrics vs {x_axis_column}. With {columns_to_drop[0]} = {set_parameter_value}')
     # Plot each column
-    for i, column in enumerate(df.columns):
-        if column != x_axis_column:
-            axes[i].plot(df[x_axis_column], df[column])
-            axes[i].set_title(f'{column}')
-            axes[i].set_xlabel(x_axis_column)
-            axes[i].set_ylabel(column)
+    for i, column in enumerate(metric_columns):
+        axes[i].plot(df[x_axis_column], df[column])
+        if f'{column}_ci_low' in df.columns:
+            axes[i].fill_between(df[x_axis_column], df[f'{column}_ci_low'], df[f'{column}_ci_high'], alpha=0.3)
+        axes[i].set_title(f'{column}')
+        axes[i].set_xlabel(x_axis_column)
+        axes[i].set_ylabel(column)
     
     plt.tight_layout()
     if save_file:
@@ -175,6 +504,7 @@ def plot_opinion_distribution(g, save_file=False, file_path='opinion_distributio
         save_file (bool, optional): Whether to save the histogram to a file. Default False.
         file_path (str, optional): Path to save the histogram image. Default 'opinion_distribution.png'.
     """
+    import matplotlib.pyplot as plt
     opinions = nx.get_node_attributes(g, 'opinion').values()
     
     plt.figure(figsize=(2, 1))
@@ -187,4 +517,35 @@ def plot_opinion_distribution(g, save_file=False, file_path='opinion_distributio
         plt.savefig(file_path, dpi=300)
         print(f"Opinion distribution histogram saved to {file_path}")
     
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+def plot_average_histograms(histograms, titles, ncols=4, save_file=False, file_path='opinion_distributions.png'):
+    """
+    Plots average opinion histograms, e.g. from opynions.analysis.cube.ResultsCube.histogram(), as bar charts.
+
+    Args:
+        histograms (list): histograms with equal bins on [0, 1].
+        titles (list): title of every histogram.
+        ncols (int, optional): subplots per row. Default 4.
+        save_file (bool, optional): Whether to save the figure. Default False.
+        file_path (str, optional): Path to save the figure. Default 'opinion_distributions.png'.
+
+    Returns:
+        matplotlib.figure.Figure : the figure.
+    """
+    import matplotlib.pyplot as plt
+    ncols = min(ncols, len(histograms))
+    nrows = -(-len(histograms) // ncols)
+    fig, axes = plt.subplots(nrows, ncols, figsize=(3 * ncols, 2 * nrows), squeeze=False, sharex=True)
+    for ax, histogram, title in zip(axes.flat, histograms, titles):
+        width = 1 / len(histogram)
+        ax.bar((np.arange(len(histogram)) + 0.5) * width, histogram, width=width, color='blue')
+        ax.set_title(title, fontsize=10)
+        ax.set_xlabel('Opinion')
+        ax.set_ylabel('Frequency')
+    for ax in axes.flat[len(histograms):]:
+        ax.set_axis_off()
+    fig.tight_layout()
+    if save_file:
+        fig.savefig(file_path, dpi=300)
+    return fig
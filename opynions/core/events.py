@@ -0,0 +1,167 @@
+''' Event-sourced record of a run: every rewiring as an int32 (step, node, old neighbor, new neighbor)
+row, plus sparse checkpoints of the opinions and of the state of the random number generator.
+
+The initial graph is not stored, it is regenerated from the generator state at the start of the run.
+The network at any step is the initial graph with the rewirings up to that step applied in order;
+the opinions at any step are replayed from the nearest earlier checkpoint with simulation_step().
+Both reproduce the run exactly, including the order networkx keeps the neighbors in. '''
+
+import array
+import json
+import random
+import numpy as np
+from opynions.core.simulation import initialize_graph, simulation_step
+
+def _pack_state(state):
+    ''' random.getstate() as 625 uint32 words (624 state words and the position) and gauss_next.'''
+    _, words, gauss_next = state
+    return np.array(words, dtype=np.uint32), np.nan if gauss_next is None else gauss_next
+
+def _unpack_state(words, gauss_next):
+    return (3, tuple(int(word) for word in words), None if np.isnan(gauss_next) else float(gauss_next))
+
+class EventLog:
+    """
+    Event log of one run, pass it to run_sim() as the event_log argument. Events are kept in compact
+    int32 arrays while the run goes on; save() writes the log to a compressed .npz file.
+
+    Args:
+        checkpoint_every (int, optional): store the opinions every this many steps. Replaying a step
+            simulates at most checkpoint_every - 1 steps. Default 10.
+
+    Attributes:
+        params (dict): N, T, epsilon, mu and m_ba of the run.
+        events (numpy.ndarray): (n_events, 4) int32 array of (step, node, old neighbor, new neighbor).
+        checkpoint_steps (numpy.ndarray): steps with a checkpoint.
+        checkpoint_opinions (numpy.ndarray): (n_checkpoints, N) opinions at the end of those steps.
+    """
+    def __init__(self, checkpoint_every=10):
+        self.checkpoint_every = checkpoint_every
+        self.params = None
+        self._events = array.array('i')
+        self._steps, self._opinions, self._states = [], [], []
+
+    def begin(self, N, T, epsilon, mu, m_ba):
+        ''' Called by run_sim() before the graph is generated.'''
+        self.params = {"N": N, "T": T, "epsilon": epsilon, "mu": mu, "m_ba": m_ba}
+        self._events = array.array('i')
+        self._steps, self._opinions, self._states = [], [], []
+        self.initial_state = _pack_state(random.getstate())
+
+    def rewire(self, step, node, old_neighbor, new_neighbor):
+        ''' Called by run_sim() for every rewiring.'''
+        self._events.extend((step, node, old_neighbor, new_neighbor))
+
+    def end_step(self, step, g):
+        ''' Called by run_sim() after every step, stores a checkpoint every checkpoint_every steps.'''
+        if step % self.checkpoint_every == 0 or step == self.params["T"]:
+            self._steps.append(step)
+            self._opinions.append(np.fromiter((opinion for _, opinion in g.nodes(data='opinion')), dtype=float,
+                                              count=g.number_of_nodes()))
+            self._states.append(_pack_state(random.getstate()))
+
+    @property
+    def events(self):
+        return np.frombuffer(self._events, dtype=np.int32).reshape(-1, 4)
+
+    @property
+    def checkpoint_steps(self):
+        return np.array(self._steps, dtype=np.int32)
+
+    @property
+    def checkpoint_opinions(self):
+        return np.array(self._opinions, dtype=float).reshape(len(self._steps), -1)
+
+    def save(self, file_path):
+        """
+        Writes the log to a compressed .npz file, see load_event_log().
+
+        Args:
+            file_path (str): Path of the file.
+        """
+        words, gauss = zip(self.initial_state, *self._states)
+        np.savez_compressed(file_path, params=json.dumps({**self.params, "checkpoint_every": self.checkpoint_every}),
+                            events=self.events, checkpoint_steps=self.checkpoint_steps,
+                            checkpoint_opinions=self.checkpoint_opinions,
+                            rng_words=np.array(words), rng_gauss=np.array(gauss, dtype=float))
+
+    def graph(self, step):
+        """
+        Rebuilds the network at the end of a step from the events, without simulating.
+        The opinions are those of the initial graph, see replay() for the opinions at that step.
+
+        Args:
+            step (int): time step, 0 for the initial graph.
+
+        Returns:
+            networkx.Graph: the network.
+        """
+        g = self._initial_graph()
+        events = self.events
+        for _, node, old_neighbor, new_neighbor in events[:np.searchsorted(events[:, 0], step, side='right')].tolist():
+            g.remove_edge(node, old_neighbor)
+            g.add_edge(node, new_neighbor)
+        return g
+
+    def replay(self, step):
+        """
+        Rebuilds the graph and opinions at the end of a step exactly as run_sim() had them: the network
+        at the nearest earlier checkpoint from the events, its opinions and generator state, and the
+        steps after it simulated again. The global random state is left as it was.
+
+        Args:
+            step (int): time step between 0 and T.
+
+        Returns:
+            networkx.Graph: the graph with 'opinion' node attributes.
+        """
+        assert 0 <= step <= self.params["T"], f"step out of bounds [0, {self.params['T']}]: {step}"
+        steps = self.checkpoint_steps
+        checkpoint = np.searchsorted(steps, step, side='right') - 1
+        g = self.graph(steps[checkpoint])
+        for node, opinion in enumerate(self._opinions[checkpoint].tolist()):
+            g.nodes[node]['opinion'] = opinion
+
+        events = self.events
+        position = np.searchsorted(events[:, 0], steps[checkpoint], side='right')
+        expected = events[position:np.searchsorted(events[:, 0], step, side='right')].tolist()
+        replayed = []
+        caller_state = random.getstate()
+        try:
+            random.setstate(_unpack_state(*self._states[checkpoint]))
+            for t in range(steps[checkpoint] + 1, step + 1):
+                simulation_step(g, self.params["epsilon"], self.params["mu"],
+                                lambda node, old, new, t=t: replayed.append([t, node, old, new]))
+        finally:
+            random.setstate(caller_state)
+        assert replayed == expected, "The replayed rewirings differ from the log, was it made with other code?"
+        return g
+
+    def _initial_graph(self):
+        caller_state = random.getstate()
+        try:
+            random.setstate(_unpack_state(*self.initial_state))
+            return initialize_graph(self.params["N"], self.params["m_ba"])
+        finally:
+            random.setstate(caller_state)
+
+def load_event_log(file_path):
+    """
+    Reads an event log written by EventLog.save().
+
+    Args:
+        file_path (str): Path of the .npz file.
+
+    Returns:
+        EventLog: the log, ready for graph() and replay().
+    """
+    with np.load(file_path) as data:
+        params = json.loads(str(data["params"]))
+        log = EventLog(params.pop("checkpoint_every"))
+        log.params = params
+        log._events = array.array('i', data["events"].astype(np.int32).ravel().tobytes())
+        log._steps = data["checkpoint_steps"].tolist()
+        log._opinions = list(data["checkpoint_opinions"])
+        states = list(zip(data["rng_words"], data["rng_gauss"].tolist()))
+    log.initial_state, log._states = states[0], states[1:]
+    return log
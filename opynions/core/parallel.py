@@ -0,0 +1,189 @@
+''' Parallel execution of the replicates of a single parameter point.
+Workers write the final and initial opinions and edge arrays straight into
+multiprocessing.shared_memory buffers, so only the buffer names are pickled. '''
+
+import multiprocessing as mp
+import weakref
+from multiprocessing import shared_memory
+import numpy as np
+import networkx as nx
+from opynions.core.simulation import run_sim
+from opynions.core.pool import get_pool
+from opynions.core.snapshot import write_snapshot_arrays
+
+def _attach(spec):
+    ''' Opens the shared buffers described by spec, returns the SharedMemory objects and array views.'''
+    blocks, arrays = [], {}
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        blocks.append(shm)
+        arrays[name] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    return blocks, arrays
+
+def _replicate_worker(args):
+    '''
+    Process manager for one replicate, simulates it and writes the results into the shared buffers.
+    Receives (spec, run, n_nodes, time_steps, epsilon, mu, m_ba, analyze, metric_keys).
+    '''
+    spec, run, n_nodes, time_steps, epsilon, mu, m_ba, analyze, metric_keys = args
+    blocks, arrays = _attach(spec)
+    try:
+        g, g_init = run_sim(n_nodes, time_steps, epsilon, mu, m_ba)
+        for prefix, graph in (("", g), ("initial_", g_init)):
+            opinions = nx.get_node_attributes(graph, 'opinion')
+            arrays[prefix + "opinions"][run, list(opinions.keys())] = list(opinions.values())
+            edges = np.array(graph.edges(), dtype=np.int32).reshape(-1, 2)
+            arrays[prefix + "edges"][run, :len(edges)] = edges
+            arrays[prefix + "edge_counts"][run] = len(edges)
+        if analyze is not None:
+            metrics = analyze(g)
+            for i, key in enumerate(metric_keys):
+                arrays["metrics"][run, i] = metrics[key]
+    finally:
+        del arrays
+        for shm in blocks:
+            shm.close()
+    return run
+
+class SharedReplicates:
+    """
+    Results of run_replicates(), numpy arrays backed by shared memory that the workers wrote into.
+    Call close() (or use it as a context manager) to free the memory; graphs() converts to networkx lazily.
+
+    Attributes:
+        opinions (numpy.ndarray): final opinions, shape (n_runs, n_nodes), indexed by node.
+        edges (numpy.ndarray): final edges, int32, shape (n_runs, max_edges, 2). Only the first
+                               edge_counts[run] rows of a run are valid.
+        edge_counts (numpy.ndarray): number of final edges of every run.
+        initial_opinions, initial_edges, initial_edge_counts: the same for the initial graphs.
+        metrics (dict): maps every metric key to an array with one value per run, if requested.
+    """
+    def __init__(self, n_runs, n_nodes, max_edges, metric_keys=()):
+        self.n_runs = n_runs
+        self.n_nodes = n_nodes
+        self.metric_keys = tuple(metric_keys)
+        shapes = {"opinions": ((n_runs, n_nodes), np.float64),
+                  "edges": ((n_runs, max_edges, 2), np.int32),
+                  "edge_counts": ((n_runs,), np.int64)}
+        shapes.update({"initial_" + name: shape for name, shape in shapes.items()})
+        if self.metric_keys:
+            shapes["metrics"] = ((n_runs, len(self.metric_keys)), np.float64)
+
+        self._blocks = []
+        self.spec = {}
+        for name, (shape, dtype) in shapes.items():
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            shm = shared_memory.SharedMemory(create=True, size=size)
+            self._blocks.append(shm)
+            self.spec[name] = (shm.name, shape, np.dtype(dtype).str)
+            setattr(self, "_" + name if name == "metrics" else name, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+        self._finalizer = weakref.finalize(self, SharedReplicates._free, self._blocks)
+
+    @property
+    def metrics(self):
+        return {key: self._metrics[:, i] for i, key in enumerate(self.metric_keys)}
+
+    def edge_list(self, run, initial=False):
+        ''' Valid (n_edges, 2) edge array of one run, a view on the shared buffer.'''
+        prefix = "initial_" if initial else ""
+        return getattr(self, prefix + "edges")[run, :getattr(self, prefix + "edge_counts")[run]]
+
+    def graph(self, run, initial=False):
+        """
+        Builds the networkx graph of one run.
+
+        Args:
+            run (int): index of the run.
+            initial (bool, optional): whether to build the initial graph instead of the final one. Default False.
+
+        Returns:
+            networkx.Graph: graph with 'opinion' node attributes.
+        """
+        opinions = self.initial_opinions[run] if initial else self.opinions[run]
+        g = nx.Graph()
+        g.add_nodes_from((node, {'opinion': opinion}) for node, opinion in enumerate(opinions.tolist()))
+        g.add_edges_from(self.edge_list(run, initial).tolist())
+        return g
+
+    def graphs(self, initial=False):
+        ''' Generator over the networkx graphs of all runs, built when they are needed.'''
+        return (self.graph(run, initial) for run in range(self.n_runs))
+
+    def to_snapshot(self, file_path, initial=False, params=None, compress=False):
+        """
+        Writes all runs to a snapshot file straight from the buffers, see opynions.core.snapshot.
+
+        Args:
+            file_path (str): Path of the snapshot file.
+            initial (bool, optional): whether to write the initial graphs instead of the final ones. Default False.
+            params, compress (optional): see opynions.core.snapshot.write_snapshot_arrays().
+        """
+        opinions = self.initial_opinions if initial else self.opinions
+        write_snapshot_arrays(file_path, list(opinions), [self.edge_list(run, initial) for run in range(self.n_runs)],
+                              params, compress)
+
+    @staticmethod
+    def _free(blocks):
+        for shm in blocks:
+            try:
+                shm.close()
+            except BufferError:
+                pass # views on the buffer are still alive, the memory is released with them
+            shm.unlink()
+
+    def close(self):
+        ''' Releases the shared memory, the arrays can not be used anymore afterwards.'''
+        for name in list(self.spec):
+            self.__dict__.pop("_" + name if name == "metrics" else name, None)
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def run_replicates(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2, n_workers=None,
+                   analyze=None, metric_keys=(), pool=None):
+    """
+    Simulates n_runs replicates of one parameter point in parallel. Workers write into shared
+    memory, so no networkx graphs are pickled back. Inside a daemonic worker (e.g. a task of a sweep),
+    where no child processes can be started, the replicates are run one after the other
+    into the same buffers.
+
+    Args:
+        n_runs (int): number of replicates.
+        n_nodes (int): number of nodes.
+        time_steps (int): number of time steps.
+        epsilon (float): threshold for opinion distance, bounds [0,1].
+        mu (float): parameter for adjusting opinions, bounds [0,1].
+        m_ba (int, optional): affects graph generation, see networkx.barabasi_albert_graph(). Default 2.
+        n_workers (int, optional): number of processes. Default min(cpu_count, n_runs).
+        analyze (callable, optional): module level function computing a dict of metrics of a final
+                                      graph in the worker, e.g. opynions.analysis.combined.analyze_graph.
+        metric_keys (list, optional): keys of analyze's dict to store.
+        pool (multiprocessing.Pool, optional): pool to use instead of the package's shared pool,
+                                               see opynions.core.pool.get_pool().
+
+    Returns:
+        SharedReplicates: the results, close() it when done.
+    """
+    assert n_runs >= 1, f"n_runs has to be at least 1: {n_runs}"
+    # rewiring removes an edge for every edge it adds, so there are never more edges than initially
+    max_edges = m_ba * (n_nodes - m_ba)
+    results = SharedReplicates(n_runs, n_nodes, max_edges, metric_keys if analyze is not None else ())
+    tasks = [(results.spec, run, n_nodes, time_steps, epsilon, mu, m_ba, analyze, results.metric_keys)
+             for run in range(n_runs)]
+
+    if n_workers is None:
+        n_workers = min(mp.cpu_count(), n_runs)
+    try:
+        if pool is None and (mp.current_process().daemon or n_workers <= 1):
+            for task in tasks:
+                _replicate_worker(task)
+        else:
+            (pool or get_pool(n_workers)).map(_replicate_worker, tasks)
+    except BaseException:
+        results.close()
+        raise
+    return results
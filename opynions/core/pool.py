@@ -0,0 +1,71 @@
+''' Long-lived worker pool shared by all parallel entry points of the package.
+It is created on first use, its workers import the heavy modules once, and it is
+reused by every following sweep until shutdown_pool() or interpreter exit. '''
+
+import atexit
+import importlib
+import multiprocessing as mp
+
+# modules every worker imports once when it starts, instead of on its first task
+PRELOAD_MODULES = ("numpy", "networkx", "networkx.algorithms.community", "opynions.core.simulation",
+                   "opynions.analysis.combined", "opynions.analysis.multiprocessing")
+
+_pool = None
+_pool_size = 0
+
+def _initializer():
+    ''' Runs once in every worker: imports the heavy modules and warms up a tiny simulation.'''
+    for name in PRELOAD_MODULES:
+        importlib.import_module(name)
+    from opynions.core.simulation import run_sim
+    run_sim(10, 2, 0.2, 0.1)
+
+def get_pool(n_workers=None, grow=True):
+    """
+    Returns the package's worker pool, creating it on first use. The pool is kept when it has at
+    least n_workers processes, otherwise it is replaced by a bigger one. Replacing it waits for the
+    tasks already running on it, and sweeps still handing tasks to the old pool fail, so callers
+    that may run next to other sweeps (e.g. from an event loop) pass grow=False. Workers are forked when
+    the pool is created, so later changes to module state in the parent are not seen by them;
+    call shutdown_pool() to start over.
+
+    Args:
+        n_workers (int, optional): minimum number of processes. Default one per CPU.
+        grow (bool, optional): replace a smaller pool. If False an existing pool is returned
+                               whatever its size. Default True.
+
+    Returns:
+        multiprocessing.pool.Pool: the shared pool, do not close or terminate it yourself.
+    """
+    global _pool, _pool_size
+    assert not mp.current_process().daemon, "Daemonic worker processes can not start a pool"
+    if n_workers is None:
+        n_workers = mp.cpu_count()
+    if grow and _pool is not None and _pool_size < n_workers:
+        shutdown_pool()
+    if _pool is None:
+        _pool = mp.Pool(n_workers, initializer=_initializer)
+        _pool_size = n_workers
+    return _pool
+
+def shutdown_pool(wait=True):
+    """
+    Shuts the shared pool down, a new one is created by the next get_pool().
+
+    Args:
+        wait (bool, optional): let the workers finish their current tasks, otherwise they are
+                               terminated, killing the tasks of every sweep
+                               still using the pool. Default True.
+    """
+    global _pool, _pool_size
+    if _pool is None:
+        return
+    pool, _pool, _pool_size = _pool, None, 0
+    if wait:
+        pool.close()
+    else:
+        pool.terminate()
+    pool.join()
+
+# at exit nobody waits for results any more, e.g. of a sweep interrupted with Ctrl+C
+atexit.register(shutdown_pool, wait=False)
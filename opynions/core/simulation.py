@@ -1,9 +1,9 @@
 ''' Core model functions.
 Refer to the paper for more details on the model: https://www.nature.com/articles/srep40391'''
 
+import functools
 import random
 import networkx as nx
-import matplotlib.pyplot as plt
 
 def rho(x):
     '''Function used to guarantee periodic boundary conditions as per eq 1 in paper
@@ -67,7 +67,44 @@ def initialize_graph(N, m_ba=2):
     nx.set_node_attributes(g, opinions, 'opinion')
     return g
 
-def run_sim(N, T, epsilon, mu, m_ba=2):
+def simulation_step(g, epsilon, mu, on_rewire=None):
+    '''Performs one time step in place: every node, in random order, interacts with a random neighbor
+    and rewires to a random node if their opinions end up too far apart.
+
+    Args:
+        g (networkx.Graph): graph with 'opinion' node attributes
+        epsilon (float): threshold for opinion distance, bounds [0,1]
+        mu (float): parameter for adjusting opinions, bounds [0,1]
+        on_rewire (callable, optional): called as on_rewire(node, old_neighbor, new_neighbor) for every rewiring
+    '''
+    # For each node in a random order
+    nodes = list(g.nodes())
+    random.shuffle(nodes)
+    for node in nodes:
+        # if node has neighbors (might have been cut off by someone)
+        if list(g.neighbors(node)): 
+            # pick a random neighbor 
+            neighbor = random.choice(list(g.neighbors(node)))
+            i = g.nodes[node]['opinion']
+            j = g.nodes[neighbor]['opinion']
+
+            # adjust opinions (or not, handled by the adjustment function)
+            i_new, j_new = UCM_adjust_opinion(i, j, mu, epsilon)
+            g.nodes[node]['opinion'] = i_new
+            g.nodes[neighbor]['opinion'] = j_new
+
+            # rewire if opinions are too far apart
+            if abs(i_new - j_new) > epsilon:
+                new_neighbor = random.choice(list(g.nodes()))
+                # ensure new neighbor is not the same as the node itself.
+                while new_neighbor == node:
+                    new_neighbor = random.choice(list(g.nodes()))
+                g.remove_edge(node, neighbor)
+                g.add_edge(node, new_neighbor)
+                if on_rewire is not None:
+                    on_rewire(node, neighbor, new_neighbor)
+
+def run_sim(N, T, epsilon, mu, m_ba=2, trajectory=None, event_log=None):
     '''Runs simulation until T time steps and returns the final graph.
     
     Args:
@@ -76,6 +113,10 @@ def run_sim(N, T, epsilon, mu, m_ba=2):
         mu (float): parameter for adjusting opinions, bounds [0,1]
         epsilon (float): threshold for opinion distance, bounds [0,1]
         m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        trajectory (callable, optional): called as trajectory(t, g) with the initial graph (t=0) and after
+            every time step t=1..T, e.g. an opynions.core.trajectory.TrajectoryWriter. Default None.
+        event_log (opynions.core.events.EventLog, optional): records the rewirings and opinion checkpoints,
+            so that the state at any step can be replayed. Default None.
         
     Returns: 
         g (networkx.Graph): final graph
@@ -86,32 +127,21 @@ def run_sim(N, T, epsilon, mu, m_ba=2):
     assert 0 <= mu <= 1, f"mu out of bounds [0,1]: {mu}"
     assert 0 <= epsilon <= 1, f"epsilon out of bounds [0,1]: {epsilon}"
 
+    if event_log is not None:
+        event_log.begin(N, T, epsilon, mu, m_ba)
     g = initialize_graph(N, m_ba)
     g_init = g.copy()
+    if trajectory is not None:
+        trajectory(0, g)
+    if event_log is not None:
+        event_log.end_step(0, g)
     for t in range(T):
-        # For each node in a random order
-        nodes = list(g.nodes())
-        random.shuffle(nodes)
-        for node in nodes:
-            # if node has neighbors (might have been cut off by someone)
-            if list(g.neighbors(node)): 
-                # pick a random neighbor 
-                neighbor = random.choice(list(g.neighbors(node)))
-                i = g.nodes[node]['opinion']
-                j = g.nodes[neighbor]['opinion']
-
-                # adjust opinions (or not, handled by the adjustment function)
-                i_new, j_new = UCM_adjust_opinion(i, j, mu, epsilon)
-                g.nodes[node]['opinion'] = i_new
-                g.nodes[neighbor]['opinion'] = j_new
-
-                # rewire if opinions are too far apart
-                if abs(i_new - j_new) > epsilon:
-                    new_neighbor = random.choice(list(g.nodes()))
-                    # ensure new neighbor is not the same as the node itself.
-                    while new_neighbor == node:
-                        new_neighbor = random.choice(list(g.nodes()))
-                    g.remove_edge(node, neighbor)
-                    g.add_edge(node, new_neighbor)
+        on_rewire = None if event_log is None else functools.partial(event_log.rewire, t + 1)
+        simulation_step(g, epsilon, mu, on_rewire)
+
+        if trajectory is not None:
+            trajectory(t + 1, g)
+        if event_log is not None:
+            event_log.end_step(t + 1, g)
 
     return g, g_init
@@ -0,0 +1,159 @@
+''' Compact binary snapshots of simulated networks: float32 opinions and int32 edge arrays of any
+number of graphs in one file, behind a JSON header with the parameters. Uncompressed snapshots are
+memory-mapped on loading, so nothing is read until it is used; networkx graphs are built on request.
+
+Layout: 8 byte magic, uint64 header length, JSON header, then the arrays, each aligned to 64 bytes.
+The graphs are concatenated, node_offsets and edge_offsets give where every graph starts. '''
+
+import json
+import os
+import struct
+import zlib
+import numpy as np
+import networkx as nx
+
+MAGIC = b'OPYNSNP1'
+ALIGNMENT = 64
+
+def _aligned(position):
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+def write_snapshot_arrays(file_path, opinions, edges, params=None, compress=False):
+    """
+    Writes the states of several networks from arrays, without building networkx graphs.
+
+    Args:
+        file_path (str): Path of the snapshot file, replaced atomically if it exists.
+        opinions (list): opinion array of every graph, indexed by node 0..n-1.
+        edges (list): (n_edges, 2) node array of every graph.
+        params (dict, optional): JSON-serializable parameters stored in the header, e.g. those of run_sim.
+        compress (bool, optional): zlib-compress the arrays. Compressed snapshots are decompressed on
+                                   loading instead of memory-mapped. Default False.
+    """
+    assert len(opinions) == len(edges), "Give an edge array for every opinion array"
+    arrays = {
+        "node_offsets": np.cumsum([0] + [len(o) for o in opinions], dtype=np.int64),
+        "edge_offsets": np.cumsum([0] + [len(e) for e in edges], dtype=np.int64),
+        "opinions": np.concatenate([np.asarray(o, dtype=np.float32) for o in opinions] or
+                                   [np.empty(0, dtype=np.float32)]),
+        "edges": np.concatenate([np.asarray(e, dtype=np.int32).reshape(-1, 2) for e in edges] or
+                                [np.empty((0, 2), dtype=np.int32)]),
+    }
+    header = {"version": 1, "n_graphs": len(opinions), "params": params or {},
+              "compression": "zlib" if compress else None, "arrays": {}}
+    blobs = []
+    position = 0
+    for name, array in arrays.items():
+        blob = np.ascontiguousarray(array).tobytes()
+        if compress:
+            blob = zlib.compress(blob)
+        header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape),
+                                  "offset": position, "nbytes": len(blob)}
+        blobs.append((position, blob))
+        position = _aligned(position + len(blob))
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _aligned(len(MAGIC) + 8 + len(header_bytes))
+    temporary = f'{file_path}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(MAGIC + struct.pack('<Q', len(header_bytes)) + header_bytes)
+        for offset, blob in blobs:
+            file.seek(data_start + offset)
+            file.write(blob)
+        file.truncate(data_start + position)
+    os.replace(temporary, file_path)
+
+def write_snapshot(file_path, graphs, params=None, compress=False):
+    """
+    Writes networkx graphs with 'opinion' node attributes to a snapshot. Nodes are stored by
+    their position in g.nodes(), which for the graphs of run_sim is the node label.
+
+    Args:
+        file_path (str): Path of the snapshot file.
+        graphs (list): the graphs, e.g. the final graphs of get_graphs().
+        params, compress (optional): see write_snapshot_arrays().
+    """
+    opinions, edges = [], []
+    for g in graphs:
+        index = {node: i for i, node in enumerate(g.nodes())}
+        opinions.append(np.fromiter((g.nodes[node]['opinion'] for node in g.nodes()), dtype=np.float32,
+                                    count=g.number_of_nodes()))
+        edges.append(np.array([(index[u], index[v]) for u, v in g.edges()], dtype=np.int32).reshape(-1, 2))
+    write_snapshot_arrays(file_path, opinions, edges, params, compress)
+
+class Snapshot:
+    """
+    A loaded snapshot, see read_snapshot().
+
+    Attributes:
+        params (dict): parameters stored with the snapshot.
+        node_offsets, edge_offsets (numpy.ndarray): start of every graph in the concatenated arrays.
+        all_opinions (numpy.ndarray): float32 opinions of all graphs, concatenated.
+        all_edges (numpy.ndarray): int32 (n_edges, 2) edges of all graphs, concatenated.
+    """
+    def __init__(self, header, arrays):
+        self.params = header["params"]
+        self.compressed = header["compression"] is not None
+        self.node_offsets = arrays["node_offsets"]
+        self.edge_offsets = arrays["edge_offsets"]
+        self.all_opinions = arrays["opinions"]
+        self.all_edges = arrays["edges"]
+
+    def __len__(self):
+        return len(self.node_offsets) - 1
+
+    def opinions(self, index):
+        ''' Opinions of one graph, a view on the snapshot.'''
+        return self.all_opinions[self.node_offsets[index]:self.node_offsets[index + 1]]
+
+    def edges(self, index):
+        ''' Edges of one graph, a view on the snapshot.'''
+        return self.all_edges[self.edge_offsets[index]:self.edge_offsets[index + 1]]
+
+    def to_networkx(self, index):
+        """
+        Builds the networkx graph of one snapshot entry.
+
+        Args:
+            index (int): index of the graph.
+
+        Returns:
+            networkx.Graph: graph with nodes 0..n-1 and float 'opinion' node attributes.
+        """
+        g = nx.Graph()
+        g.add_nodes_from((node, {'opinion': opinion}) for node, opinion in enumerate(self.opinions(index).tolist()))
+        g.add_edges_from(self.edges(index).tolist())
+        return g
+
+    def graphs(self):
+        ''' Generator over the networkx graphs of all entries, built when they are needed.'''
+        return (self.to_networkx(index) for index in range(len(self)))
+
+def read_snapshot(file_path):
+    """
+    Opens a snapshot. Arrays of uncompressed snapshots are memory-mapped read-only.
+
+    Args:
+        file_path (str): Path of the snapshot file.
+
+    Returns:
+        Snapshot: the loaded snapshot.
+    """
+    with open(file_path, 'rb') as file:
+        assert file.read(len(MAGIC)) == MAGIC, f"{file_path} is not a snapshot"
+        (header_length,) = struct.unpack('<Q', file.read(8))
+        header = json.loads(file.read(header_length).decode('utf-8'))
+        data_start = _aligned(len(MAGIC) + 8 + header_length)
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+            if header["compression"] == "zlib":
+                file.seek(data_start + spec["offset"])
+                arrays[name] = np.frombuffer(zlib.decompress(file.read(spec["nbytes"])), dtype=dtype).reshape(shape)
+            elif spec["nbytes"] == 0:
+                arrays[name] = np.empty(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(file_path, dtype=dtype, mode='r', offset=data_start + spec["offset"],
+                                         shape=shape)
+    return Snapshot(header, arrays)
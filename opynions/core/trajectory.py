@@ -0,0 +1,220 @@
+''' On-disk opinion trajectories: the opinions of every node every k time steps of run_sim, written
+while the simulation runs and read back by (run, step range, node range) without loading the rest.
+
+A trajectory store is a directory with a meta.json (number of nodes, recording interval, chunk shape,
+dtype, compression) and one directory per run. The opinions of a run form a (records, nodes) array,
+cut into chunks of steps_per_chunk records and nodes_per_chunk nodes, each chunk in its own file:
+.npy files are memory-mapped on reading, compressed chunks are byte-shuffled and zlib-compressed.
+Opinions are stored as float32, or as uint16 (opinion * 65535, rounded) when quantized. '''
+
+import functools
+import json
+import os
+import shutil
+import zlib
+import numpy as np
+
+QUANTIZATION = 65535
+
+def _write_json(file_path, data):
+    temporary = f'{file_path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(data, file)
+    os.replace(temporary, file_path)
+
+def _read_json(file_path):
+    with open(file_path, encoding='utf-8') as file:
+        return json.load(file)
+
+def _run_dir(path, run):
+    return os.path.join(path, f'{run:05d}')
+
+def _chunk_path(path, run, step_chunk, node_chunk, compressed):
+    extension = 'zlib' if compressed else 'npy'
+    return os.path.join(_run_dir(path, run), f's{step_chunk:05d}_n{node_chunk:05d}.{extension}')
+
+def create_trajectory_store(path, n_nodes, every=1, quantize=False, compress=True, steps_per_chunk=16,
+                            nodes_per_chunk=16384, params=None):
+    """
+    Creates an empty trajectory store, replacing an existing one at path.
+
+    Args:
+        path (str): directory of the store.
+        n_nodes (int): number of nodes of the simulated graphs.
+        every (int, optional): record the opinions every this many time steps. Default 1.
+        quantize (bool, optional): store opinions as uint16 instead of float32, resolution 1.5e-5. Default False.
+        compress (bool, optional): zlib-compress the chunks. Uncompressed chunks are memory-mapped
+                                   on reading, compressed ones are decompressed. Default True.
+        steps_per_chunk (int, optional): records per chunk, also the number of records a writer
+                                         keeps in memory. Default 16.
+        nodes_per_chunk (int, optional): nodes per chunk. Default 16384.
+        params (dict, optional): JSON-serializable parameters stored with the store, e.g. those of run_sim.
+    """
+    assert every >= 1 and steps_per_chunk >= 1 and nodes_per_chunk >= 1, "Chunk sizes and every must be positive"
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    _write_json(os.path.join(path, 'meta.json'), {
+        "version": 1, "n_nodes": n_nodes, "every": every, "dtype": "uint16" if quantize else "float32",
+        "compression": "zlib" if compress else None, "steps_per_chunk": steps_per_chunk,
+        "nodes_per_chunk": nodes_per_chunk, "params": params or {}})
+
+class TrajectoryWriter:
+    """
+    Records the opinions of one run into a trajectory store. Pass it to run_sim() as the trajectory
+    argument; it is called after every time step and keeps every k-th. Only one chunk of records is
+    held in memory. Use it as a context manager, or call close(), to write the last partial chunk:
+
+        with TrajectoryWriter('trajectories', run=0) as writer:
+            run_sim(N, T, epsilon, mu, trajectory=writer)
+
+    Writers of different runs can write to the same store at the same time, e.g. from worker processes.
+    """
+    def __init__(self, path, run=0):
+        self.path = path
+        self.run = run
+        self.meta = _read_json(os.path.join(path, 'meta.json'))
+        self.every = self.meta["every"]
+        self.buffer = np.empty((self.meta["steps_per_chunk"], self.meta["n_nodes"]), dtype=self.meta["dtype"])
+        self.filled = 0
+        self.steps = []
+        if os.path.isdir(_run_dir(path, run)):
+            shutil.rmtree(_run_dir(path, run))
+        os.makedirs(_run_dir(path, run))
+
+    def __call__(self, step, g):
+        ''' Records the opinions of g if step is a multiple of every. Nodes must be 0..n_nodes-1.'''
+        if step % self.every == 0:
+            self.append(step, np.fromiter((opinion for _, opinion in g.nodes(data='opinion')), dtype=float,
+                                          count=g.number_of_nodes()))
+
+    def append(self, step, opinions):
+        """
+        Records an opinion array, whatever the step.
+
+        Args:
+            step (int): time step of the opinions.
+            opinions (numpy.ndarray): opinions of nodes 0..n_nodes-1.
+        """
+        assert len(opinions) == self.meta["n_nodes"], \
+            f"Expected {self.meta['n_nodes']} opinions, got {len(opinions)}"
+        if self.meta["dtype"] == "uint16":
+            np.rint(np.asarray(opinions) * QUANTIZATION, out=self.buffer[self.filled], casting='unsafe')
+        else:
+            self.buffer[self.filled] = opinions
+        self.filled += 1
+        self.steps.append(int(step))
+        if self.filled == len(self.buffer):
+            self.flush()
+            self.filled = 0
+
+    def flush(self):
+        ''' Writes the records of the current chunk, a partial chunk is rewritten when it fills up.'''
+        step_chunk = (len(self.steps) - 1) // len(self.buffer)
+        nodes_per_chunk = self.meta["nodes_per_chunk"]
+        compressed = self.meta["compression"] == "zlib"
+        for node_chunk, start in enumerate(range(0, self.meta["n_nodes"], nodes_per_chunk)):
+            block = np.ascontiguousarray(self.buffer[:self.filled, start:start + nodes_per_chunk])
+            file_path = _chunk_path(self.path, self.run, step_chunk, node_chunk, compressed)
+            if compressed:
+                # bytes of equal significance next to each other compress much better
+                shuffled = block.view(np.uint8).reshape(-1, block.itemsize).T.tobytes()
+                with open(file_path, 'wb') as file:
+                    file.write(zlib.compress(shuffled, 1))
+            else:
+                np.save(file_path, block)
+        _write_json(os.path.join(_run_dir(self.path, self.run), 'meta.json'), {"steps": self.steps})
+
+    def close(self):
+        ''' Writes the remaining records.'''
+        if self.filled:
+            self.flush()
+            self.filled = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class Trajectory:
+    """
+    A trajectory store opened for reading, see read_trajectory().
+
+    Attributes:
+        params (dict): parameters stored with the store.
+        n_nodes (int): number of nodes.
+        every (int): recording interval in time steps.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.meta = _read_json(os.path.join(path, 'meta.json'))
+        self.params = self.meta["params"]
+        self.n_nodes = self.meta["n_nodes"]
+        self.every = self.meta["every"]
+        self._chunk = functools.lru_cache(maxsize=64)(self._read_chunk)
+
+    @property
+    def runs(self):
+        ''' Runs that have records.'''
+        return sorted(int(name) for name in os.listdir(self.path)
+                      if os.path.isfile(os.path.join(self.path, name, 'meta.json')))
+
+    def steps(self, run):
+        ''' Time steps recorded for a run.'''
+        return np.array(_read_json(os.path.join(_run_dir(self.path, run), 'meta.json'))["steps"], dtype=int)
+
+    def _read_chunk(self, run, step_chunk, node_chunk):
+        start = node_chunk * self.meta["nodes_per_chunk"]
+        width = min(self.meta["nodes_per_chunk"], self.n_nodes - start)
+        if self.meta["compression"] is None:
+            return np.load(_chunk_path(self.path, run, step_chunk, node_chunk, False), mmap_mode='r')
+        with open(_chunk_path(self.path, run, step_chunk, node_chunk, True), 'rb') as file:
+            shuffled = np.frombuffer(zlib.decompress(file.read()), dtype=np.uint8)
+        dtype = np.dtype(self.meta["dtype"])
+        return shuffled.reshape(dtype.itemsize, -1).T.copy().view(dtype).reshape(-1, width)
+
+    def read(self, run, steps=slice(None), nodes=slice(None)):
+        """
+        Reads the opinions of a range of time steps and nodes, touching only the chunks they are in.
+
+        Args:
+            run (int): the run.
+            steps (slice, optional): range of time steps, records with start <= step < stop. Default all.
+            nodes (slice, optional): range of nodes. Default all.
+
+        Returns:
+            tuple: (steps, opinions) with the recorded time steps in the range and a
+                   float32 (len(steps), n_nodes in the range) array of opinions.
+        """
+        recorded = self.steps(run)
+        first = np.searchsorted(recorded, steps.start) if steps.start is not None else 0
+        last = np.searchsorted(recorded, steps.stop) if steps.stop is not None else len(recorded)
+        node_start, node_stop, _ = nodes.indices(self.n_nodes)
+        node_stop = max(node_start, node_stop)
+        out = np.empty((max(0, last - first), node_stop - node_start), dtype=np.float32)
+
+        steps_per_chunk, nodes_per_chunk = self.meta["steps_per_chunk"], self.meta["nodes_per_chunk"]
+        for step_chunk in range(first // steps_per_chunk, -(-last // steps_per_chunk)):
+            row_start = max(first, step_chunk * steps_per_chunk)
+            row_stop = min(last, (step_chunk + 1) * steps_per_chunk)
+            for node_chunk in range(node_start // nodes_per_chunk, -(-node_stop // nodes_per_chunk)):
+                column_start = max(node_start, node_chunk * nodes_per_chunk)
+                column_stop = min(node_stop, (node_chunk + 1) * nodes_per_chunk)
+                block = self._chunk(run, step_chunk, node_chunk)
+                out[row_start - first:row_stop - first, column_start - node_start:column_stop - node_start] = \
+                    block[row_start - step_chunk * steps_per_chunk:row_stop - step_chunk * steps_per_chunk,
+                          column_start - node_chunk * nodes_per_chunk:column_stop - node_chunk * nodes_per_chunk]
+        if self.meta["dtype"] == "uint16":
+            out /= QUANTIZATION
+        return recorded[first:last], out
+
+    def opinions(self, run, step, nodes=slice(None)):
+        ''' Opinions of a range of nodes at one recorded time step.'''
+        recorded, opinions = self.read(run, slice(step, step + 1), nodes)
+        assert len(recorded), f"Step {step} of run {run} was not recorded"
+        return opinions[0]
+
+def read_trajectory(path):
+    ''' Opens a trajectory store for reading, see Trajectory.'''
+    return Trajectory(path)
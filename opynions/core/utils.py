@@ -3,8 +3,9 @@
 import networkx as nx
 import numpy as np
 from opynions.core.simulation import run_sim
+from opynions.core.parallel import run_replicates
 
-def get_graphs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2):
+def get_graphs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2, parallel=False, n_workers=None):
     '''Simulates N_Runs networks and returns the final and initial graphs
     
     Args:
@@ -14,11 +15,17 @@ def get_graphs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2):
         epsilon: (float bounds: [0,1]) threshold for opinion distance 
         mu: (float bounds: [0,1]) parameter for adjusting opinions
         m_ba (int): affects graph generation, see networkx.barabasi_albert_graph
+        parallel (bool): run the replicates in parallel, see opynions.core.parallel.run_replicates()
+        n_workers (int): number of processes if parallel, default one per CPU
     Returns:
         tuple containing:
             all_final_graphs: list of final graphs, length n_runs
             all_initial_graphs: list of initial graphs, length n_runs
     '''
+    if parallel:
+        with run_replicates(n_runs, n_nodes, time_steps, epsilon, mu, m_ba, n_workers) as replicates:
+            return list(replicates.graphs()), list(replicates.graphs(initial=True))
+
     all_final_graphs = []
     all_initial_graphs = []
     for _ in range(n_runs):
@@ -28,7 +35,8 @@ def get_graphs(n_runs, n_nodes, time_steps, epsilon, mu, m_ba=2):
 
     return all_final_graphs, all_initial_graphs
 
-def get_opinion_hist(n_runs, n_nodes, time_steps, epsilon, mu, exclude_loners=False, m_ba=2):
+def get_opinion_hist(n_runs, n_nodes, time_steps, epsilon, mu, exclude_loners=False, m_ba=2,
+                     parallel=False, n_workers=None):
     '''Simulates N_Runs networks and returns an array of arrays of opinions
     and the average distribution histogram
     
@@ -39,6 +47,9 @@ def get_opinion_hist(n_runs, n_nodes, time_steps, epsilon, mu, exclude_loners=Fa
         epsilon: (float bounds: [0,1]) threshold for opinion distance 
         mu: (float bounds: [0,1]) parameter for adjusting opinions
         m_ba (int): affects graph generation, see networkx.barabasi_albert_graph()
+        parallel (bool): run the replicates in parallel, see opynions.core.parallel.run_replicates().
+            The opinions are then read from the shared buffers without building graphs.
+        n_workers (int): number of processes if parallel, default one per CPU
     Returns:
         triple containing:
             all_opinions: array of arrays of opinions, shape (n_runs, n_nodes)
@@ -62,6 +73,18 @@ def get_opinion_hist(n_runs, n_nodes, time_steps, epsilon, mu, exclude_loners=Fa
     all_histograms = []
     all_opinions = []
     all_isolated = []
+    if parallel:
+        with run_replicates(n_runs, n_nodes, time_steps, epsilon, mu, m_ba, n_workers) as replicates:
+            for run in range(n_runs):
+                degrees = np.bincount(replicates.edge_list(run).ravel(), minlength=n_nodes)
+                all_isolated.append(np.count_nonzero(degrees == 0))
+                opinions = replicates.opinions[run]
+                opinions = opinions[degrees > 0] if exclude_loners else opinions.copy()
+                all_opinions.append(opinions)
+                hist, _ = np.histogram(opinions, bins=100, range=(0, 1))
+                all_histograms.append(hist)
+        return all_opinions, np.mean(all_histograms, axis=0), np.mean(all_isolated)
+
     for _ in range(n_runs):
         # Run the simulation. Extract and store opinions
         g, _ = run_sim(n_nodes, time_steps, epsilon, mu, m_ba)
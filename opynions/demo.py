@@ -1,13 +1,20 @@
 '''Functions for demonstrating the package.'''
 
+import itertools
 import os
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
+from opynions.analysis.cube import ResultsCube, cube_results
 from opynions.analysis.multiprocessing import multiprocess_all
-from opynions.analysis.utils import list_of_dicts_to_csv, plot_subplots_from_csv, create_heatmap_from_csv
+from opynions.analysis.storage import remove_table, save_table
+from opynions.analysis.utils import plot_average_histograms, plot_subplots_from_csv, plot_heatmaps
 
-def slice_plots(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, keep_csv=False):
+def _grid_cells(epsilon, mu, n_nodes, time_steps, m_ba):
+    ''' Parameter points of the epsilon x mu grid, in the order of multiprocess_all().'''
+    return [{'epsilon': e, 'mu': m, 'n_nodes': n_nodes, 'time_steps': time_steps, 'm_ba': m_ba}
+            for e, m in itertools.product(epsilon, mu)]
+
+def slice_plots(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, keep_csv=False, confidence=None,
+                surrogate=None, cube=None):
     """
     Generates and saves slice plots by varying either epsilon or mu parameter.
     
@@ -19,7 +26,15 @@ def slice_plots(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, keep_csv=False):
         n_nodes (int): Number of nodes in the network.
         time_steps (int): Number of time steps for the simulation.
         m_ba (int): Parameter for the Barabási–Albert model. See networkx.barabasi_albert_graph()
-        keep_csv (bool, optional): If True, the generated CSV file will be kept. Defaults to False.
+        keep_csv (bool, optional): If True, the generated results store '<varied parameter>_slice' will be kept.
+            Defaults to False.
+        confidence (float, optional): If given, confidence bands at this level are drawn. Defaults to None.
+        surrogate (Surrogate, optional): Fast preview mode: a fitted opynions.analysis.surrogate.Surrogate
+            is queried instead of simulating, bands show its prediction intervals. It has to know n_nodes,
+            time_steps and m_ba, e.g. Surrogate().fit(results, n_nodes=..., time_steps=..., m_ba=...).
+            Defaults to None.
+        cube (str, optional): Path of a results cube (see opynions.analysis.cube). The slice is read from it,
+            only points with fewer than n_runs stored runs are simulated and added. Defaults to None.
     
     Raises:
         AssertionError: If neither epsilon nor mu is a single float.
@@ -31,6 +46,7 @@ def slice_plots(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, keep_csv=False):
     Returns:
         None
     """
+    import matplotlib.pyplot as plt
 
     assert isinstance(epsilon, float) or isinstance(mu, float), "Either epsilon or mu must be a single float"
     assert not (isinstance(epsilon, float) and isinstance(mu, float)), "Both epsilon and mu cannot be single floats, one must be an array"
@@ -47,22 +63,36 @@ def slice_plots(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, keep_csv=False):
     assert all(0 <= val <= 1 for val in mu), "All mu values must be between 0 and 1"
     
     
-    list_of_dicts = multiprocess_all(epsilon_values=epsilon, mu_values=mu,
-                                      n_runs=n_runs, n_nodes=n_nodes, time_steps=time_steps, m_ba=m_ba)
+    if surrogate is not None:
+        list_of_dicts = surrogate.predict_grid(mu, epsilon, confidence=confidence or 0.95,
+                                               n_nodes=n_nodes, time_steps=time_steps, m_ba=m_ba)
+    elif cube is not None:
+        list_of_dicts = cube_results(cube, _grid_cells(epsilon, mu, n_nodes, time_steps, m_ba), n_runs,
+                                     confidence=confidence)
+    else:
+        list_of_dicts = multiprocess_all(epsilon_values=epsilon, mu_values=mu,
+                                          n_runs=n_runs, n_nodes=n_nodes, time_steps=time_steps, m_ba=m_ba,
+                                          confidence=confidence)
 
-    list_of_dicts_to_csv(list_of_dicts, f'{varied_parameter}_slice.csv')
+    save_table(list_of_dicts, f'{varied_parameter}_slice', {'n_runs': n_runs, 'n_nodes': n_nodes,
+                                                            'time_steps': time_steps, 'm_ba': m_ba})
 
-    plot_subplots_from_csv(f'{varied_parameter}_slice.csv', varied_parameter)
+    plot_subplots_from_csv(f'{varied_parameter}_slice', varied_parameter)
     
     if not keep_csv:
-        os.remove(f'{varied_parameter}_slice.csv')
+        remove_table(f'{varied_parameter}_slice')
     plt.show()
     pass
 
-def create_heatmaps(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, file_path = 'heatmap.csv', keep_csv=True):
+def create_heatmaps(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, file_path = 'heatmap', keep_csv=True,
+                    confidence=None, surrogate=None, cube=None):
     """
-    Generates heatmaps based on the provided parameters and saves the data for them to a CSV file.
-    If the CSV file already exists, it wont regenerate the data (wasting time), and just plot the heatmaps.
+    Generates heatmaps based on the provided parameters and saves the data for them to a results store
+    (see opynions.analysis.storage), or a CSV file if file_path ends with '.csv'.
+    If the data already exists, it wont regenerate the data (wasting time), and just plot the heatmaps.
+    While the sweep runs, every finished run is logged to '<file_path>.runs.jsonl'. If the sweep is
+    interrupted, calling this function again with the same arguments only simulates the missing runs.
+    The log is removed once the data is written.
     
     Parameters:
         epsilon (list): A list of epsilon values, each between 0 and 1.
@@ -71,30 +101,87 @@ def create_heatmaps(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, file_path =
         n_nodes (int): The number of nodes in the network.
         time_steps (int): The number of time steps for the simulation.
         m_ba (int): The parameter for the Barabási–Albert model.
-        file_path (str, optional): The path to the CSV file where the heatmap data will be saved. Defaults to 'heatmap.csv'.
-        keep_csv (bool, optional): Whether to keep the CSV file after creating the heatmap. Defaults to True.
+        file_path (str, optional): The path where the heatmap data will be saved. Defaults to 'heatmap'.
+        keep_csv (bool, optional): Whether to keep the data after creating the heatmap. Defaults to True.
+        confidence (float, optional): If given, heatmaps of the confidence interval bounds are plotted as well.
+        surrogate (Surrogate, optional): Fast preview mode: a fitted opynions.analysis.surrogate.Surrogate
+            is queried on the grid instead of simulating, at any resolution; fitted with n_nodes, time_steps
+            and m_ba as for slice_plots(). The data is written to
+            '<file_path>.preview' and file_path is left alone. Defaults to None.
+        cube (str, optional): Path of a results cube (see opynions.analysis.cube). The grid is read from it,
+            only points with fewer than n_runs stored runs are simulated and added, and the data is
+            written to file_path. Defaults to None.
     Raises:
         AssertionError: If epsilon or mu are not lists, or if their values are not between 0 and 1.
     Returns:
         None
     """
+    import matplotlib.pyplot as plt
     
     assert isinstance(epsilon, (list, np.ndarray)) and isinstance(mu, (list, np.ndarray)), "Both epsilon and mu must be lists or numpy arrays"
     assert all(0 <= val <= 1 for val in epsilon), "All epsilon values must be between 0 and 1"
     assert all(0 <= val <= 1 for val in mu), "All mu values must be between 0 and 1"
     
-    if not os.path.exists(file_path):
+    params = {'n_runs': n_runs, 'n_nodes': n_nodes, 'time_steps': time_steps, 'm_ba': m_ba}
+    data = file_path
+    if surrogate is not None:
+        file_path = f'{file_path}.preview.csv' if file_path.endswith('.csv') else f'{file_path}.preview'
+        list_of_dicts = surrogate.predict_grid(mu, epsilon, confidence=confidence or 0.95,
+                                               n_nodes=n_nodes, time_steps=time_steps, m_ba=m_ba)
+        save_table(list_of_dicts, file_path, params)
+        data = list_of_dicts
+    elif cube is not None:
+        list_of_dicts = cube_results(cube, _grid_cells(epsilon, mu, n_nodes, time_steps, m_ba), n_runs,
+                                     confidence=confidence)
+        save_table(list_of_dicts, file_path, params)
+        data = list_of_dicts
+    elif not os.path.exists(file_path):
+        results_log = f'{file_path}.runs.jsonl'
         list_of_dicts = multiprocess_all(epsilon_values=epsilon, mu_values=mu,
-                                          n_runs=n_runs, n_nodes=n_nodes, time_steps=time_steps, m_ba=m_ba)
-        list_of_dicts_to_csv(list_of_dicts, file_path)
+                                          n_runs=n_runs, n_nodes=n_nodes, time_steps=time_steps, m_ba=m_ba,
+                                          confidence=confidence, results_log=results_log)
+        save_table(list_of_dicts, file_path, params)
+        os.remove(results_log)
+        data = list_of_dicts
  
-    df = pd.read_csv(file_path)
-    for column in df.columns:
-        if column not in ['mu', 'epsilon']:
-            create_heatmap_from_csv(file_path, column, 'mu', 'epsilon')
+    # the results are pivoted once and every metric is rendered from that array
+    plot_heatmaps(data, x_coord_column='mu', y_coord_column='epsilon')
             
     if not keep_csv:
-        os.remove(file_path)
+        remove_table(file_path)
         
     plt.show()
-    pass
\ No newline at end of file
+    pass
+
+def distribution_plots(epsilon, mu, n_runs, n_nodes, time_steps, m_ba, cube='results_cube', save_file=False,
+                       file_path='opinion_distributions.png'):
+    """
+    Plots the average opinion histogram of every (epsilon, mu) combination, read from a results cube.
+    Only points with fewer than n_runs stored runs are simulated.
+
+    Parameters:
+        epsilon (list): epsilon values, each between 0 and 1.
+        mu (list): mu values, each between 0 and 1.
+        n_runs (int): The number of runs per point.
+        n_nodes (int): The number of nodes in the network.
+        time_steps (int): The number of time steps for the simulation.
+        m_ba (int): The parameter for the Barabási–Albert model.
+        cube (str, optional): Path of the results cube, see opynions.analysis.cube. Defaults to 'results_cube'.
+        save_file (bool, optional): Whether to save the figure. Defaults to False.
+        file_path (str, optional): Path of the saved figure. Defaults to 'opinion_distributions.png'.
+    Returns:
+        None
+    """
+    import matplotlib.pyplot as plt
+
+    epsilon, mu = np.atleast_1d(epsilon), np.atleast_1d(mu)
+    assert all(0 <= val <= 1 for val in epsilon), "All epsilon values must be between 0 and 1"
+    assert all(0 <= val <= 1 for val in mu), "All mu values must be between 0 and 1"
+
+    cells = _grid_cells(epsilon, mu, n_nodes, time_steps, m_ba)
+    cube_results(cube, cells, n_runs)
+    results_cube = ResultsCube(cube)
+    histograms = [results_cube.histogram(**cell) for cell in cells]
+    titles = [f"$\\epsilon$={cell['epsilon']:g}, $\\mu$={cell['mu']:g}" for cell in cells]
+    plot_average_histograms(histograms, titles, save_file=save_file, file_path=file_path)
+    plt.show()
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from opynions.analysis.asynchronous import iter_sweep, sweep
+from opynions.core.pool import get_pool, shutdown_pool
+
+
+def test_sweep_matches_grid_order():
+    """The awaited sweep returns one result per grid point, in multiprocess_all order."""
+    arrived = []
+    results = asyncio.run(sweep([0.2, 0.4], [0.1, 0.3], 2, 15, 3, 2, on_result=arrived.append,
+                                metrics=("variance",)))
+    assert [(r['epsilon'], r['mu']) for r in results] == [(0.2, 0.1), (0.2, 0.3), (0.4, 0.1), (0.4, 0.3)]
+    assert len(arrived) == 4
+    assert all(r['variance'] >= 0 for r in results)
+
+
+def test_iter_sweep_streams_and_stops():
+    """Results stream in per point, and breaking off drops the remaining tasks."""
+    async def first_two():
+        received = []
+        async for results_dict in iter_sweep([(0.2, 0.1), (0.3, 0.1), (0.4, 0.1), (0.5, 0.1)], 1, 15, 3, 2,
+                                             metrics=("variance",), confidence=0.9, max_in_flight=1):
+            received.append(results_dict)
+            if len(received) == 2:
+                break
+        return received
+
+    received = asyncio.run(first_two())
+    assert len(received) == 2
+    assert "variance_ci_low" in received[0]
+
+
+def test_sweep_can_be_cancelled():
+    """Cancelling the awaiting task raises CancelledError and leaves the pool usable."""
+    async def cancel():
+        task = asyncio.create_task(sweep([0.1, 0.2, 0.3], [0.1, 0.2], 1, 15, 3, 2, max_in_flight=1))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await sweep([0.2], [0.1], 1, 15, 3, 2, metrics=("variance",))
+
+    assert len(asyncio.run(cancel())) == 1
+
+
+def test_sweep_with_duplicate_grid_values():
+    """Repeated grid values each get their own result."""
+    results = asyncio.run(sweep([0.2, 0.2], [0.1], 1, 15, 3, 2, metrics=("variance",)))
+    assert len(results) == 2 and all(r is not None for r in results)
+
+
+def test_iter_sweep_keeps_a_smaller_pool():
+    """The event loop runs on the existing pool instead of replacing it with a bigger one."""
+    shutdown_pool()
+    pool = get_pool(1)
+
+    async def collect():
+        return [r async for r in iter_sweep([(0.2, 0.1)], 1, 15, 3, 2, metrics=("variance",))]
+
+    assert len(asyncio.run(collect())) == 1
+    assert get_pool(1) is pool
+    shutdown_pool()
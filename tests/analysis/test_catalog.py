@@ -0,0 +1,63 @@
+import os
+import random
+import numpy as np
+from opynions.analysis.catalog import RunCatalog
+from opynions.analysis.combined import analyze_graph
+from opynions.core.simulation import run_sim
+from opynions.analysis.multiprocessing import multiprocess_all
+from opynions.analysis.results_log import ResultsLog, cell_key
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+
+
+def test_query_by_parameter_ranges(tmp_path):
+    """Equality on floats, closed and open ranges select the right entries."""
+    with RunCatalog(str(tmp_path / "runs.sqlite")) as catalog:
+        for n_nodes in (200, 2000, 20000):
+            for epsilon in np.arange(0.0, 0.35, 0.05):
+                catalog.register_run({"epsilon": epsilon, "mu": 0.25, "n_nodes": n_nodes, "time_steps": 100,
+                                      "m_ba": 2}, {"variance": epsilon}, seed=int(n_nodes * epsilon))
+        catalog.register_run({"epsilon": 0.15, "mu": 0.3, "n_nodes": 2000}, {"variance": 1.0})
+
+        found = catalog.query(n_nodes=(2000, None), mu=0.25, epsilon=(0.1, 0.2))
+        assert len(found) == 6
+        assert set(found["n_nodes"]) == {2000, 20000}
+        assert np.allclose(sorted(set(found["epsilon"])), [0.1, 0.15, 0.2])
+        assert np.allclose(found["variance"], found["epsilon"])
+        assert (found["engine"] == "networkx").all() and found["code_version"].notna().all()
+
+        catalog.remove(found["id"])
+        assert len(catalog.query(n_nodes=(2000, None), mu=0.25)) == 8
+
+
+def test_sweep_registers_runs_and_cells(tmp_path):
+    """multiprocess_all registers every run and every parameter point."""
+    db_path = str(tmp_path / "runs.sqlite")
+    multiprocess_all([0.1, 0.3], [0.2], 2, 20, 5, 2, catalog=db_path)
+    with RunCatalog(db_path) as catalog:
+        runs = catalog.query(kind="run")
+        cells = catalog.query(kind="cell", epsilon=0.3, metrics=["variance"])
+    assert len(runs) == 4 and "similarity" in runs
+    assert runs["seed"].notna().all()
+
+    # every run can be reproduced from its catalog entry
+    run = runs.iloc[0]
+    random.seed(int(run["seed"]))
+    g, _ = run_sim(int(run["n_nodes"]), int(run["time_steps"]), run["epsilon"], run["mu"], int(run["m_ba"]))
+    assert analyze_graph(g, ("variance",))["variance"] == run["variance"]
+    assert len(cells) == 1 and cells["n_runs"].iloc[0] == 2 and cells["n_nodes"].iloc[0] == 20
+    assert list(cells.columns[-1:]) == ["variance"]
+
+
+def test_import_legacy_data_and_log(tmp_path):
+    """Legacy CSVs and results logs are imported with their source."""
+    log_path = str(tmp_path / "runs.jsonl")
+    with ResultsLog(log_path) as log:
+        log.append(cell_key(0.1, 0.2, 20, 5, 2), {"variance": 0.01})
+    with RunCatalog(str(tmp_path / "runs.sqlite")) as catalog:
+        assert len(catalog.import_results_log(log_path)) == 1
+        csv_path = os.path.join(DATA_DIR, "full_analysis_epsilon_mu36.csv")
+        ids = catalog.import_table(csv_path, {"n_nodes": 200})
+        found = catalog.query(source=csv_path, mu=0.36)
+        assert len(found) == len(ids) > 0 and (found["n_nodes"] == 200).all()
+        assert len(catalog.query(kind="run", n_nodes=20)) == 1
@@ -0,0 +1,73 @@
+import pytest
+import numpy as np
+import networkx as nx
+from opynions.analysis.combined import (
+    RUN_METRICS,
+    analyze_graph,
+    combined_analysis,
+    combined_analysis_runs,
+    summarize_runs,
+    is_precise
+)
+
+
+@pytest.fixture
+def simple_graph():
+    """Two connected pairs and one isolated node."""
+    G = nx.Graph()
+    for node, opinion in enumerate([0.1, 0.2, 0.8, 0.9, 0.5]):
+        G.add_node(node, opinion=opinion)
+    G.add_edge(0, 1)
+    G.add_edge(2, 3)
+    return G
+
+
+def test_analyze_graph(simple_graph):
+    """Test the per-run metrics of a single graph."""
+    results = analyze_graph(simple_graph)
+    assert results["num_isolates"] == 1
+    assert results["variance"] == pytest.approx(np.var([0.1, 0.2, 0.8, 0.9, 0.5]))
+    assert results["mean_opinion"] == pytest.approx(0.5)
+    assert results["similarity"] == pytest.approx(0.9)
+    assert results["num_communities"] == 2
+
+
+def test_summarize_runs_pools_variance():
+    """The summarized variance equals the variance over all opinions of all runs."""
+    opinions = [np.array([0.1, 0.3, 0.5]), np.array([0.6, 0.7, 0.9])]
+    runs = {key: np.zeros(2) for key in RUN_METRICS}
+    runs["variance"] = np.array([np.var(o) for o in opinions])
+    runs["mean_opinion"] = np.array([np.mean(o) for o in opinions])
+    summary = summarize_runs(runs)
+    assert summary["variance"] == pytest.approx(np.var(np.concatenate(opinions)))
+
+
+def test_combined_analysis_keep_runs():
+    """Test that the per-run arrays are kept and consistent with the averages."""
+    n_runs = 3
+    results = combined_analysis(n_runs, 20, 5, 0.3, 0.1, keep_runs=True)
+    for key in RUN_METRICS:
+        assert len(results["runs"][key]) == n_runs
+    assert results["num_isolates"] == pytest.approx(np.mean(results["runs"]["num_isolates"]))
+
+    runs = combined_analysis_runs(2, 20, 5, 0.3, 0.1)
+    assert set(RUN_METRICS) <= set(runs)
+
+
+@pytest.mark.parametrize("values, target_se, expected", [
+    ([0.5, 0.5, 0.5], 0.01, True),     # no spread at all
+    ([0.1, 0.9, 0.5], 0.01, False),    # too noisy
+    ([0.5], 1.0, False),               # a single run is never precise
+    ([0.1, 0.9, 0.5], {"variance": 1.0}, True),
+])
+def test_is_precise(values, target_se, expected):
+    assert is_precise({"variance": np.array(values)}, target_se) == expected
+
+
+def test_combined_analysis_sequential_sampling():
+    """Runs are added until max_runs when the tolerance cannot be reached."""
+    results = combined_analysis(2, 20, 5, 0.3, 0.1, target_se=0.0, max_runs=4)
+    assert results["n_runs"] == 4
+
+    results = combined_analysis(2, 20, 5, 0.3, 0.1, target_se=0.0, max_runs=50, time_budget=0.0)
+    assert results["n_runs"] == 2
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+import opynions.analysis.cube as cube_module
+from opynions.analysis.cube import ResultsCube, create_cube, cube_results
+
+FIXED = {"n_nodes": 20, "time_steps": 5, "m_ba": 2}
+
+
+def _cells(epsilon_values, mu_values):
+    return [{"epsilon": e, "mu": m, **FIXED} for e in epsilon_values for m in mu_values]
+
+
+@pytest.fixture
+def simulated(monkeypatch):
+    """Records the points multiprocess_runs is asked to simulate."""
+    calls = []
+    original = cube_module.multiprocess_runs
+
+    def recording(cells, n_runs, *args, **kwargs):
+        calls.append((len(cells), n_runs))
+        return original(cells, n_runs, *args, **kwargs)
+    monkeypatch.setattr(cube_module, "multiprocess_runs", recording)
+    return calls
+
+
+def test_slice_is_served_from_heatmap_sweep(tmp_path, simulated):
+    """A slice of an earlier grid is read from the cube, only new points and runs are simulated."""
+    path = str(tmp_path / "cube")
+    grid = cube_results(path, _cells([0.1, 0.3], [0.2, 0.4]), 2)
+    assert simulated == [(4, 2)]
+    assert [(d["epsilon"], d["mu"]) for d in grid] == [(0.1, 0.2), (0.1, 0.4), (0.3, 0.2), (0.3, 0.4)]
+
+    sliced = cube_results(path, _cells([0.1, 0.3], [0.4]), 2)
+    assert simulated == [(4, 2)]
+    assert sliced[1]["variance"] == grid[3]["variance"]
+
+    cube_results(path, _cells([0.1, 0.3, 0.5], [0.4]), 3)
+    assert sorted(simulated[1:]) == [(1, 3), (2, 1)]
+    cube = ResultsCube(path)
+    assert cube.count(mu=0.4, **FIXED).tolist() == [3, 3, 3]
+    assert cube.count(mu=0.2, **FIXED).tolist() == [2, 2, 0]
+
+
+def test_label_selection_and_histograms(tmp_path):
+    """sel() drops the axes of single values, histograms are averaged over the stored runs."""
+    cube = create_cube(str(tmp_path / "cube"), {"epsilon": [0.1, 0.2], "mu": [0.25], "n_nodes": 20,
+                                                "time_steps": 5, "m_ba": 2}, max_runs=3)
+    runs = {metric: np.array([1.0, 2.0]) for metric in cube.metrics}
+    runs.update({key: np.array([2.0, 4.0]) for key in cube_module.HIST_KEYS})
+    cube.add_runs({"epsilon": 0.2, "mu": 0.25, **FIXED}, runs)
+
+    assert cube.sel("variance", mu=0.25, **FIXED).shape == (2, 3)
+    assert cube.sel("variance", epsilon=0.2, mu=0.25, **FIXED)[:2].tolist() == [1.0, 2.0]
+    assert np.isnan(cube.sel(epsilon=[0.1], mu=0.25, **FIXED)).all()
+    assert np.allclose(cube.histogram(epsilon=0.2, mu=0.25, **FIXED), 3.0)
+    with pytest.raises(KeyError):
+        cube.sel(epsilon=0.15)
+    with pytest.raises(AssertionError):
+        cube.add_runs({"epsilon": 0.2, "mu": 0.25, **FIXED}, runs)
@@ -0,0 +1,74 @@
+import os
+import time
+import numpy as np
+import pytest
+import opynions.analysis.distributed as distributed
+from opynions.analysis.distributed import (
+    claim_task,
+    collect_results,
+    distributed_sweep,
+    release_claim,
+    requeue_stale,
+    run_worker,
+    submit_sweep
+)
+
+
+def test_distributed_sweep_with_local_workers(tmp_path):
+    """Two local worker processes stand in for hosts and run all tasks."""
+    cells = [(0.2, 0.1), (0.4, 0.3)]
+    queue_dir = str(tmp_path / "queue")
+    list_of_runs = distributed_sweep(queue_dir, cells, 3, 20, 3, 2, metrics=("variance",),
+                                     local_workers=2, poll_interval=0.05)
+    assert [len(runs["variance"]) for runs in list_of_runs] == [3, 3]
+    assert os.path.exists(os.path.join(queue_dir, "done"))
+    assert not os.listdir(os.path.join(queue_dir, "pending"))
+
+    # a restarted coordinator picks up the finished queue without running anything
+    again = distributed_sweep(queue_dir, cells, 3, 20, 3, 2, metrics=("variance",), poll_interval=0.05)
+    assert np.array_equal(again[0]["variance"], list_of_runs[0]["variance"])
+
+
+def test_stale_claims_are_requeued(tmp_path):
+    """A claim whose worker died is put back and run by another worker."""
+    queue_dir = str(tmp_path)
+    submit_sweep(queue_dir, [(0.3, 0.2)], 2, 15, 3, 2, metrics=("variance",))
+    task_id, _ = claim_task(queue_dir, worker="dead")
+    assert claim_task(queue_dir, worker="alive") is not None  # second run of the cell
+    assert claim_task(queue_dir) is None
+
+    claimed = os.path.join(queue_dir, "claimed", f"{task_id}.dead.claim")
+    assert requeue_stale(queue_dir, stale_after=60) == []
+    old = time.time() - 120
+    os.utime(claimed, (old, old))
+    assert requeue_stale(queue_dir, stale_after=60) == [task_id]
+
+    assert run_worker(queue_dir, poll_interval=0.01, idle_timeout=0) == 1
+    runs = collect_results(queue_dir)[0]
+    assert len(runs["variance"]) == 1
+
+
+def test_requeued_claim_is_not_released_by_its_old_worker(tmp_path):
+    """A slow worker finishing a requeued task does not remove the claim another worker took since."""
+    queue_dir = str(tmp_path)
+    submit_sweep(queue_dir, [(0.3, 0.2)], 1, 15, 3, 2, metrics=("variance",))
+    task_id, _ = claim_task(queue_dir, worker="slow")
+    old = time.time() - 120
+    os.utime(os.path.join(queue_dir, "claimed", f"{task_id}.slow.claim"), (old, old))
+    assert requeue_stale(queue_dir, stale_after=60) == [task_id]
+    assert claim_task(queue_dir, worker="fresh")[0] == task_id
+
+    release_claim(queue_dir, task_id, worker="slow")
+    assert os.listdir(os.path.join(queue_dir, "claimed")) == [f"{task_id}.fresh.claim"]
+
+
+def _crashing_worker(*args):
+    os._exit(1)
+
+
+def test_coordinator_gives_up_on_crashing_workers(tmp_path, monkeypatch):
+    """Local workers that keep dying are restarted a few times, then the coordinator raises instead of waiting."""
+    monkeypatch.setattr(distributed, "run_worker", _crashing_worker)
+    with pytest.raises(RuntimeError, match="exited 3 times"):
+        distributed_sweep(str(tmp_path), [(0.3, 0.2)], 1, 15, 3, 2, metrics=("variance",),
+                          local_workers=1, poll_interval=0.01, max_restarts=2)
@@ -0,0 +1,187 @@
+import multiprocessing as mp
+import os
+import threading
+import pytest
+import opynions.analysis.multiprocessing as multiprocessing_module
+from opynions.analysis.results_log import ResultsLog
+from opynions.core.pool import get_pool
+from opynions.analysis.multiprocessing import (
+    multiprocess_all,
+    multiprocess_runs,
+    multiprocess_sweep,
+    estimate_run_cost,
+    estimate_run_memory,
+    calibrate_memory_model,
+    make_tasks,
+    worker_all_both_params,
+    worker_variance_epsilons
+)
+
+
+def test_multiprocess_all_grid():
+    """Every point of the grid is returned with its coordinates."""
+    results = multiprocess_all([0.1, 0.3], [0.2], 2, 20, 5, 2)
+    assert sorted((r["epsilon"], r["mu"]) for r in results) == [(0.1, 0.2), (0.3, 0.2)]
+    for r in results:
+        assert 0 <= r["similarity"] <= 1
+
+
+def test_multiprocess_all_sequential_sampling():
+    """The number of runs used by each point is reported and within bounds."""
+    results = multiprocess_all([0.1, 0.3], [0.2], 2, 20, 5, 2, target_se=0.0, max_runs=3)
+    for r in results:
+        assert r["n_runs"] == 3
+
+
+def test_multiprocess_all_sequential_sampling_single_run():
+    """Starting from a single run per point, sequential sampling adds runs instead of failing."""
+    results = multiprocess_all([0.1], [0.2], 1, 20, 5, 2, target_se=0.01, max_runs=3)
+    assert 2 <= results[0]["n_runs"] <= 3
+
+
+def test_legacy_workers():
+    """The per-point workers of the old pool.starmap sweeps still return their results."""
+    results_dict = worker_all_both_params(0.3, 0.2, 2, 20, 5, 2)
+    assert results_dict["epsilon"] == 0.3 and results_dict["mu"] == 0.2
+    assert 0 <= results_dict["similarity"] <= 1
+    assert worker_variance_epsilons(0.3, 2) >= 0
+
+
+def test_estimate_run_cost_orders_rewiring_heavy_first():
+    """Small epsilon (lots of rewiring) and large networks are estimated to be more expensive."""
+    assert estimate_run_cost(0.0, 0.1, 200, 100, 2) > estimate_run_cost(0.5, 0.1, 200, 100, 2)
+    assert estimate_run_cost(0.3, 0.1, 2000, 100, 2) > estimate_run_cost(0.3, 0.1, 200, 100, 2)
+
+
+def test_multiprocess_runs_order_and_counts():
+    """Per-run arrays are returned in the order of the cells, with n_runs values each."""
+    cells = [(0.1, 0.2), (0.4, 0.2), (0.3, 0.1)]
+    list_of_runs = multiprocess_runs(cells, 3, 20, 5, 2)
+    assert len(list_of_runs) == len(cells)
+    for runs in list_of_runs:
+        assert len(runs["variance"]) == 3
+
+
+def test_multiprocess_sweep_product():
+    """Every combination is returned with all of its coordinates, run_sim names are accepted."""
+    results = multiprocess_sweep({"epsilon": [0.1, 0.3], "mu": 0.2, "N": [15, 20], "T": 5, "m_ba": [1, 2]}, 1)
+    assert len(results) == 8
+    coords = {(r["epsilon"], r["n_nodes"], r["m_ba"]) for r in results}
+    assert len(coords) == 8
+    assert all(r["mu"] == 0.2 and r["time_steps"] == 5 for r in results)
+
+
+def test_multiprocess_sweep_unknown_parameter():
+    with pytest.raises(AssertionError):
+        multiprocess_sweep({"epsilon": 0.1, "mu": 0.2, "N": 10, "T": 5, "m_ba": 1, "beta": 2}, 1)
+
+
+def test_make_tasks_batches_cheap_runs():
+    """Runs of small networks are batched, runs of large networks get a task each."""
+    keys = [(0.3, 0.1, 10, 10, 2), (0.3, 0.1, 5000, 10, 2)]
+    batch_cost = estimate_run_cost(*keys[1])
+    tasks = make_tasks({0: 50, 1: 3}, keys, batch_cost=batch_cost)
+    small = [task for task in tasks if task[0] == 0]
+    large = [task for task in tasks if task[0] == 1]
+    assert sum(task[1] for task in small) == 50 and len(small) < 50
+    assert [task[1] for task in large] == [1, 1, 1]
+    assert len(make_tasks({0: 50}, keys)) == 50
+
+
+class RecordingPool:
+    """Stands in for the pool: runs every task in a thread and records what is in flight at every start."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = []
+        self.started = []
+
+    def apply_async(self, func, args, callback, error_callback):
+        size = args[0][5]  # n_nodes, the memory estimate patched in below
+        with self.lock:
+            self.in_flight.append(size)
+            self.started.append(list(self.in_flight))
+
+        def run():
+            result = func(*args)
+            with self.lock:
+                self.in_flight.remove(size)
+            callback(result)
+        threading.Timer(0.01, run).start()
+
+
+def _budget_run(monkeypatch, memory_budget):
+    pool = RecordingPool()
+    monkeypatch.setattr(multiprocessing_module, "get_pool", lambda n_workers=None: pool)
+    monkeypatch.setattr(multiprocessing_module.mp, "cpu_count", lambda: 4)
+    monkeypatch.setattr(multiprocessing_module, "estimate_run_memory",
+                        lambda n_nodes, m_ba, memory_model=None: float(n_nodes))
+    cells = [{"epsilon": 0.2, "mu": 0.1, "n_nodes": n_nodes} for n_nodes in (200, 200, 100, 100)]
+    list_of_runs = multiprocess_runs(cells, 1, None, 3, 2, metrics=("variance",), memory_budget=memory_budget)
+    assert [len(runs["variance"]) for runs in list_of_runs] == [1, 1, 1, 1]
+    return pool.started
+
+
+def test_memory_budget_fills_memory_with_small_tasks(monkeypatch):
+    """A small task starts next to a large one when a second large one does not fit, never beyond the budget."""
+    started = _budget_run(monkeypatch, memory_budget=300)
+    assert max(sum(in_flight) for in_flight in started) == 300
+    assert started[1] == [200, 100]
+
+    # a task larger than the whole budget still runs, alone
+    started = _budget_run(monkeypatch, memory_budget=50)
+    assert len(started) == 4
+    assert all(len(in_flight) == 1 for in_flight in started)
+
+
+def test_memory_model():
+    """Memory grows with the network and a calibrated model gives positive estimates."""
+    assert estimate_run_memory(2000, 2) > estimate_run_memory(1000, 2) > estimate_run_memory(1000, 1)
+    model = calibrate_memory_model(n_nodes=100, m_ba_values=(1, 2), metrics=("variance",))
+    assert estimate_run_memory(1000, 2, model) > 0
+
+
+def test_multiprocess_runs_memory_budget():
+    """Runs under a memory budget give the same number of runs per point."""
+    list_of_runs = multiprocess_runs([(0.2, 0.1), (0.3, 0.2)], 3, 20, 3, 2, metrics=("variance",),
+                                     memory_budget=estimate_run_memory(20, 2))
+    assert [len(runs["variance"]) for runs in list_of_runs] == [3, 3]
+
+
+def test_interrupted_sweep_leaves_shared_pool_running(tmp_path, monkeypatch):
+    """An interrupted sweep stops handing out its tasks, but keeps the shared pool for everyone else."""
+    class InterruptedLog(ResultsLog):
+        def append(self, key, metrics, seconds=None):
+            raise KeyboardInterrupt
+
+    pool = get_pool()
+    monkeypatch.setattr(multiprocessing_module, "ResultsLog", InterruptedLog)
+    with pytest.raises(KeyboardInterrupt):
+        multiprocess_runs([(0.2, 0.1), (0.3, 0.1)], 5, 15, 3, 2, metrics=("variance",),
+                          results_log=tmp_path / "runs.jsonl")
+    assert get_pool() is pool
+    assert pool.apply_async(sum, ([1, 2],)).get(timeout=30) == 3
+
+
+def test_small_sweep_keeps_the_default_pool():
+    """A one-point sweep does not shrink the shared pool, so the next grid sweep reuses it."""
+    pool = get_pool()
+    multiprocess_runs([(0.2, 0.1)], 1, 15, 3, 2, metrics=("variance",))
+    assert get_pool() is pool
+
+
+def _killed_worker(task):
+    os._exit(1)  # like a worker killed by the OS, no result and no error reaches the parent
+
+
+def test_dead_worker_fails_the_sweep(monkeypatch):
+    """A sweep whose worker dies raises instead of waiting forever for the lost task."""
+    monkeypatch.setattr(multiprocessing_module, "worker_runs", _killed_worker)
+    monkeypatch.setattr(multiprocessing_module, "WORKER_CHECK_INTERVAL", 0.05)
+    pool = mp.Pool(1)
+    monkeypatch.setattr(multiprocessing_module, "get_pool", lambda n_workers=None: pool)
+    try:
+        with pytest.raises(RuntimeError, match="died"):
+            multiprocess_runs([(0.2, 0.1)], 1, 15, 3, 2, metrics=("variance",), memory_budget=1e9)
+    finally:
+        pool.terminate()
+        pool.join()
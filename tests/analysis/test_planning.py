@@ -0,0 +1,43 @@
+import numpy as np
+from opynions.analysis.planning import (
+    calibrate_cost_model,
+    plan_sweep,
+    predict_run_time,
+    recommend_settings
+)
+
+MODEL = {"simulation": np.array([1e-6, 2e-6, 1e-7, 1e-5]), "analysis": np.array([1e-6, 1e-5]),
+         "metrics": ("variance",), "memory_model": (2000.0, 700.0)}
+
+
+def test_calibrate_cost_model():
+    """A tiny calibration gives non-negative coefficients and positive predictions."""
+    model = calibrate_cost_model(n_values=(30, 60), time_steps=(2, 4), epsilon_values=(0.1, 0.4),
+                                 m_ba_values=(1, 2), metrics=("variance",))
+    assert np.all(model["simulation"] >= 0) and np.all(model["analysis"] >= 0)
+    assert predict_run_time(model, 0.2, 0.2, 2000, 100, 2) > 0
+
+
+def test_plan_sweep():
+    """Wall time shrinks with more workers while the CPU time stays the same."""
+    epsilon_values, mu_values = np.linspace(0, 0.5, 5), np.linspace(0, 0.5, 5)
+    one = plan_sweep(MODEL, epsilon_values, mu_values, 4, 1000, 50, 2, n_workers=1)
+    four = plan_sweep(MODEL, epsilon_values, mu_values, 4, 1000, 50, 2, n_workers=4)
+    assert one["runs"] == four["runs"] == 100
+    assert np.isclose(one["wall_time"], one["cpu_hours"] * 3600)
+    assert four["wall_time"] < one["wall_time"]
+    assert np.isclose(four["cpu_hours"], one["cpu_hours"])
+    assert four["peak_memory"] == 4 * one["peak_memory"]
+
+
+def test_recommend_settings():
+    """A generous budget gets the finest grid, a tight one an adaptive sweep or nothing."""
+    generous = recommend_settings(MODEL, 1e9, 1000, 50, 2, n_workers=1)
+    assert generous["method"] == "grid"
+    assert (generous["resolution"], generous["n_runs"]) == (51, 20)
+
+    per_point = plan_sweep(MODEL, [0.25], [0.25], 5, 1000, 50, 2, n_workers=1)["wall_time"]
+    tight = recommend_settings(MODEL, 50 * per_point, 1000, 50, 2, n_workers=1)
+    assert tight["method"] == "adaptive"
+    assert 16 <= tight["max_points"] < 121
+    assert recommend_settings(MODEL, per_point, 1000, 50, 2, n_workers=1)["method"] is None
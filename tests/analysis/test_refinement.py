@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+import pandas as pd
+from opynions.analysis.combined import RUN_METRICS
+from opynions.analysis.refinement import adaptive_sweep, refinement_scores
+from opynions.analysis.utils import interpolate_to_grid, is_full_grid
+
+
+def mock_evaluate(cells, n_runs, n_nodes, time_steps, m_ba, **kwargs):
+    """Mock of multiprocess_runs: the variance jumps at epsilon = 0.3, nothing else changes."""
+    list_of_runs = []
+    for epsilon, mu in cells:
+        runs = {key: np.zeros(n_runs) for key in RUN_METRICS}
+        runs["mean_opinion"] = np.full(n_runs, 0.5)
+        runs["variance"] = np.full(n_runs, 0.1 if epsilon < 0.3 else 0.0)
+        list_of_runs.append(runs)
+    return list_of_runs
+
+
+def test_refinement_scores():
+    results = {(0, 0): {"variance": 0}, (0, 1): {"variance": 0},
+               (1, 0): {"variance": 1}, (1, 1): {"variance": 1}, (2, 0): {"variance": 1}}
+    assert refinement_scores([(0, 1, 0, 1, 0)], results, ["variance"])[0] == 1
+
+
+def test_adaptive_sweep_refines_transition():
+    """New points concentrate around the jump and the budget is respected."""
+    results = adaptive_sweep((0, 0.5), (0, 0.5), 2, 20, 5, 2, metrics=["variance"],
+                             initial_points=6, max_depth=3, max_points=120, evaluate=mock_evaluate)
+    assert 36 < len(results) <= 120
+    refined = [r for r in results if r["depth"] > 0]
+    assert all(0.2 <= r["epsilon"] <= 0.4 for r in refined)
+    assert max(r["depth"] for r in results) == 3
+
+
+def test_interpolate_to_grid():
+    """Scattered points are interpolated onto a regular grid in the layout of pivot()."""
+    data = pd.DataFrame({"mu": [0, 1, 0, 1, 0.5], "epsilon": [0, 0, 1, 1, 0.5],
+                         "variance": [0, 1, 0, 1, 0.5]})
+    assert not is_full_grid(data, "mu", "epsilon")
+    grid = interpolate_to_grid(data, "variance", "mu", "epsilon", resolution=3)
+    assert grid.shape == (3, 3)
+    assert grid.loc[0.5, 0.5] == pytest.approx(0.5)
+    assert list(grid.columns) == [0, 0.5, 1]
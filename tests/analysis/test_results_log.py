@@ -0,0 +1,85 @@
+import pytest
+import numpy as np
+from opynions.analysis.combined import RUN_METRICS
+from opynions.analysis.multiprocessing import multiprocess_all, multiprocess_runs
+from opynions.analysis.results_log import ResultsLog, cell_key, read_results_log, load_results_log
+
+
+@pytest.fixture
+def metrics():
+    return {"variance": 0.08, "mean_opinion": 0.5, "num_isolates": 3, "num_communities": 2,
+            "modularity": 0.1, "similarity": 0.7}
+
+
+def test_results_log_roundtrip(tmp_path, metrics):
+    """Runs are read back per point, a torn last line is skipped and does not break appending."""
+    file_path = tmp_path / "runs.jsonl"
+    key = cell_key(np.float64(0.1), 0.2, 50, 10, 2)
+    with ResultsLog(file_path) as log:
+        log.append(key, metrics)
+        log.append(key, metrics)
+    with open(file_path, 'a') as file:
+        file.write('{"epsilon": 0.1, "mu"')  # interrupted write
+
+    with ResultsLog(file_path) as log:
+        log.append(cell_key(0.3, 0.2, 50, 10, 2), metrics)
+
+    per_cell = read_results_log(file_path)
+    assert len(per_cell[key]["variance"]) == 2
+    assert len(per_cell) == 2
+
+    partial = load_results_log(file_path)
+    assert sorted(r["n_runs"] for r in partial) == [1, 2]
+
+
+def test_results_log_mixed_metric_sets(tmp_path, metrics):
+    """Variance-only runs and full runs of the same point are read together, NaN where a metric is missing."""
+    file_path = tmp_path / "runs.jsonl"
+    key = cell_key(0.1, 0.2, 50, 10, 2)
+    with ResultsLog(file_path) as log:
+        log.append(key, {"variance": 0.05})
+        log.append(key, metrics)
+
+    runs = read_results_log(file_path)[key]
+    assert set(runs) == set(metrics)
+    assert runs["variance"].tolist() == [0.05, 0.08]
+    assert np.isnan(runs["similarity"][0]) and runs["similarity"][1] == 0.7
+
+
+def test_load_results_log_mixed_metric_sets(tmp_path, metrics):
+    """Each metric is summarized over the runs that have it, with its own run count."""
+    file_path = tmp_path / "runs.jsonl"
+    key = cell_key(0.1, 0.2, 50, 10, 2)
+    with ResultsLog(file_path) as log:
+        log.append(key, {name: value for name, value in metrics.items() if name != "modularity"})
+        log.append(key, {**metrics, "variance": 0.1})
+
+    summary, = load_results_log(file_path)
+    assert summary["n_runs"] == 2
+    assert summary["modularity"] == pytest.approx(0.1)
+    assert summary["modularity_n_runs"] == 1
+    assert summary["variance"] == pytest.approx(0.09)
+    assert "variance_n_runs" not in summary
+
+
+def test_multiprocess_all_resumes_from_log(tmp_path):
+    """A restarted sweep only simulates the runs missing from the log."""
+    file_path = tmp_path / "runs.jsonl"
+    multiprocess_all([0.1], [0.2], 2, 20, 5, 2, results_log=file_path)
+    assert len(read_results_log(file_path)[cell_key(0.1, 0.2, 20, 5, 2)]["variance"]) == 2
+
+    results = multiprocess_all([0.1, 0.3], [0.2], 2, 20, 5, 2, results_log=file_path)
+    per_cell = read_results_log(file_path)
+    assert len(per_cell) == 2
+    assert all(len(runs["variance"]) == 2 for runs in per_cell.values())
+    assert len(results) == 2
+
+
+def test_runs_with_histograms_are_resumed(tmp_path):
+    """Logged runs with opinion histograms (stored under HIST_KEYS) are reused, not simulated again."""
+    file_path = tmp_path / "runs.jsonl"
+    metrics = RUN_METRICS + ("opinion_hist",)
+    first = multiprocess_runs([(0.2, 0.3)], 2, 20, 5, 2, results_log=file_path, metrics=metrics)
+    again = multiprocess_runs([(0.2, 0.3)], 2, 20, 5, 2, results_log=file_path, metrics=metrics)
+    assert len(read_results_log(file_path)[cell_key(0.2, 0.3, 20, 5, 2)]["variance"]) == 2
+    assert np.array_equal(again[0]["hist_00"], first[0]["hist_00"])
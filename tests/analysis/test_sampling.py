@@ -0,0 +1,38 @@
+import pytest
+import numpy as np
+import pandas as pd
+from opynions.analysis.sampling import sample_parameters, sample_sweep
+from opynions.analysis.utils import interpolate_slice
+
+
+@pytest.mark.parametrize("method", ['sobol', 'halton', 'lhs'])
+def test_sample_parameters_bounds(method):
+    ranges = {"epsilon": (0.0, 0.5), "mu": (0.1, 0.2), "n_nodes": (10, 1000), "m_ba": (1, 3)}
+    samples = sample_parameters(ranges, 64, method=method, seed=0, log_scale=["n_nodes"])
+    assert len(samples) == 64
+    for sample in samples:
+        assert 0 <= sample["epsilon"] <= 0.5
+        assert 0.1 <= sample["mu"] <= 0.2
+        assert isinstance(sample["n_nodes"], int) and 10 <= sample["n_nodes"] <= 1000
+    assert {sample["m_ba"] for sample in samples} == {1, 2, 3}
+
+
+def test_sample_parameters_space_filling():
+    """A Latin hypercube puts exactly one point in every stratum of each axis."""
+    samples = sample_parameters({"epsilon": (0, 1)}, 10, method='lhs', seed=1)
+    strata = sorted(int(sample["epsilon"] * 10) for sample in samples)
+    assert strata == list(range(10))
+
+
+def test_sample_sweep_coordinates():
+    results = sample_sweep({"epsilon": (0.1, 0.5), "n_nodes": (15, 25)}, 4, 1, 20, 5, 2, mu=0.1, seed=0)
+    assert len(results) == 4
+    for r in results:
+        assert r["mu"] == 0.1 and r["time_steps"] == 5 and r["m_ba"] == 2
+        assert 15 <= r["n_nodes"] <= 25
+
+
+def test_interpolate_slice():
+    data = pd.DataFrame({"epsilon": [0, 1, 0, 1], "mu": [0, 0, 1, 1], "variance": [0, 1, 1, 2]})
+    sliced = interpolate_slice(data, "epsilon", "mu", 0.5, ["variance"], resolution=3)
+    assert np.allclose(sliced["variance"], [0.5, 1.0, 1.5])
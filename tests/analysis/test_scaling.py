@@ -0,0 +1,44 @@
+import pytest
+import numpy as np
+from opynions.analysis.scaling import (
+    critical_points,
+    fit_critical_point,
+    fit_scaling_collapse,
+    finite_size_scaling
+)
+
+
+@pytest.fixture
+def scaling_curves():
+    """Variance curves that collapse exactly with epsilon_c = 0.3, nu = 2 and beta = 0."""
+    n_values = np.array([100, 400, 1600, 6400])
+    epsilon_values = np.linspace(0.1, 0.5, 81)
+    variance = np.array([0.04 * (1 - np.tanh((epsilon_values - 0.3) * n ** 0.5)) for n in n_values])
+    return n_values, epsilon_values, variance
+
+
+def test_critical_points(scaling_curves):
+    n_values, epsilon_values, variance = scaling_curves
+    assert np.allclose(critical_points(epsilon_values, variance), 0.3, atol=1e-3)
+
+
+def test_fit_critical_point():
+    n_values = np.array([50, 200, 800, 3200, 12800])
+    epsilon_c = 0.3 + 0.5 * n_values ** -0.5
+    fit = fit_critical_point(n_values, epsilon_c)
+    assert fit["epsilon_c"] == pytest.approx(0.3, abs=1e-3)
+    assert fit["nu"] == pytest.approx(2, rel=1e-2)
+    assert np.isnan(fit_critical_point(n_values[:2], epsilon_c[:2])["nu"])
+
+
+def test_fit_scaling_collapse(scaling_curves):
+    n_values, epsilon_values, variance = scaling_curves
+    fit = fit_scaling_collapse(n_values, epsilon_values, variance, epsilon_c=0.32, nu=1.5)
+    assert fit["epsilon_c"] == pytest.approx(0.3, abs=5e-3)
+    assert fit["nu"] == pytest.approx(2, rel=0.1)
+
+
+def test_finite_size_scaling_runs():
+    results = finite_size_scaling([10, 20], [0.1, 0.3, 0.5], 0.3, 2, 5)
+    assert results["variance"].shape == (2, 3)
+    assert len(results["epsilon_c_per_n"]) == 2
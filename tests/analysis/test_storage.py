@@ -0,0 +1,76 @@
+import os
+import pytest
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+from opynions.analysis.storage import (
+    append_results,
+    convert_legacy_data,
+    load_table,
+    read_legacy_csv,
+    read_params,
+    read_results,
+    write_results
+)
+from opynions.analysis.utils import create_heatmap_from_csv, plot_subplots_from_csv
+
+RESULTS = [{"variance": 0.1 * i, "num_isolates": float(i), "epsilon": 0.1 * i, "mu": 0.2, "n_runs": 3}
+           for i in range(4)]
+
+
+def test_write_and_read_results(tmp_path):
+    """Columns are typed and a single chunk is memory-mapped."""
+    store = str(tmp_path / "store")
+    write_results(store, RESULTS, {"n_nodes": 200})
+    data = read_results(store)
+    assert isinstance(data["variance"], np.memmap)
+    assert data["n_runs"].dtype == np.int64
+    assert np.allclose(data["epsilon"], [0.0, 0.1, 0.2, 0.3])
+    assert read_params(store) == {"n_nodes": 200}
+
+
+def test_append_results(tmp_path):
+    """Appended chunks are read back in order, and columns have to match."""
+    store = str(tmp_path / "store")
+    append_results(store, RESULTS[:2])
+    append_results(store, pd.DataFrame(RESULTS[2:]), {"time_steps": 100})
+    assert np.allclose(read_results(store, ["num_isolates"])["num_isolates"], [0, 1, 2, 3])
+    assert read_params(store) == {"time_steps": 100}
+    with pytest.raises(AssertionError):
+        append_results(store, [{"variance": 1.0}])
+
+
+def test_read_legacy_csv(tmp_path):
+    """Matrix files are melted into rows and legacy column names are renamed."""
+    matrix = tmp_path / "modularity_matrix.csv"
+    matrix.write_text("epsilon \\ mu,0.0,0.5\n0.0,0.1,0.2\n0.5,0.3,0.4\n")
+    data = read_legacy_csv(str(matrix))
+    assert list(data.columns) == ["modularity", "epsilon", "mu"]
+    assert data.set_index(["epsilon", "mu"]).loc[(0.5, 0.0), "modularity"] == 0.3
+
+    columns = tmp_path / "full_analysis_epsilon_mu25.csv"
+    columns.write_text("variance,avg_isolated,epsilon\n0.1,3.0,0.0\n")
+    data = read_legacy_csv(str(columns))
+    assert set(data.columns) == {"variance", "num_isolates", "epsilon", "mu"}
+    assert data["mu"].iloc[0] == 0.25
+
+
+def test_convert_legacy_data(tmp_path):
+    """Every CSV in data/ converts to a store."""
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "..", "data")
+    stores = convert_legacy_data(data_dir, str(tmp_path))
+    assert len(stores) == len([name for name in os.listdir(data_dir) if name.endswith(".csv")])
+    for store in stores:
+        assert {"epsilon", "mu"} <= set(load_table(store).columns)
+
+
+def test_plots_load_stores(tmp_path):
+    """Plotting utilities read stores directly."""
+    store = str(tmp_path / "grid")
+    write_results(store, [{"variance": e * m, "epsilon": e, "mu": m} for e in (0.1, 0.2) for m in (0.1, 0.2)])
+    create_heatmap_from_csv(store, "variance", "mu", "epsilon")
+    store = str(tmp_path / "slice")
+    write_results(store, RESULTS)
+    plot_subplots_from_csv(store, "epsilon")
+    matplotlib.pyplot.close("all")
@@ -0,0 +1,62 @@
+import pytest
+import numpy as np
+from opynions.analysis.surrogate import Surrogate
+
+
+@pytest.fixture
+def sweep_results():
+    """Smooth metric on a coarse grid, like the output of multiprocess_all."""
+    return [{"variance": np.sin(3 * epsilon) + mu, "similarity": 1 - epsilon * mu,
+             "epsilon": epsilon, "mu": mu, "n_nodes": 200}
+            for epsilon in np.linspace(0, 0.5, 8) for mu in np.linspace(0, 0.5, 8)]
+
+
+def test_surrogate_interpolates(sweep_results):
+    surrogate = Surrogate().fit(sweep_results)
+    assert surrogate.parameters == ["epsilon", "mu"]
+    mean, std = surrogate.predict("variance", epsilon=0.237, mu=0.11)
+    assert mean[0] == pytest.approx(np.sin(3 * 0.237) + 0.11, abs=0.02)
+    assert std[0] < 0.05
+
+
+def test_surrogate_flags_extrapolation(sweep_results):
+    """Far outside the training data the predictive uncertainty is high."""
+    surrogate = Surrogate(metrics=["variance"]).fit(sweep_results)
+    _, std_inside = surrogate.predict("variance", epsilon=0.2, mu=0.2)
+    _, std_outside = surrogate.predict("variance", epsilon=2.0, mu=2.0)
+    assert std_outside[0] > 10 * std_inside[0]
+    uncertain = surrogate.uncertain_points(0.5, [0.2, 2.0], [0.2])
+    assert uncertain == [(2.0, 0.2)]
+
+
+def test_predict_grid_format(sweep_results):
+    surrogate = Surrogate(metrics=["similarity"]).fit(sweep_results)
+    grid = surrogate.predict_grid(np.linspace(0, 0.5, 21), np.linspace(0, 0.5, 11), n_nodes=200)
+    assert len(grid) == 21 * 11
+    assert set(grid[0]) == {"similarity", "similarity_ci_low", "similarity_ci_high", "epsilon", "mu"}
+    assert all(r["similarity_ci_low"] <= r["similarity"] <= r["similarity_ci_high"] for r in grid)
+
+
+def test_surrogate_rejects_other_fixed_parameters(sweep_results):
+    """A surrogate trained at one network size does not answer for another one."""
+    surrogate = Surrogate(metrics=["variance"]).fit(sweep_results)
+    assert surrogate.fixed == {"n_nodes": 200}
+    surrogate.predict("variance", epsilon=0.2, mu=0.2, n_nodes=200)
+    with pytest.raises(AssertionError, match="n_nodes"):
+        surrogate.predict("variance", epsilon=0.2, mu=0.2, n_nodes=2000)
+    with pytest.raises(AssertionError):
+        surrogate.predict_grid([0.1, 0.2], [0.1], n_nodes=2000)
+
+
+def test_surrogate_rejects_unknown_parameters():
+    """Results of multiprocess_all carry only epsilon and mu, the sweep's constants are given to fit()."""
+    rows = [{"variance": epsilon + mu, "epsilon": epsilon, "mu": mu}
+            for epsilon in np.linspace(0, 0.5, 5) for mu in np.linspace(0, 0.5, 5)]
+    bare = Surrogate(metrics=["variance"]).fit(rows)
+    with pytest.raises(AssertionError, match="n_nodes"):
+        bare.predict("variance", epsilon=0.3, mu=0.3, n_nodes=10 ** 6)
+
+    surrogate = Surrogate(metrics=["variance"]).fit(rows, n_nodes=200, time_steps=100, m_ba=2)
+    assert len(surrogate.predict_grid([0.1, 0.2], [0.3], n_nodes=200, time_steps=100, m_ba=2)) == 2
+    with pytest.raises(AssertionError, match="n_nodes"):
+        surrogate.predict_grid([0.1, 0.2], [0.3], n_nodes=2000, time_steps=100, m_ba=2)
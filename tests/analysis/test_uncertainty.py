@@ -0,0 +1,45 @@
+import pytest
+import numpy as np
+from opynions.analysis.uncertainty import (
+    stack_runs,
+    analytic_ci,
+    bootstrap_ci,
+    add_confidence_intervals
+)
+
+
+@pytest.fixture
+def list_of_runs():
+    """Per-run values of three points: precise, noisy and with a single run."""
+    return [
+        {"similarity": np.array([0.50, 0.50, 0.50, 0.50]), "mean_opinion": np.full(4, 0.5)},
+        {"similarity": np.array([0.10, 0.90, 0.20, 0.80]), "mean_opinion": np.full(4, 0.5)},
+        {"similarity": np.array([0.30]), "mean_opinion": np.array([0.5])},
+    ]
+
+
+def test_stack_runs_pads_with_nan(list_of_runs):
+    stacked = stack_runs(list_of_runs)
+    assert stacked["similarity"].shape == (3, 4)
+    assert np.isnan(stacked["similarity"][2, 1:]).all()
+
+
+@pytest.mark.parametrize("method", ['bootstrap', 'analytic'])
+def test_interval_widths(list_of_runs, method):
+    stacked = stack_runs(list_of_runs)
+    if method == 'bootstrap':
+        intervals = bootstrap_ci(stacked, ["similarity"], n_boot=200, seed=1)
+    else:
+        intervals = analytic_ci(stacked, ["similarity"])
+    low, high = intervals["similarity"]
+    assert low[0] == pytest.approx(0.5) and high[0] == pytest.approx(0.5)
+    assert low[1] < 0.5 < high[1]
+    assert np.isnan(low[2]) and np.isnan(high[2])
+
+
+def test_add_confidence_intervals_columns(list_of_runs):
+    list_of_dicts = [{"similarity": np.mean(runs["similarity"]), "epsilon": 0.1, "mu": 0.1}
+                     for runs in list_of_runs]
+    new_dicts = add_confidence_intervals(list_of_dicts, list_of_runs, metrics=["similarity"], seed=0)
+    assert list(new_dicts[0].keys()) == ["similarity", "similarity_ci_low", "similarity_ci_high",
+                                         "epsilon", "mu"]
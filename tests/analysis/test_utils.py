@@ -0,0 +1,97 @@
+import numpy as np
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import networkx as nx
+import pandas as pd
+from opynions.analysis.utils import (downsample_grid, opinion_layout, pivot_metrics, plot_heatmaps,
+                                    plot_large_graph, plot_subplots_from_csv, sample_graph)
+
+GRID = [{"variance": e + 10 * m, "similarity": e * m, "epsilon": e, "mu": m}
+        for e in (0.0, 0.1, 0.2) for m in (0.0, 0.25)]
+
+
+def test_pivot_metrics_full_grid():
+    """All metrics end up in one (metric, epsilon, mu) array."""
+    cube, metrics, x_values, y_values = pivot_metrics(GRID[::-1])
+    assert metrics == ["variance", "similarity"]
+    assert cube.shape == (2, 3, 2)
+    assert np.allclose(x_values, [0.0, 0.25]) and np.allclose(y_values, [0.0, 0.1, 0.2])
+    assert cube[0, 2, 1] == 0.2 + 2.5
+
+
+def test_bookkeeping_columns_are_not_metrics(tmp_path):
+    """n_runs and depth are neither pivoted nor plotted as metrics."""
+    rows = [{**row, "n_runs": 10, "depth": 0} for row in GRID]
+    _, metrics, _, _ = pivot_metrics(rows)
+    assert metrics == ["variance", "similarity"]
+
+    file_path = tmp_path / "slice.csv"
+    pd.DataFrame([row for row in rows if row["mu"] == 0.25]).to_csv(file_path, index=False)
+    plot_subplots_from_csv(str(file_path), "epsilon")
+    assert [axis.get_title() for axis in plt.gcf().axes] == ["variance", "similarity"]
+    plt.close("all")
+
+
+def test_pivot_metrics_scattered():
+    """Scattered points are interpolated onto a regular grid."""
+    points = GRID + [{"variance": 1.0, "similarity": 0.0, "epsilon": 0.05, "mu": 0.1}]
+    cube, _, x_values, y_values = pivot_metrics(points, resolution=11)
+    assert cube.shape == (2, 11, 11)
+
+
+def test_downsample_grid():
+    """Blocks are averaged, ignoring NaNs, until the grid fits."""
+    cube = np.arange(25, dtype=float).reshape(1, 5, 5)
+    cube[0, 0, 0] = np.nan
+    small, x_values, y_values = downsample_grid(cube, np.arange(5.0), np.arange(5.0), max_size=3)
+    assert small.shape == (1, 3, 3)
+    assert small[0, 0, 0] == np.mean([1, 5, 6])
+    assert np.allclose(x_values, [0.5, 2.5, 4])
+
+
+def test_plot_heatmaps():
+    """One figure with a panel per metric."""
+    fig = plot_heatmaps(GRID)
+    assert [ax.get_title() for ax in fig.axes if ax.get_title()] == ["variance", "similarity"]
+    plt.close(fig)
+
+
+def _opinion_graph(n_nodes):
+    g = nx.barabasi_albert_graph(n_nodes, 2, seed=0)
+    nx.set_node_attributes(g, {node: node / n_nodes for node in g}, "opinion")
+    return g
+
+
+def test_sample_graph_keeps_hubs():
+    """The sample has max_nodes nodes and contains the highest degree nodes."""
+    g = _opinion_graph(500)
+    sample = sample_graph(g, 50, seed=1)
+    assert sample.number_of_nodes() == 50
+    hubs = sorted(g.degree(), key=lambda item: -item[1])[:10]
+    assert all(node in sample for node, _ in hubs)
+    assert sample_graph(g, 1000) is g
+
+
+def test_opinion_layout():
+    """x is the opinion, y grows with the degree."""
+    g = _opinion_graph(200)
+    pos = opinion_layout(g, seed=0)
+    assert pos.shape == (200, 2)
+    assert np.allclose(pos[:, 0], np.arange(200) / 200)
+    degrees = np.array([degree for _, degree in g.degree()])
+    assert pos[degrees.argmax(), 1] > pos[degrees.argmin(), 1]
+
+
+def test_plot_large_graph(tmp_path):
+    """Edges and nodes are drawn as one collection each and the figure is saved."""
+    g = _opinion_graph(300)
+    for layout in ("opinion", "spectral", nx.circular_layout):
+        fig = plot_large_graph(g, layout=layout, max_nodes=100, max_edges=50, seed=0,
+                               save_file=True, file_path=tmp_path / "graph.png")
+        ax = fig.axes[0]
+        assert len(ax.collections) == 2
+        assert len(ax.collections[0].get_segments()) == 50
+        assert len(ax.collections[1].get_offsets()) == 100
+        assert (tmp_path / "graph.png").exists()
+        plt.close(fig)
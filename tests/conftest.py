@@ -0,0 +1,21 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark-baseline", default=None,
+                     help="run the benchmarks and fail on regressions against this baseline JSON file, "
+                          "recorded on the same machine, see benchmarks/run_benchmarks.py")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: regression check of benchmarks/run_benchmarks.py, "
+                                       "only run with --benchmark-baseline")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark-baseline"):
+        return
+    skip = pytest.mark.skip(reason="needs --benchmark-baseline")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
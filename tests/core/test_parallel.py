@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+import networkx as nx
+from opynions.core.parallel import run_replicates
+from opynions.core.utils import get_graphs, get_opinion_hist
+from opynions.analysis.combined import RUN_KEYS, combined_analysis_runs
+
+def test_run_replicates_buffers():
+    """Opinions and edges in the shared buffers describe valid graphs."""
+    n_runs, n_nodes, m_ba = 3, 30, 2
+    with run_replicates(n_runs, n_nodes, 5, 0.2, 0.1, m_ba, n_workers=2) as replicates:
+        assert replicates.opinions.shape == (n_runs, n_nodes)
+        assert np.all((replicates.opinions >= 0) & (replicates.opinions <= 1))
+        # the initial graphs are complete Barabási–Albert graphs, rewiring never adds edges
+        assert np.all(replicates.initial_edge_counts == m_ba * (n_nodes - m_ba))
+        assert np.all(replicates.edge_counts <= replicates.initial_edge_counts)
+        for run in range(n_runs):
+            g = replicates.graph(run)
+            assert g.number_of_nodes() == n_nodes
+            assert g.number_of_edges() == replicates.edge_counts[run]
+            assert nx.get_node_attributes(g, 'opinion')[4] == replicates.opinions[run, 4]
+
+def test_run_replicates_serial_matches_worker_metrics():
+    """Metrics written by the workers are those of the graphs in the buffers."""
+    with run_replicates(2, 20, 5, 0.3, 0.2, n_workers=1, analyze=None) as replicates:
+        assert replicates.metrics == {}
+    with run_replicates(2, 20, 5, 0.3, 0.2, n_workers=2, analyze=_variance,
+                        metric_keys=("variance",)) as replicates:
+        expected = np.var(replicates.opinions, axis=1)
+        assert np.allclose(replicates.metrics["variance"], expected)
+
+def _variance(g):
+    return {"variance": np.var(list(nx.get_node_attributes(g, 'opinion').values()))}
+
+def test_parallel_single_point_apis():
+    """get_graphs, get_opinion_hist and combined_analysis_runs accept parallel=True."""
+    final_graphs, initial_graphs = get_graphs(2, 15, 5, 0.2, 0.1, parallel=True, n_workers=2)
+    assert len(final_graphs) == len(initial_graphs) == 2
+    assert all(g.number_of_nodes() == 15 for g in final_graphs)
+
+    opinions, histogram, _ = get_opinion_hist(2, 15, 5, 0.2, 0.1, parallel=True, n_workers=2)
+    assert len(opinions) == 2
+    assert histogram.sum() == pytest.approx(15)
+
+    runs = combined_analysis_runs(2, 15, 5, 0.2, 0.1, parallel=True, n_workers=2)
+    assert set(runs) == set(RUN_KEYS)
+    assert len(runs["variance"]) == 2
+
+def _replicates_in_worker(_):
+    with run_replicates(2, 15, 5, 0.2, 0.1) as replicates:
+        return replicates.edge_counts.tolist()
+
+def test_run_replicates_inside_pool_worker():
+    """Inside a daemonic sweep worker the replicates fall back to running serially."""
+    import multiprocessing as mp
+    with mp.Pool(1) as pool:
+        edge_counts = pool.map(_replicates_in_worker, [0])[0]
+    assert len(edge_counts) == 2
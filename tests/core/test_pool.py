@@ -0,0 +1,27 @@
+import sys
+from opynions.core.pool import PRELOAD_MODULES, get_pool, shutdown_pool
+
+def _loaded_modules(_):
+    return [name for name in PRELOAD_MODULES if name in sys.modules]
+
+def test_get_pool_is_reused():
+    """Back-to-back calls get the same warm pool until it is shut down."""
+    pool = get_pool(1)
+    assert get_pool(1) is pool
+    assert sorted(pool.map(_loaded_modules, [0])[0]) == sorted(PRELOAD_MODULES)
+    shutdown_pool()
+    assert get_pool(1) is not pool
+
+def test_get_pool_grows():
+    """Asking for more workers than the pool has replaces it."""
+    pool = get_pool(1)
+    bigger = get_pool(2)
+    assert bigger is not pool
+    assert get_pool(1) is bigger
+    shutdown_pool(wait=False)
+
+def test_get_pool_without_growing():
+    """With grow=False a smaller pool is kept, so sweeps still using it are not disturbed."""
+    pool = get_pool(1)
+    assert get_pool(2, grow=False) is pool
+    shutdown_pool()
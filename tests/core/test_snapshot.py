@@ -0,0 +1,36 @@
+import numpy as np
+import networkx as nx
+import pytest
+from opynions.core.parallel import run_replicates
+from opynions.core.snapshot import read_snapshot, write_snapshot
+from opynions.core.utils import get_graphs
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_snapshot_round_trip(tmp_path, compress):
+    """Graphs come back with the same edges and float32 opinions."""
+    graphs, _ = get_graphs(3, 20, 3, 0.2, 0.1)
+    path = str(tmp_path / "runs.snap")
+    write_snapshot(path, graphs, {"epsilon": 0.2, "mu": 0.1}, compress=compress)
+
+    snapshot = read_snapshot(path)
+    assert len(snapshot) == 3
+    assert snapshot.params == {"epsilon": 0.2, "mu": 0.1}
+    assert isinstance(snapshot.all_opinions, np.memmap) != compress
+    assert snapshot.all_edges.dtype == np.int32
+    for index, g in enumerate(graphs):
+        loaded = snapshot.to_networkx(index)
+        assert {frozenset(e) for e in loaded.edges()} == {frozenset(e) for e in g.edges()}
+        opinions = nx.get_node_attributes(g, 'opinion')
+        assert np.allclose(snapshot.opinions(index), [opinions[n] for n in range(20)], atol=1e-7)
+
+
+def test_snapshot_from_shared_replicates(tmp_path):
+    """Replicates are written in bulk without building graphs."""
+    path = str(tmp_path / "replicates.snap")
+    with run_replicates(2, 15, 3, 0.3, 0.2, n_workers=1) as replicates:
+        replicates.to_snapshot(path, initial=True)
+        counts = replicates.initial_edge_counts.copy()
+    snapshot = read_snapshot(path)
+    assert [len(snapshot.edges(i)) for i in range(2)] == counts.tolist()
+    assert sum(1 for _ in snapshot.graphs()) == 2
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from opynions.core.simulation import run_sim
+from opynions.core.trajectory import TrajectoryWriter, create_trajectory_store, read_trajectory
+
+
+@pytest.mark.parametrize("quantize, compress", [(False, False), (False, True), (True, True)])
+def test_trajectory_records_run_sim(tmp_path, quantize, compress):
+    """Every k-th step of run_sim is recorded and the last one matches the final graph."""
+    path = str(tmp_path / "trajectory")
+    create_trajectory_store(path, 30, every=2, quantize=quantize, compress=compress, steps_per_chunk=3,
+                            nodes_per_chunk=8, params={"epsilon": 0.3})
+    with TrajectoryWriter(path, run=1) as writer:
+        g, g_init = run_sim(30, 10, 0.3, 0.2, trajectory=writer)
+
+    trajectory = read_trajectory(path)
+    assert trajectory.runs == [1] and trajectory.params == {"epsilon": 0.3}
+    assert trajectory.steps(1).tolist() == [0, 2, 4, 6, 8, 10]
+    tolerance = 1e-5 if quantize else 1e-6
+    final = [g.nodes[node]['opinion'] for node in range(30)]
+    initial = [g_init.nodes[node]['opinion'] for node in range(30)]
+    assert np.allclose(trajectory.opinions(1, 10), final, atol=tolerance)
+    assert np.allclose(trajectory.opinions(1, 0, slice(5, 20)), initial[5:20], atol=tolerance)
+
+
+def test_trajectory_random_access(tmp_path):
+    """Ranges across chunk borders come back as in the written array."""
+    path = str(tmp_path / "trajectory")
+    create_trajectory_store(path, 50, steps_per_chunk=4, nodes_per_chunk=16)
+    data = np.random.default_rng(0).random((11, 50)).astype(np.float32)
+    with TrajectoryWriter(path) as writer:
+        for step, opinions in enumerate(data):
+            writer.append(step, opinions)
+
+    steps, opinions = read_trajectory(path).read(0, slice(3, 9), slice(10, 40))
+    assert steps.tolist() == list(range(3, 9))
+    assert np.array_equal(opinions, data[3:9, 10:40])
+    steps, opinions = read_trajectory(path).read(0, slice(20, None))
+    assert opinions.shape == (0, 50)
+    with pytest.raises(AssertionError):
+        read_trajectory(path).opinions(0, 11)
@@ -0,0 +1,37 @@
+import importlib.util
+import json
+import os
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+spec = importlib.util.spec_from_file_location("run_benchmarks", os.path.join(ROOT, "benchmarks", "run_benchmarks.py"))
+run_benchmarks = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(run_benchmarks)
+
+def result(seconds, peak_bytes):
+    return {"seconds": seconds, "rate": 1 / seconds, "unit": "graphs/s", "peak_bytes": peak_bytes, "repeats": 3}
+
+def test_compare_flags_slower_and_larger_benchmarks():
+    baseline = {"fast": result(1.0, 1_000_000), "lean": result(1.0, 1_000_000), "same": result(1.0, 1_000_000)}
+    results = {"fast": result(2.0, 1_000_000), "lean": result(1.0, 2_000_000), "same": result(1.1, 1_050_000),
+               "new": result(5.0, 9_000_000)}
+    regressions = run_benchmarks.compare(results, baseline, time_tolerance=0.25, memory_tolerance=0.10)
+    assert [name for name, _ in regressions] == ["fast", "lean"]
+    assert "time" in regressions[0][1] and "memory" in regressions[1][1]
+
+def test_compare_scales_times_by_machine_speed():
+    baseline = {"sim": result(1.0, 1000)}
+    # the whole machine is twice as slow, so twice the time is no regression
+    assert run_benchmarks.compare({"sim": result(2.0, 1000)}, baseline, speed=2.0) == []
+    assert run_benchmarks.compare({"sim": result(2.0, 1000)}, baseline, time_tolerance=0.25, speed=1.0)
+
+def test_baseline_covers_all_benchmarks():
+    with open(os.path.join(ROOT, "benchmarks", "baseline.json"), encoding="utf-8") as file:
+        baseline = json.load(file)
+    assert set(run_benchmarks.benchmarks()) == set(baseline["results"])
+
+@pytest.mark.benchmark
+def test_no_regressions_against_baseline(request):
+    """The quick benchmarks are within the tolerances of a baseline recorded on this machine."""
+    baseline = request.config.getoption("--benchmark-baseline")
+    assert run_benchmarks.main(["--quick", "--baseline", baseline]) == 0, "see the REGRESSION lines above"
@@ -0,0 +1,34 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# seconds a fresh interpreter may spend importing each module, about 3x what they take now;
+# pulling matplotlib, pandas or scipy.stats back in at module level adds more than a second
+IMPORT_BUDGETS = {
+    "opynions.core.simulation": 0.6,
+    "opynions.analysis.combined": 0.9,
+    "opynions.analysis.multiprocessing": 1.2,
+    "opynions.analysis.utils": 1.2,
+    "opynions.demo": 1.2,
+}
+DEFERRED = ("matplotlib", "seaborn", "pandas", "scipy.stats")
+
+
+def _import(module):
+    """Imports module in a fresh interpreter, returns the seconds spent and the deferred modules loaded."""
+    code = (f"import json, sys, time; start = time.perf_counter(); import {module}; "
+            f"print(json.dumps([time.perf_counter() - start, [m for m in {DEFERRED!r} if m in sys.modules]]))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.splitlines()[-1])
+
+
+@pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS))
+def test_import_time_budget(module):
+    """The plotting stack, pandas and scipy.stats are only imported on first use."""
+    seconds, loaded = min(_import(module) for _ in range(2))
+    assert loaded == []
+    assert seconds < IMPORT_BUDGETS[module], f"importing {module} took {seconds:.2f} s"